@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_asgi_application()
+
+# gunicorn imports this in each worker, whose post_worker_init hook then
+# runs warmup.warm_up() (scripts/gunicorn.conf.py).
+from core import warmup  # noqa: E402
+
+warmup.preload()
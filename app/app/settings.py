@@ -41,6 +41,31 @@ ALLOWED_HOSTS.extend(
 
 # Application definition
 
+# Requests under API_PATH_PREFIX without a session cookie skip the
+# ADMIN_MIDDLEWARE, which core.middleware.AdminMiddleware runs for the
+# others, so token clients don't pay for sessions and CSRF while the
+# browsable API still sees the session of a logged-in user. APP_PROFILE=api
+# serves the API alone, with token authentication: the admin, sessions and
+# messages apps and AdminMiddleware are left out too, saving their
+# memory. /admin/ is then served by replicas of the default 'full'
+# profile, which the proxy sends it to (ADMIN_HOST).
+APP_PROFILE = os.environ.get('APP_PROFILE', 'full')
+API_ONLY = APP_PROFILE == 'api'
+API_PATH_PREFIX = '/api/'
+
+ADMIN_APPS = [
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+]
+ADMIN_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -57,15 +82,27 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ProbeMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.TracingMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.AdminMiddleware',
+    'core.middleware.ProfilingMiddleware',
 ]
 
+# The admin's checks only look for its middleware in MIDDLEWARE;
+# core.checks looks in ADMIN_MIDDLEWARE too, when AdminMiddleware runs it.
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+
+if API_ONLY:
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS if app not in ADMIN_APPS]
+    MIDDLEWARE.remove('core.middleware.AdminMiddleware')
+
 ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
@@ -78,8 +115,9 @@ TEMPLATES = [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
+            ] + ([] if API_ONLY else [
                 'django.contrib.messages.context_processors.messages',
-            ],
+            ]),
         },
     },
 ]
@@ -90,16 +128,95 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# core.db.backends.postgresql keeps connections open for CONN_MAX_AGE
+# seconds, health checks them before reuse and, with DB_POOL_SIZE > 0,
+# shares a bounded pool between the threads of each worker.
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
+        'PORT': os.environ.get('DB_PORT', ''),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASS')
+        'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'HEALTH_CHECKS': True,
+        'POOL_SIZE': int(os.environ.get('DB_POOL_SIZE', 0)),
+        'POOL_TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    }
+}
+
+# Read replicas of the primary, as a comma-separated list of host[:port]
+# in DB_REPLICA_HOSTS. Safe requests read from them, see
+# core.middleware.ReplicaRoutingMiddleware.
+
+DATABASE_REPLICAS = []
+for index, replica in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+    host, _, port = replica.partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+# Databases sharing users' recipes, tags and ingredients with default, as
+# a comma-separated list of name[@host[:port]] in DB_SHARDS. New users are
+# spread over all of them; see core.db.shards.
+
+DATABASE_SHARDS = ['default']
+for index, shard in enumerate(
+        filter(None, os.environ.get('DB_SHARDS', '').split(',')), 1):
+    name, _, address = shard.partition('@')
+    host, _, port = address.partition(':')
+    DATABASES[f'shard_{index}'] = {
+        **DATABASES['default'],
+        'NAME': name,
+        'HOST': host or DATABASES['default']['HOST'],
+        'PORT': port or DATABASES['default']['PORT'],
     }
+    DATABASE_SHARDS.append(f'shard_{index}')
+
+# What QueryBudgetMiddleware does when a view action makes more queries
+# than its query_budgets allow: 'raise', 'log', or only count it in the
+# query_budget_violations metric ('metric').
+QUERY_BUDGET_ACTION = os.environ.get(
+    'QUERY_BUDGET_ACTION', 'raise' if DEBUG else 'metric')
+
+# Queries taking SLOW_QUERY_MS or more go to the rotating SLOW_QUERY_LOG,
+# see core.db.slow_queries and manage.py slow_queries. A share of the slow
+# SELECTs, at most one per fingerprint every SLOW_QUERY_EXPLAIN_SECONDS in
+# each worker, is also run through EXPLAIN (ANALYZE, BUFFERS).
+
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+SLOW_QUERY_LOG = os.environ.get(
+    'SLOW_QUERY_LOG', '/vol/logs/slow_queries.log')
+SLOW_QUERY_LOG_BYTES = int(
+    os.environ.get('SLOW_QUERY_LOG_BYTES', 10 * 2 ** 20))
+SLOW_QUERY_EXPLAIN_RATE = float(
+    os.environ.get('SLOW_QUERY_EXPLAIN_RATE', 0.1))
+SLOW_QUERY_EXPLAIN_SECONDS = int(
+    os.environ.get('SLOW_QUERY_EXPLAIN_SECONDS', 60))
+
+# Caches count their hits and misses for /api/metrics.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.LocMemCache',
+    },
 }
 
+DATABASE_ROUTERS = [
+    'core.db.routers.ShardRouter',
+    'core.db.routers.ReplicaRouter',
+]
+
+# Seconds a client keeps reading from the primary after a write.
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -140,8 +257,30 @@ USE_TZ = True
 STATIC_URL = '/static/static/'
 MEDIA_URL = '/static/media/'
 
-STATIC_ROOT = '/vol/web/static'
-MEDIA_ROOT = '/vol/web/media'
+STATIC_ROOT = os.environ.get('STATIC_ROOT', '/vol/web/static')
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', '/vol/web/media')
+
+# collectstatic gives each asset a hashed name, listed in a manifest, and
+# writes .br/.gz copies next to it for the proxy.
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# Uploads are written through a storage recording traced writes.
+DEFAULT_FILE_STORAGE = 'core.storage.TracedFileSystemStorage'
+
+
+# Response compression
+# Responses smaller than COMPRESSION_MIN_SIZE bytes are sent as is.
+
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+
+COMPRESSION_CONTENT_TYPES = (
+    'application/json',
+    'application/msgpack',
+    'application/vnd.oai.openapi',
+    'application/javascript',
+    'text/css',
+    'text/plain',
+    'image/svg+xml',
+)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
@@ -151,10 +290,83 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
 
+# Recipe and user API responses break their time down in a Server-Timing
+# header, see core.views.ServerTimingMixin.
+SERVER_TIMING = bool(int(os.environ.get('SERVER_TIMING', 1)))
+
+# TracingMiddleware traces this share of the requests to TRACE_FILE; see
+# core.tracing. The sampled flag of a W3C traceparent header is obeyed
+# only from these networks (REMOTE_ADDR, e.g. 10.0.0.0/8), which must not
+# include a proxy that forwards outside requests.
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 0.01))
+TRACE_TRUSTED_NETWORKS = list(
+    filter(None, os.environ.get('TRACE_TRUSTED_NETWORKS', '').split(',')))
+TRACE_FILE = os.environ.get('TRACE_FILE', '/vol/logs/traces.jsonl')
+TRACE_FILE_BYTES = int(os.environ.get('TRACE_FILE_BYTES', 50 * 2 ** 20))
+
+# Workers sample their RSS every MEMORY_SAMPLE_SECONDS and, with
+# MEMORY_TRACEMALLOC_FRAMES > 0, the allocators that grew most. Past
+# MEMORY_RECYCLE_MB (0: never) they log both and are recycled; see
+# core.memory and /api/memory/.
+MEMORY_SAMPLE_SECONDS = int(os.environ.get('MEMORY_SAMPLE_SECONDS', 60))
+MEMORY_TRACEMALLOC_FRAMES = int(os.environ.get('MEMORY_TRACEMALLOC_FRAMES', 0))
+MEMORY_TOP_ALLOCATORS = int(os.environ.get('MEMORY_TOP_ALLOCATORS', 10))
+MEMORY_RECYCLE_MB = int(os.environ.get('MEMORY_RECYCLE_MB', 0))
+
+# Workers build their URL conf, DRF classes and the fields of these
+# serializers before serving, and connect to the databases; see
+# core.warmup.
+WORKER_WARMUP = bool(int(os.environ.get('WORKER_WARMUP', 1)))
+WARMUP_SERIALIZERS = [
+    'recipe.serializers.RecipeSerializer',
+    'recipe.serializers.RecipeDetailSerializer',
+    'recipe.serializers.TagSerializer',
+    'recipe.serializers.IngredientSerializer',
+    'user.serializers.UserSerializer',
+    'user.serializers.AuthTokenSerializer',
+]
+
+# /readyz keeps the outcome of its database and storage checks for this
+# many seconds in each worker; see core.health.
+READINESS_CACHE_SECONDS = float(os.environ.get('READINESS_CACHE_SECONDS', 2))
+
+# Where ProfilingMiddleware saves the profiles of requests sent by staff
+# with an X-Profile header.
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '/vol/profiles')
+
+# API-only deployments can set BROWSABLE_API=0 to serve JSON alone.
+BROWSABLE_API = bool(int(os.environ.get('BROWSABLE_API', 1)))
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'core.renderers.MessagePackRenderer',
+    ] + (
+        ['rest_framework.renderers.BrowsableAPIRenderer']
+        if BROWSABLE_API else []
+    ),
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'core.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     }
 
+if API_ONLY:
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = [
+        'rest_framework.authentication.TokenAuthentication',
+    ]
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
-}
\ No newline at end of file
+}
+
+# The OpenAPI schema is rendered with the static files when the image is
+# built (manage.py build_static), under SCHEMA_STATIC_DIR. With
+# PREBUILT_SCHEMA on, /api/schema/ serves that copy, cacheable for
+# SCHEMA_MAX_AGE seconds, instead of generating the schema.
+SCHEMA_STATIC_DIR = 'openapi'
+PREBUILT_SCHEMA = bool(int(os.environ.get('PREBUILT_SCHEMA', not DEBUG)))
+SCHEMA_MAX_AGE = int(os.environ.get('SCHEMA_MAX_AGE', 3600))
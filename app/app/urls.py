@@ -14,26 +14,33 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
-from drf_spectacular.views import (
-        SpectacularAPIView, 
-        SpectacularSwaggerView
-)
+from drf_spectacular.views import SpectacularSwaggerView
 
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core import views as core_views
+
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
+    path('api/db-stats/', core_views.DatabaseStatsView.as_view(),
+         name='db-stats'),
+    path('api/memory/', core_views.MemoryStatsView.as_view(),
+         name='memory-stats'),
+    path('api/metrics', core_views.MetricsView.as_view(), name='metrics'),
+    path('api/schema/', core_views.SchemaView.as_view(), name='api-schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='api-schema'), name='api-docs'),
     path('api/user/', include('user.urls', namespace='user')),
     path('api/recipe/', include('recipe.urls', namespace='recipe')),
 ]
 
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.append(path('admin/', admin.site.urls))
 
 if settings.DEBUG:
     urlpatterns += static(
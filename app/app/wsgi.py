@@ -7,6 +7,7 @@ For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
 """
 
+import gc
 import os
 
 from django.core.wsgi import get_wsgi_application
@@ -14,3 +15,20 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+try:
+    import uwsgi
+except ImportError:
+    uwsgi = None
+
+if uwsgi is not None:
+    from core import metrics, warmup
+
+    # Loaded in the uWSGI master: build what the workers share, then keep
+    # the garbage collector off those objects so collections in the
+    # workers don't copy their pages.
+    warmup.preload()
+    gc.freeze()
+    uwsgi.post_fork_hook = warmup.warm_up
+    # Workers inherit this and run it as they exit, e.g. when recycled.
+    uwsgi.atexit = lambda: metrics.mark_worker_dead(os.getpid())
@@ -0,0 +1,29 @@
+"""
+Benchmarks for the recipe API.
+
+Run a benchmark module from the ``app`` directory, for example::
+
+    python -m benchmarks.json_codec
+
+"""
+import os
+import time
+
+
+def setup_django():
+    """Configure Django so a benchmark can import project code."""
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    django.setup()
+
+
+def best_of(func, repeat=5, number=1):
+    """Return the fastest wall time in seconds of `number` calls to func."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) / number
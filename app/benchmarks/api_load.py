@@ -0,0 +1,295 @@
+"""
+Load test the recipe API scenario by scenario.
+
+Seeds users with tokens, tags, ingredients and recipes, starts a local
+server (see benchmarks.serving) against the same database and reports
+throughput and p50/p95/p99 latency for each scenario::
+
+    python -m benchmarks.api_load --save-baseline main
+    python -m benchmarks.api_load --compare main
+
+``--compare`` flags scenarios whose p95 grew or throughput dropped by
+more than ``--tolerance`` percent and exits with status 1 if any did.
+Baselines are JSON files in benchmarks/baselines/. The seeded users are
+deleted at the end.
+
+Benchmarks that seed data only run against databases dedicated to them,
+named ``bench*`` (DB_NAME and DB_SHARDS), unless given ``--allow-write``.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+from benchmarks import setup_django
+from benchmarks.load import run_load
+from benchmarks.serving import server_command, wait_for_port
+
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+BENCHMARK_DB_PREFIX = 'bench'
+EMAIL_DOMAIN = '@load.example.com'
+PASSWORD = 'load-test-pass'
+RECIPES_URL = '/api/recipe/recipes/'
+
+
+def add_write_argument(parser):
+    """Add the --allow-write option of the benchmarks that seed data."""
+    parser.add_argument(
+        '--allow-write', action='store_true',
+        help='Seed and delete benchmark users in databases not named '
+             f'{BENCHMARK_DB_PREFIX}*.',
+    )
+
+
+def check_write_allowed(allow_write):
+    """Exit unless benchmark data may be written to the databases."""
+    from django.conf import settings
+
+    names = [
+        settings.DATABASES[alias]['NAME']
+        for alias in settings.DATABASE_SHARDS
+    ]
+    if allow_write or all(
+            name.startswith(BENCHMARK_DB_PREFIX) for name in names):
+        return
+    sys.exit(
+        f'Refusing to seed and delete data in {", ".join(names)}: use '
+        f'databases named {BENCHMARK_DB_PREFIX}* or pass --allow-write.'
+    )
+
+
+def seed(users, recipes, tags, ingredients):
+    """Create the load test users and their data, return their fixtures."""
+    from django.contrib.auth import get_user_model
+    from rest_framework.authtoken.models import Token
+
+    from core.db.shards import shard_for_user
+    from core.models import Ingredient, Recipe, Tag
+
+    User = get_user_model()
+    User.objects.filter(email__endswith=EMAIL_DOMAIN).delete()
+    fixtures = []
+    for index in range(users):
+        user = User.objects.create_user(f'user{index}{EMAIL_DOMAIN}', PASSWORD)
+        db = shard_for_user(user)
+        tag_objs = Tag.objects.using(db).bulk_create(
+            Tag(user=user, name=f'Tag {n}') for n in range(tags))
+        ingredient_objs = Ingredient.objects.using(db).bulk_create(
+            Ingredient(user=user, name=f'Ingredient {n}')
+            for n in range(ingredients))
+        recipe_objs = Recipe.objects.using(db).bulk_create(
+            Recipe(
+                user=user, title=f'Recipe {n}', time_minutes=10 + n % 50,
+                price=f'{5 + n % 20}.50', description='Mix and serve. ' * 5,
+                link=f'https://example.com/recipes/{n}',
+            )
+            for n in range(recipes)
+        )
+        Recipe.tags.through.objects.using(db).bulk_create(
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+            for recipe in recipe_objs
+            for tag in random.sample(tag_objs, min(3, tags))
+        )
+        Recipe.ingredients.through.objects.using(db).bulk_create(
+            Recipe.ingredients.through(
+                recipe_id=recipe.id, ingredient_id=ingredient.id)
+            for recipe in recipe_objs
+            for ingredient in random.sample(
+                ingredient_objs, min(5, ingredients))
+        )
+        fixtures.append({
+            'email': user.email,
+            'token': Token.objects.create(user=user).key,
+            'recipes': [recipe.id for recipe in recipe_objs],
+            'tags': [tag.id for tag in tag_objs],
+        })
+    return fixtures
+
+
+def cleanup():
+    """Delete the load test users and everything they own."""
+    from django.contrib.auth import get_user_model
+
+    get_user_model().objects.filter(email__endswith=EMAIL_DOMAIN).delete()
+
+
+def png_bytes():
+    """Return a small PNG image."""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 120, 40)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def make_scenarios(fixtures):
+    """Return the scenarios as name -> (request callable, request share)."""
+    image = png_bytes()
+    boundary = 'loadtestboundary'
+    upload_body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="image"; '
+        f'filename="image.png"\r\nContent-Type: image/png\r\n\r\n'
+    ).encode() + image + f'\r\n--{boundary}--\r\n'.encode()
+
+    def auth(fixture, **headers):
+        return {'Authorization': f'Token {fixture["token"]}', **headers}
+
+    def json_request(method, path, fixture, data):
+        return (method, path, json.dumps(data),
+                auth(fixture, **{'Content-Type': 'application/json'}))
+
+    def list_recipes():
+        return ('GET', RECIPES_URL, None, auth(random.choice(fixtures)))
+
+    def filter_recipes():
+        fixture = random.choice(fixtures)
+        tags = ','.join(map(str, random.sample(fixture['tags'], 2)))
+        return ('GET', f'{RECIPES_URL}?tags={tags}', None, auth(fixture))
+
+    def recipe_detail():
+        fixture = random.choice(fixtures)
+        recipe_id = random.choice(fixture['recipes'])
+        return ('GET', f'{RECIPES_URL}{recipe_id}/', None, auth(fixture))
+
+    def create_with_tags():
+        return json_request('POST', RECIPES_URL, random.choice(fixtures), {
+            'title': 'Load test recipe', 'time_minutes': 20, 'price': '7.50',
+            'tags': [{'name': 'Tag 1'}, {'name': 'Load'}],
+        })
+
+    def update_recipe():
+        fixture = random.choice(fixtures)
+        recipe_id = random.choice(fixture['recipes'])
+        return json_request(
+            'PATCH', f'{RECIPES_URL}{recipe_id}/', fixture,
+            {'title': 'Updated title'})
+
+    def upload_image():
+        fixture = random.choice(fixtures)
+        recipe_id = random.choice(fixture['recipes'])
+        return (
+            'POST', f'{RECIPES_URL}{recipe_id}/upload-image/', upload_body,
+            auth(fixture, **{
+                'Content-Type': f'multipart/form-data; boundary={boundary}'}),
+        )
+
+    def token_auth():
+        fixture = random.choice(fixtures)
+        return ('POST', '/api/user/token/',
+                json.dumps({'email': fixture['email'], 'password': PASSWORD}),
+                {'Content-Type': 'application/json'})
+
+    # Token auth hashes the password on purpose, so it gets fewer requests.
+    return {
+        'list': (list_recipes, 1),
+        'filter': (filter_recipes, 1),
+        'detail': (recipe_detail, 1),
+        'create_with_tags': (create_with_tags, 0.5),
+        'update': (update_recipe, 0.5),
+        'upload_image': (upload_image, 0.25),
+        'token_auth': (token_auth, 0.05),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print the change against `baseline`, return the regressed scenarios."""
+    regressions = []
+    print(f'\n{"scenario":<17} {"req/s":>8} {"p95":>8}   vs baseline')
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        throughput = (result['throughput'] / base['throughput'] - 1) * 100
+        p95 = (result['p95'] / base['p95'] - 1) * 100
+        regressed = throughput < -tolerance or p95 > tolerance
+        if regressed:
+            regressions.append(name)
+        print(f'{name:<17} {throughput:>+7.1f}% {p95:>+7.1f}%'
+              f'{"   REGRESSION" if regressed else ""}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--scenarios', help='Comma-separated subset to run.')
+    parser.add_argument('--server', choices=('wsgi', 'asgi'), default='wsgi')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--recipes', type=int, default=50)
+    parser.add_argument('--tags', type=int, default=15)
+    parser.add_argument('--ingredients', type=int, default=30)
+    parser.add_argument('--save-baseline', metavar='NAME')
+    parser.add_argument('--compare', metavar='NAME')
+    parser.add_argument('--tolerance', type=float, default=10.0)
+    add_write_argument(parser)
+    args = parser.parse_args()
+
+    setup_django()
+    check_write_allowed(args.allow_write)
+    print(f'Seeding {args.users} users with {args.recipes} recipes each...',
+          file=sys.stderr)
+    fixtures = seed(args.users, args.recipes, args.tags, args.ingredients)
+    scenarios = make_scenarios(fixtures)
+    if args.scenarios:
+        scenarios = {
+            name: scenarios[name] for name in args.scenarios.split(',')}
+
+    media = tempfile.TemporaryDirectory()
+    env = dict(
+        os.environ, ALLOWED_HOSTS='127.0.0.1', MEDIA_ROOT=media.name,
+        SLOW_QUERY_LOG=os.path.join(media.name, 'slow_queries.log'),
+    )
+    proc = subprocess.Popen(
+        server_command(args.server, args.port, args.workers),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env,
+    )
+    results = {}
+    try:
+        wait_for_port(args.port)
+        print(f'{args.server}, {args.workers} workers, '
+              f'{args.concurrency} concurrent clients', file=sys.stderr)
+        print(f'{"scenario":<17} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} '
+              f'{"p99 ms":>8} {"errors":>7}')
+        for name, (request, share) in scenarios.items():
+            total = max(args.concurrency, int(args.requests * share))
+            run_load('127.0.0.1', args.port, request,
+                     args.concurrency * 2, args.concurrency)
+            result = results[name] = run_load(
+                '127.0.0.1', args.port, request, total, args.concurrency)
+            print(
+                f'{name:<17} {result["throughput"]:>8.0f} '
+                f'{result["p50"]:>8.2f} {result["p95"]:>8.2f} '
+                f'{result["p99"]:>8.2f} {result["errors"]:>7}'
+            )
+    finally:
+        proc.terminate()
+        proc.wait()
+        media.cleanup()
+        cleanup()
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f'{args.save_baseline}.json')
+        with open(path, 'w') as baseline:
+            json.dump({'args': vars(args), 'results': results}, baseline,
+                      indent=2)
+        print(f'\nSaved baseline {path}', file=sys.stderr)
+    if args.compare:
+        path = os.path.join(BASELINE_DIR, f'{args.compare}.json')
+        with open(path) as baseline:
+            regressions = compare(
+                results, json.load(baseline)['results'], args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark per-request database connection overhead.
+
+Simulates requests by sending request_started, running one query and
+sending request_finished, as Django's handlers do, under three setups:
+
+* ``fresh``: CONN_MAX_AGE=0, a new connection per request.
+* ``persistent``: CONN_MAX_AGE with health checks before reuse.
+* ``pooled``: connections checked out of the per-worker pool.
+
+Point it at the database with the usual DB_* environment variables::
+
+    python -m benchmarks.db_connections --requests 2000
+
+"""
+import argparse
+import time
+
+from benchmarks import setup_django
+from benchmarks.load import percentile
+
+
+SETUPS = {
+    'fresh': {'CONN_MAX_AGE': 0, 'POOL_SIZE': 0},
+    'persistent': {'CONN_MAX_AGE': 60, 'POOL_SIZE': 0},
+    'pooled': {'CONN_MAX_AGE': 60, 'POOL_SIZE': 4},
+}
+
+
+def simulate_requests(count):
+    """Return the latency in seconds of `count` one-query requests."""
+    from django.core.signals import request_finished, request_started
+    from django.db import connection
+
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        request_started.send(sender=None)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        request_finished.send(sender=None)
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
+
+
+def run(count):
+    from django.db import connection
+
+    print(f'{count} requests of one query each')
+    print(f'{"setup":<11} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+          f'{"mean ms":>8}')
+    for name, overrides in SETUPS.items():
+        connection.close()
+        connection.settings_dict.update(overrides)
+        simulate_requests(10)
+        latencies = simulate_requests(count)
+        print(
+            f'{name:<11} {percentile(latencies, 50) * 1000:>8.3f} '
+            f'{percentile(latencies, 95) * 1000:>8.3f} '
+            f'{percentile(latencies, 99) * 1000:>8.3f} '
+            f'{sum(latencies) / count * 1000:>8.3f}'
+        )
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.requests)
+
+
+if __name__ == '__main__':
+    main()
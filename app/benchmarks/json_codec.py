@@ -0,0 +1,85 @@
+"""
+Benchmark JSON encode/decode throughput on large recipe lists.
+
+Compares DRF's stdlib-json JSONRenderer/JSONParser with the orjson
+renderer and parser configured in REST_FRAMEWORK::
+
+    python -m benchmarks.json_codec --recipes 10000
+
+"""
+import argparse
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+from benchmarks import best_of, setup_django
+
+
+def make_recipes(count):
+    """Return `count` recipe dicts shaped like RecipeDetailSerializer data."""
+    created = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    return [
+        {
+            'id': i,
+            'title': f'Recipe {i}',
+            'time_minutes': i % 120,
+            'price': Decimal(i % 1000) / 10,
+            'description': 'Slow cooked with garlic, thyme and lemon. ' * 4,
+            'link': f'https://example.com/recipes/{i}.pdf',
+            'tags': [{'id': t, 'name': f'Tag {t}'} for t in range(3)],
+            'ingredients': [
+                {'id': n, 'name': f'Ingredient {n}'} for n in range(8)
+            ],
+            'image': f'/static/media/uploads/recipe/{uuid.UUID(int=i)}.jpg',
+            'created': created,
+        }
+        for i in range(count)
+    ]
+
+
+def compare(data, codecs, repeat):
+    """Time encode and decode of `data` for each codec and print throughput.
+
+    `codecs` is a list of ``(name, renderer, parser)`` tuples.
+    """
+    count = len(data)
+    print(f'{count} recipes, best of {repeat}')
+    print(f'{"codec":<12} {"size":>10} {"encode":>14} {"decode":>14}')
+    for name, renderer, parser in codecs:
+        body = renderer.render(data)
+        encode = best_of(lambda: renderer.render(data), repeat=repeat)
+        decode = best_of(
+            lambda: parser.parse(io.BytesIO(body)), repeat=repeat)
+        print(
+            f'{name:<12} {len(body) / 1024:>8.0f}KB '
+            f'{count / encode:>10.0f} r/s {count / decode:>10.0f} r/s'
+        )
+
+
+def run(count, repeat):
+    """Compare the stdlib json and orjson codecs."""
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from core.parsers import ORJSONParser
+    from core.renderers import ORJSONRenderer
+
+    compare(make_recipes(count), [
+        ('stdlib json', JSONRenderer(), JSONParser()),
+        ('orjson', ORJSONRenderer(), ORJSONParser()),
+    ], repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--recipes', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.recipes, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Minimal closed-loop HTTP load generator used by the benchmarks.
+
+"""
+import http.client
+import threading
+import time
+
+
+def percentile(values, pct):
+    """Return the `pct` percentile of a sorted list of values."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def run_load(host, port, request, total, concurrency):
+    """Send `total` requests from `concurrency` keep-alive connections.
+
+    `request` is a ``(method, path, body, headers)`` tuple or a callable
+    returning one, called once per request. Returns a dict with the
+    throughput in requests/s, p50/p95/p99 latency in ms and error count.
+    """
+    latencies = []
+    errors = []
+    remaining = [total]
+    lock = threading.Lock()
+
+    def worker():
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    break
+                remaining[0] -= 1
+            method, path, body, headers = (
+                request() if callable(request) else request)
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                res = conn.getresponse()
+                res.read()
+                failed = res.status >= 400
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                failed = True
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if failed:
+                    errors.append(elapsed)
+        conn.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput': len(latencies) / duration,
+        'p50': percentile(latencies, 50) * 1000,
+        'p95': percentile(latencies, 95) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+    }
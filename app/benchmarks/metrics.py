@@ -0,0 +1,53 @@
+"""
+Benchmark the per-request overhead of MetricsMiddleware.
+
+Calls a view that does nothing, with and without the middleware, in
+multiprocess mode as the workers run it (values in mmap-backed files),
+and prints the difference per request::
+
+    python -m benchmarks.metrics --requests 20000
+
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks import best_of, setup_django
+
+
+def run(count):
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+    from django.urls import resolve
+
+    from core.middleware import MetricsMiddleware
+
+    request = RequestFactory().get('/api/recipe/recipes/')
+    request.resolver_match = resolve('/api/recipe/recipes/')
+
+    def view(request):
+        return HttpResponse(b'[]', content_type='application/json')
+
+    middleware = MetricsMiddleware(view)
+    bare = best_of(lambda: view(request), number=count)
+    measured = best_of(lambda: middleware(request), number=count)
+
+    print(f'{count} requests')
+    print(f'{"view only":<16} {bare * 1e6:>8.2f} us')
+    print(f'{"with metrics":<16} {measured * 1e6:>8.2f} us')
+    print(f'{"overhead":<16} {(measured - bare) * 1e6:>8.2f} us')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['PROMETHEUS_MULTIPROC_DIR'] = directory
+        setup_django()
+        run(args.requests)
+
+
+if __name__ == '__main__':
+    main()
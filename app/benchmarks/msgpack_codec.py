@@ -0,0 +1,42 @@
+"""
+Benchmark MessagePack against JSON on large recipe lists.
+
+Compares payload size and encode/decode throughput of the msgpack and
+JSON renderers/parsers negotiated by the API::
+
+    python -m benchmarks.msgpack_codec --recipes 10000
+
+"""
+import argparse
+
+from benchmarks import setup_django
+from benchmarks.json_codec import compare, make_recipes
+
+
+def run(count, repeat):
+    """Compare the JSON codecs with MessagePack."""
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from core.parsers import MessagePackParser, ORJSONParser
+    from core.renderers import MessagePackRenderer, ORJSONRenderer
+
+    compare(make_recipes(count), [
+        ('stdlib json', JSONRenderer(), JSONParser()),
+        ('orjson', ORJSONRenderer(), ORJSONParser()),
+        ('msgpack', MessagePackRenderer(), MessagePackParser()),
+    ], repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--recipes', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.recipes, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
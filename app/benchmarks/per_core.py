@@ -0,0 +1,113 @@
+"""
+Benchmark uWSGI throughput per CPU core.
+
+Serves the app with the uWSGI profile of scripts/run.sh, pinned to 1, 2,
+... cores, and reports throughput per core for two sizings:
+
+* ``fixed``: the former 4 single-threaded workers, whatever the cores.
+* ``sized``: processes and threads from core.serving for those cores.
+
+::
+
+    python -m benchmarks.per_core --cores 1,2,4 --path /healthz
+
+Authenticated API paths can be benchmarked with ``--token``. The load
+generator runs on the same machine, so leave it spare cores where
+possible.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from benchmarks.load import run_load
+from benchmarks.serving import process_tree_rss, wait_for_port
+
+
+PROFILE = os.path.join(
+    os.path.dirname(__file__), '..', '..', 'scripts', 'uwsgi.ini')
+
+
+def sizing(name, cores, worker_mb):
+    """Return the (processes, threads) of a sizing for `cores`."""
+    from core import serving
+
+    if name == 'fixed':
+        return 4, 1
+    return serving.size_workers(
+        cores, serving.memory_bytes(), worker_mb * 2 ** 20)
+
+
+def bench(cores, processes, threads, args):
+    """Serve on `cores` cores, load the server and return the result."""
+    headers = {}
+    if args.token:
+        headers['Authorization'] = f'Token {args.token}'
+    request = ('GET', args.path, None, headers)
+
+    command = [
+        'uwsgi', '--ini', PROFILE, '--http', f'127.0.0.1:{args.port}',
+        '--http-keepalive', '--processes', str(processes),
+        '--threads', str(threads), '--disable-logging',
+    ]
+    allowed = sorted(os.sched_getaffinity(0))[:cores]
+    proc = subprocess.Popen(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        env=dict(os.environ, ALLOWED_HOSTS='127.0.0.1'),
+        preexec_fn=lambda: os.sched_setaffinity(0, allowed),
+    )
+    try:
+        wait_for_port(args.port)
+        run_load('127.0.0.1', args.port, request,
+                 processes * threads * 20, args.concurrency)
+        result = run_load('127.0.0.1', args.port, request,
+                          args.requests, args.concurrency)
+        result['rss'] = process_tree_rss(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument(
+        '--cores', help='Comma-separated core counts, default 1 to all.')
+    parser.add_argument('--sizings', default='fixed,sized')
+    parser.add_argument('--worker-mb', type=int, default=512,
+                        help='MEMORY_RECYCLE_MB of the sized workers.')
+    parser.add_argument('--path', default='/healthz')
+    parser.add_argument('--token')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--port', type=int, default=9100)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    available = len(os.sched_getaffinity(0))
+    cores = (
+        [int(count) for count in args.cores.split(',')]
+        if args.cores else range(1, available + 1)
+    )
+    print(f'{args.path}, {args.concurrency} concurrent clients',
+          file=sys.stderr)
+    print(f'{"sizing":<7} {"cores":>5} {"procs":>5} {"threads":>7} '
+          f'{"req/s":>8} {"req/s/core":>10} {"p99 ms":>8} {"RSS MB":>8}')
+    for count in cores:
+        if count > available:
+            print(f'Skipping {count} cores, {available} available.',
+                  file=sys.stderr)
+            continue
+        for name in args.sizings.split(','):
+            processes, threads = sizing(name, count, args.worker_mb)
+            result = bench(count, processes, threads, args)
+            print(
+                f'{name:<7} {count:>5} {processes:>5} {threads:>7} '
+                f'{result["throughput"]:>8.0f} '
+                f'{result["throughput"] / count:>10.0f} '
+                f'{result["p99"]:>8.2f} {result["rss"] / 2 ** 20:>8.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
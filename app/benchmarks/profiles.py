@@ -0,0 +1,130 @@
+"""
+Compare the full and API-only (APP_PROFILE=api) application profiles.
+
+Each profile is loaded in a fresh process, as a worker loads it, which
+reports the modules imported and the RSS added by loading the app and
+its URL conf, then the CPU time of requests through the whole WSGI
+handler and middleware chain. The profiles take turns for ``--rounds``
+rounds and the best of each is kept::
+
+    python -m benchmarks.profiles --requests 500 --rounds 3
+
+``/api/user/me/`` without a token is answered before any query, so its
+time is that of the chain. The authenticated recipe list adds the
+queries of a real request; its user is seeded first and deleted at the
+end, so the databases must be dedicated to benchmarks or ``--allow-write``
+given, see benchmarks.api_load.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks import setup_django
+from benchmarks.api_load import (
+    add_write_argument, check_write_allowed, cleanup, seed,
+)
+
+
+PROFILES = ('full', 'api')
+REPEAT = 5
+
+
+def measure(count, token):
+    """Load the app in this process and return what it cost."""
+    from core.memory import rss_bytes
+
+    modules, rss = len(sys.modules), rss_bytes()
+    setup_django()
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+    from django.urls import get_resolver
+
+    handler = WSGIHandler()
+    get_resolver().url_patterns
+    result = {
+        'modules': len(sys.modules) - modules,
+        'rss': rss_bytes() - rss,
+    }
+
+    def start_response(status, headers):
+        pass
+
+    requests = {
+        'unauthenticated': ('/api/user/me/', {}),
+        'recipe list': (
+            '/api/recipe/recipes/', {'HTTP_AUTHORIZATION': f'Token {token}'}),
+    }
+    for name, (path, headers) in requests.items():
+        environ = RequestFactory()._base_environ(
+            PATH_INFO=path, REQUEST_METHOD='GET', **headers)
+
+        def request():
+            response = handler(dict(environ), start_response)
+            response.close()
+
+        request()
+        cpu = float('inf')
+        for _ in range(REPEAT):
+            start = time.process_time()
+            for _ in range(count):
+                request()
+            cpu = min(cpu, time.process_time() - start)
+        result[name] = cpu / count
+    return result
+
+
+def run_profile(profile, count, token):
+    """Measure `profile` in a new process and return its result."""
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.profiles', '--child',
+         '--requests', str(count), '--token', token],
+        env=dict(os.environ, APP_PROFILE=profile, ALLOWED_HOSTS='testserver',
+                 TRACE_SAMPLE_RATE='0'),
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--child', action='store_true',
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--token', help=argparse.SUPPRESS)
+    add_write_argument(parser)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.requests, args.token)))
+        return
+
+    setup_django()
+    check_write_allowed(args.allow_write)
+
+    token = seed(1, 10, 5, 5)[0]['token']
+    try:
+        results = {}
+        for _ in range(args.rounds):
+            for profile in PROFILES:
+                result = run_profile(profile, args.requests, token)
+                best = results.setdefault(profile, result)
+                for key, value in result.items():
+                    best[key] = min(best[key], value)
+    finally:
+        cleanup()
+
+    print(f'{"profile":<8} {"modules":>8} {"load MB":>8} '
+          f'{"unauth us":>10} {"list us":>10}  (CPU per request)')
+    for profile, result in results.items():
+        print(f'{profile:<8} {result["modules"]:>8} '
+              f'{result["rss"] / 2 ** 20:>8.1f} '
+              f'{result["unauthenticated"] * 1e6:>10.1f} '
+              f'{result["recipe list"] * 1e6:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
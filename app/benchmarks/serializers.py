@@ -0,0 +1,190 @@
+"""
+Benchmark the recipe serializers and queryset builders in process.
+
+Seeds a user with recipes, tags and ingredients (as benchmarks.api_load
+does) and reports, for each case, the CPU time and the peak of memory traced
+by tracemalloc per item, and the queries made::
+
+    python -m benchmarks.serializers --save-baseline main
+    python -m benchmarks.serializers --compare main
+
+Queryset cases build the queryset with the view's get_queryset() and
+evaluate it, serializer cases serialize instances loaded beforehand, so
+any query they make is a lazy load. ``--compare`` flags cases whose CPU
+time or peak memory grew by more than ``--tolerance`` percent, or that
+make more queries, and exits with status 1 if any did.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from benchmarks import setup_django
+from benchmarks.api_load import (
+    BASELINE_DIR, add_write_argument, check_write_allowed, cleanup, seed,
+)
+
+
+def make_view(viewset, action, user, query=''):
+    """Return a viewset instance set up as for a GET request."""
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    request = Request(APIRequestFactory().get(f'/?{query}'))
+    request.user = user
+    return viewset(action=action, request=request, format_kwarg=None,
+                   args=(), kwargs={})
+
+
+def make_cases(user, fixture):
+    """Return the cases as name -> callable returning the items handled."""
+    from recipe import serializers
+    from recipe.views import RecipeViewSet, TagViewSet
+
+    tags = ','.join(map(str, fixture['tags'][:2]))
+    list_view = make_view(RecipeViewSet, 'list', user)
+    filter_view = make_view(RecipeViewSet, 'list', user, f'tags={tags}')
+    detail_view = make_view(RecipeViewSet, 'retrieve', user)
+    sparse_view = make_view(
+        RecipeViewSet, 'list', user, 'fields=id,title,tags')
+    tag_view = make_view(TagViewSet, 'list', user)
+    assigned_view = make_view(TagViewSet, 'list', user, 'assigned_only=1')
+    recipe_id = fixture['recipes'][0]
+
+    recipes = list(list_view.get_queryset())
+    tag_objs = list(tag_view.get_queryset())
+    context = list_view.get_serializer_context()
+
+    def queryset(view, **filters):
+        return lambda: len(view.get_queryset().filter(**filters))
+
+    def serialize_list(serializer_class, instances):
+        return lambda: len(
+            serializer_class(instances, many=True, context=context).data)
+
+    def serialize_each(serializer_class, instances):
+        def run():
+            for instance in instances:
+                serializer_class(instance, context=context).data
+            return len(instances)
+        return run
+
+    return {
+        'qs recipes': queryset(list_view),
+        'qs recipes ?tags': queryset(filter_view),
+        'qs recipes ?fields': queryset(sparse_view),
+        'qs recipe detail': queryset(detail_view, pk=recipe_id),
+        'qs tags': queryset(tag_view),
+        'qs tags ?assigned': queryset(assigned_view),
+        'RecipeSerializer': serialize_list(
+            serializers.RecipeSerializer, recipes),
+        'RecipeDetail each': serialize_each(
+            serializers.RecipeDetailSerializer, recipes),
+        'TagSerializer': serialize_list(serializers.TagSerializer, tag_objs),
+    }
+
+
+def measure(func, repeat):
+    """Return the items, CPU and peak memory per item, and queries of func."""
+    from core.metrics import RequestStats
+
+    items = func()
+    cpu = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        items = func()
+        cpu = min(cpu, time.process_time() - start)
+
+    with RequestStats().measure() as stats:
+        tracemalloc.start()
+        try:
+            base = tracemalloc.get_traced_memory()[0]
+            func()
+            peak = tracemalloc.get_traced_memory()[1] - base
+        finally:
+            tracemalloc.stop()
+
+    items = max(items, 1)
+    return {
+        'items': items,
+        'cpu_us': cpu / items * 1e6,
+        'peak_bytes': peak / items,
+        'queries': stats.queries,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print the change against `baseline`, return the regressed cases."""
+    regressions = []
+    print(f'\n{"case":<20} {"cpu":>8} {"peak":>8} {"queries":>8}'
+          f'   vs baseline')
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        cpu = (result['cpu_us'] / base['cpu_us'] - 1) * 100
+        peak = (result['peak_bytes'] / base['peak_bytes'] - 1) * 100
+        queries = result['queries'] - base['queries']
+        regressed = cpu > tolerance or peak > tolerance or queries > 0
+        if regressed:
+            regressions.append(name)
+        print(f'{name:<20} {cpu:>+7.1f}% {peak:>+7.1f}% {queries:>+8}'
+              f'{"   REGRESSION" if regressed else ""}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--recipes', type=int, default=500)
+    parser.add_argument('--tags', type=int, default=30)
+    parser.add_argument('--ingredients', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save-baseline', metavar='NAME')
+    parser.add_argument('--compare', metavar='NAME')
+    parser.add_argument('--tolerance', type=float, default=10.0)
+    add_write_argument(parser)
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error('--repeat must be at least 1.')
+
+    setup_django()
+    check_write_allowed(args.allow_write)
+    from django.contrib.auth import get_user_model
+
+    print(f'Seeding a user with {args.recipes} recipes...', file=sys.stderr)
+    fixture = seed(1, args.recipes, args.tags, args.ingredients)[0]
+    results = {}
+    try:
+        user = get_user_model().objects.get(email=fixture['email'])
+        print(f'{"case":<20} {"items":>6} {"cpu us/item":>12} '
+              f'{"peak B/item":>13} {"queries":>8}')
+        for name, func in make_cases(user, fixture).items():
+            result = results[name] = measure(func, args.repeat)
+            print(
+                f'{name:<20} {result["items"]:>6} {result["cpu_us"]:>12.1f} '
+                f'{result["peak_bytes"]:>13.0f} {result["queries"]:>8}'
+            )
+    finally:
+        cleanup()
+
+    if args.save_baseline:
+        path = os.path.join(
+            BASELINE_DIR, f'serializers-{args.save_baseline}.json')
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(path, 'w') as baseline:
+            json.dump({'args': vars(args), 'results': results}, baseline,
+                      indent=2)
+        print(f'\nSaved baseline {path}', file=sys.stderr)
+    if args.compare:
+        path = os.path.join(BASELINE_DIR, f'serializers-{args.compare}.json')
+        with open(path) as baseline:
+            regressions = compare(
+                results, json.load(baseline)['results'], args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
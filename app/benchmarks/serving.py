@@ -0,0 +1,132 @@
+"""
+Compare the WSGI (uWSGI) and ASGI (gunicorn + uvicorn) serving paths.
+
+Starts each server locally with the same number of worker processes,
+drives it with a closed-loop load generator and reports throughput,
+latency and the resident memory of the whole process tree::
+
+    python -m benchmarks.serving --workers 2 --concurrency 64 \\
+        --path /healthz
+
+Authenticated API paths can be benchmarked with ``--token``.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks.load import run_load
+
+
+def server_command(server, port, workers):
+    """Return the command line that starts `server` on `port`."""
+    if server == 'asgi':
+        return [
+            'gunicorn', 'app.asgi:application',
+            '--bind', f'127.0.0.1:{port}',
+            '--workers', str(workers),
+            '--worker-class', 'uvicorn.workers.UvicornWorker',
+            '--log-level', 'warning',
+        ]
+    return [
+        'uwsgi', '--http', f'127.0.0.1:{port}', '--http-keepalive',
+        '--workers', str(workers), '--master', '--enable-threads',
+        '--module', 'app.wsgi', '--disable-logging', '--die-on-term',
+    ]
+
+
+def wait_for_port(port, timeout=30):
+    """Block until something accepts connections on `port`."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(('127.0.0.1', port)) == 0:
+                return
+        time.sleep(0.05)
+    raise RuntimeError(f'Server did not start on port {port}.')
+
+
+def process_tree_rss(pid):
+    """Return the summed RSS in bytes of `pid` and all its descendants."""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return total
+
+
+def bench(server, args):
+    """Start `server`, load it and return the result dict."""
+    headers = {}
+    if args.token:
+        headers['Authorization'] = f'Token {args.token}'
+    request = ('GET', args.path, None, headers)
+
+    env = dict(os.environ, ALLOWED_HOSTS='127.0.0.1')
+    proc = subprocess.Popen(
+        server_command(server, args.port, args.workers),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env,
+    )
+    try:
+        wait_for_port(args.port)
+        run_load('127.0.0.1', args.port, request,
+                 args.workers * 20, args.concurrency)
+        result = run_load('127.0.0.1', args.port, request,
+                          args.requests, args.concurrency)
+        result['rss'] = process_tree_rss(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--servers', default='wsgi,asgi')
+    parser.add_argument('--path', default='/healthz')
+    parser.add_argument('--token')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--port', type=int, default=9100)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    print(f'{args.path}, {args.workers} workers, '
+          f'{args.concurrency} concurrent clients', file=sys.stderr)
+    print(f'{"server":<6} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8} '
+          f'{"errors":>7} {"RSS MB":>8} {"req/s/MB":>9}')
+    for server in args.servers.split(','):
+        result = bench(server, args)
+        rss_mb = result['rss'] / 2 ** 20
+        print(
+            f'{server:<6} {result["throughput"]:>8.0f} '
+            f'{result["p50"]:>8.2f} {result["p99"]:>8.2f} '
+            f'{result["errors"]:>7} {rss_mb:>8.1f} '
+            f'{result["throughput"] / rss_mb:>9.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.core.checks import Tags, register
+from django.core.signals import request_finished
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate, pre_delete
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core import checks, memory
+        from core.db import shards, slow_queries
+
+        post_migrate.connect(shards.offset_sequences, sender=self)
+        pre_delete.connect(
+            shards.delete_user_copy, sender=self.get_model('User'))
+        connection_created.connect(slow_queries.install)
+        request_finished.connect(memory.monitor)
+        register(checks.check_admin_middleware, Tags.admin)
@@ -0,0 +1,29 @@
+"""
+Cache backends counting their hits and misses.
+
+"""
+from django.core.cache.backends import locmem
+
+from core.metrics import CACHE_REQUESTS
+
+
+_missing = object()
+
+
+class MetricsCacheMixin:
+    """Count the lookups of a cache backend in core.metrics.
+
+    get_many() and the other helpers of BaseCache count through get().
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        if value is _missing:
+            CACHE_REQUESTS.labels('miss').inc()
+            return default
+        CACHE_REQUESTS.labels('hit').inc()
+        return value
+
+
+class LocMemCache(MetricsCacheMixin, locmem.LocMemCache):
+    """Local-memory cache counting its hits and misses."""
@@ -0,0 +1,45 @@
+"""
+System checks for the application.
+
+"""
+from django.apps import apps
+from django.conf import settings
+from django.core import checks
+from django.utils.module_loading import import_string
+
+
+ADMIN_MIDDLEWARE = 'core.middleware.AdminMiddleware'
+
+# The middleware the admin needs. It checks for them itself in
+# admin.E408-E410, which only look in MIDDLEWARE and are silenced.
+REQUIRED_BY_ADMIN = {
+    'core.E001': 'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.E002': 'django.contrib.messages.middleware.MessageMiddleware',
+    'core.E003': 'django.contrib.sessions.middleware.SessionMiddleware',
+}
+
+
+def check_admin_middleware(app_configs, **kwargs):
+    """Check the middleware the admin needs run for it.
+
+    They run from MIDDLEWARE, or from ADMIN_MIDDLEWARE when AdminMiddleware
+    is in MIDDLEWARE.
+    """
+    if not apps.is_installed('django.contrib.admin'):
+        return []
+    middleware = list(settings.MIDDLEWARE)
+    if ADMIN_MIDDLEWARE in middleware:
+        middleware += settings.ADMIN_MIDDLEWARE
+    classes = [import_string(path) for path in middleware]
+
+    errors = []
+    for error_id, path in REQUIRED_BY_ADMIN.items():
+        required = import_string(path)
+        if not any(issubclass(cls, required) for cls in classes):
+            errors.append(checks.Error(
+                f"'{path}' must be in MIDDLEWARE, or in ADMIN_MIDDLEWARE "
+                f"with '{ADMIN_MIDDLEWARE}' in MIDDLEWARE, in order to use "
+                f"the admin application.",
+                id=error_id,
+            ))
+    return errors
@@ -0,0 +1,93 @@
+"""
+Compression helpers shared by the response middleware and static storage.
+
+"""
+import zlib
+
+import brotli
+
+
+BROTLI = 'br'
+GZIP = 'gzip'
+
+# Encodings in order of preference, for clients weighing them equally.
+ENCODINGS = (BROTLI, GZIP)
+
+# Fast levels for per-request compression, maximum levels for files that
+# are compressed once at build time.
+RESPONSE_LEVELS = {BROTLI: 4, GZIP: 6}
+STATIC_LEVELS = {BROTLI: 11, GZIP: 9}
+
+# wbits selecting the gzip container for zlib.
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def parse_accept_encoding(accept_encoding):
+    """Return the q-value of each coding listed in an Accept-Encoding header.
+
+    A malformed q-value counts as 0, refusing the coding.
+    """
+    qvalues = {}
+    for item in accept_encoding.split(','):
+        coding, *params = item.split(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        qvalue = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        qvalues[coding] = qvalue
+    return qvalues
+
+
+def select_encoding(accept_encoding):
+    """Return the encoding to use for an Accept-Encoding header, or None.
+
+    The client's highest q-value wins, ties going to the order of
+    ENCODINGS. Codings with q=0, or not listed when there is no ``*``,
+    are not used.
+    """
+    qvalues = parse_accept_encoding(accept_encoding)
+    selected, best = None, 0.0
+    for encoding in ENCODINGS:
+        qvalue = qvalues.get(encoding, qvalues.get('*', 0.0))
+        if qvalue > best:
+            selected, best = encoding, qvalue
+    return selected
+
+
+def compress(data, encoding, level):
+    """Compress a bytestring with the given encoding."""
+    if encoding == BROTLI:
+        return brotli.compress(data, quality=level)
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_sequence(sequence, encoding, level):
+    """Compress an iterable of bytestrings chunk by chunk.
+
+    Each chunk is flushed as soon as it is compressed so clients receive
+    streamed content incrementally.
+    """
+    if encoding == BROTLI:
+        compressor = brotli.Compressor(quality=level)
+        for item in sequence:
+            data = compressor.process(item) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+        for item in sequence:
+            data = compressor.compress(item) + compressor.flush(
+                zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
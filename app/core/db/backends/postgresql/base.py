@@ -0,0 +1,166 @@
+"""
+PostgreSQL backend with connection health checks and per-worker pooling.
+
+Extra keys read from the DATABASES entry, next to Django's own:
+
+* ``HEALTH_CHECKS``: check a connection kept open by ``CONN_MAX_AGE`` with
+  ``SELECT 1`` before the first query of each request, and reconnect if
+  the server dropped it.
+* ``POOL_SIZE``: when above 0, connections are checked out of a bounded
+  pool shared by all threads of the worker and returned at the end of
+  each request. ``CONN_MAX_AGE`` then caps how long a pooled connection
+  lives. Use it when workers serve requests from several threads.
+* ``POOL_TIMEOUT``: seconds to wait for a free pooled connection.
+
+Pools and counters are per process; they are reset after a fork.
+"""
+import os
+import threading
+from collections import Counter
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from core.db.pool import ConnectionPool
+
+
+_registry = {'pid': None, 'pools': {}, 'counters': {}}
+_registry_lock = threading.Lock()
+
+
+def _process_registry():
+    """Return the pools and counters of the current process."""
+    if _registry['pid'] != os.getpid():
+        with _registry_lock:
+            if _registry['pid'] != os.getpid():
+                _registry.update(pid=os.getpid(), pools={}, counters={})
+    return _registry
+
+
+def connection_stats():
+    """Return connection counters and pool stats of this process by alias."""
+    registry = _process_registry()
+    with _registry_lock:
+        stats = {
+            alias: dict(counters)
+            for alias, counters in registry['counters'].items()
+        }
+        for (alias, name), pool in registry['pools'].items():
+            stats.setdefault(alias, {})['pool'] = pool.stats()
+    return stats
+
+
+def check_connection(connection):
+    """Return True if a raw psycopg2 connection answers a query."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except base.Database.Error:
+        return False
+    return True
+
+
+def reset_connection(connection):
+    """Roll back any open transaction before a connection is reused."""
+    if connection.closed:
+        return False
+    status = connection.info.transaction_status
+    if status in (extensions.TRANSACTION_STATUS_INTRANS,
+                  extensions.TRANSACTION_STATUS_INERROR):
+        connection.rollback()
+        return True
+    return status == extensions.TRANSACTION_STATUS_IDLE
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL wrapper adding health checks and optional pooling."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    @property
+    def counters(self):
+        registry = _process_registry()
+        with _registry_lock:
+            return registry['counters'].setdefault(self.alias, Counter())
+
+    @property
+    def pool(self):
+        """Return this process's pool for the database, if pooling is on."""
+        if not self.settings_dict.get('POOL_SIZE'):
+            return None
+
+        registry = _process_registry()
+        key = (self.alias, self.settings_dict['NAME'])
+        with _registry_lock:
+            if key not in registry['pools']:
+                registry['pools'][key] = ConnectionPool(
+                    max_size=self.settings_dict['POOL_SIZE'],
+                    max_age=self.settings_dict['CONN_MAX_AGE'],
+                    timeout=self.settings_dict.get('POOL_TIMEOUT', 30),
+                    check=check_connection,
+                    reset=reset_connection,
+                )
+            return registry['pools'][key]
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            self._count('opened')
+            return super().get_new_connection(conn_params)
+
+        parent = super()
+        connection = pool.acquire(
+            lambda: parent.get_new_connection(conn_params))
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level)
+        return connection
+
+    def connect(self):
+        # A fresh connection needs no check; connect() itself calls
+        # ensure_connection() before the connection is configured.
+        self.health_check_done = True
+        super().connect()
+
+    def ensure_connection(self):
+        if self.connection is not None and not self.health_check_done:
+            self.close_if_health_check_failed()
+        super().ensure_connection()
+
+    def close_if_health_check_failed(self):
+        """Close a reused connection the server no longer answers on."""
+        self.health_check_done = True
+        if (not self.settings_dict.get('HEALTH_CHECKS')
+                or self.pool is not None or self.in_atomic_block):
+            return
+
+        self._count('health_checks')
+        if not self.is_usable():
+            self._count('health_check_failures')
+            self.close()
+
+    def close_if_unusable_or_obsolete(self):
+        if (self.connection is not None and self.pool is not None
+                and not self.in_atomic_block):
+            # Hand pooled connections back between requests.
+            self.close()
+        else:
+            super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            pool.release(
+                self.connection,
+                reusable=not (self.in_atomic_block or self.errors_occurred),
+            )
+
+    def _count(self, name):
+        counters = self.counters
+        with _registry_lock:
+            counters[name] += 1
@@ -0,0 +1,136 @@
+"""
+A bounded, thread-safe pool of database connections.
+
+"""
+import threading
+import time
+from collections import Counter
+
+from django.db.utils import OperationalError
+
+
+class PoolTimeout(OperationalError):
+    """Raised when no pooled connection frees up within the timeout."""
+
+
+class ConnectionPool:
+    """Share at most `max_size` DB-API connections between threads.
+
+    Checkouts beyond `max_size` wait up to `timeout` seconds for a
+    connection to be released. Idle connections are reused newest first
+    and discarded once older than `max_age` seconds, when `check` reports
+    them dead or when `reset` can't return them to a clean state.
+    """
+
+    def __init__(self, max_size, max_age=None, timeout=30,
+                 check=None, reset=None):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.timeout = timeout
+        self.check = check
+        self.reset = reset
+        self.counters = Counter()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        # Idle (connection, created) pairs, most recently released last.
+        self._idle = []
+        # Creation times of checked out connections, by id().
+        self._in_use = {}
+
+    def acquire(self, connect):
+        """Check out a connection, calling `connect` if none is idle."""
+        if not self._slots.acquire(blocking=False):
+            self._count('waits')
+            if not self._slots.acquire(timeout=self.timeout):
+                self._count('timeouts')
+                raise PoolTimeout(
+                    'No pooled database connection became free within '
+                    f'{self.timeout} seconds.'
+                )
+
+        try:
+            connection, created = self._reuse()
+            if connection is None:
+                connection, created = connect(), time.monotonic()
+                self._count('opened')
+            with self._lock:
+                self._in_use[id(connection)] = created
+            return connection
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, reusable=True):
+        """Return a checked out connection to the pool."""
+        with self._lock:
+            created = self._in_use.pop(id(connection), None)
+
+        try:
+            if (reusable and created is not None
+                    and not self._expired(created)
+                    and self._reset(connection)):
+                with self._lock:
+                    self._idle.append((connection, created))
+            else:
+                self._discard(connection)
+        finally:
+            self._slots.release()
+
+    def close_idle(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def stats(self):
+        """Return the pool size and its lifetime counters."""
+        with self._lock:
+            stats = {
+                'max_size': self.max_size,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+            }
+        for name in ('opened', 'reused', 'discarded', 'waits', 'timeouts'):
+            stats[name] = self.counters[name]
+        return stats
+
+    def _reuse(self):
+        """Pop the newest healthy idle connection, discarding dead ones."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None, None
+                connection, created = self._idle.pop()
+
+            if self._expired(created) or (
+                    self.check is not None and not self.check(connection)):
+                self._discard(connection)
+                continue
+
+            self._count('reused')
+            return connection, created
+
+    def _reset(self, connection):
+        """Return True if the connection is clean enough to reuse."""
+        if self.reset is None:
+            return True
+        try:
+            return self.reset(connection)
+        except Exception:
+            return False
+
+    def _expired(self, created):
+        return (self.max_age is not None
+                and time.monotonic() - created >= self.max_age)
+
+    def _discard(self, connection):
+        self._count('discarded')
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
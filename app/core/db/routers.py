@@ -0,0 +1,107 @@
+"""
+Database routers.
+
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from core.db.shards import is_sharded, shard_for_user
+
+
+_use_replicas = contextvars.ContextVar('use_replicas', default=False)
+
+
+@contextmanager
+def use_replicas(enabled=True):
+    """Allow or forbid routing reads to replicas within the block."""
+    token = _use_replicas.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replicas.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads to the DATABASE_REPLICAS when the current code allows it.
+
+    Reads only go to a replica inside ``use_replicas()``, which
+    ReplicaRoutingMiddleware enters for safe requests. Everything else,
+    including management commands, reads from and writes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and _use_replicas.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Objects loaded from a replica must be saved to the primary.
+        instance = hints.get('instance')
+        if (instance is not None
+                and instance._state.db in settings.DATABASE_REPLICAS):
+            return 'default'
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ShardRouter:
+    """Keep users' recipes, tags and ingredients on their DATABASE_SHARDS.
+
+    Queries pick the shard through ``ShardedQuerySet.for_user()``; the
+    router covers saves and the queries Django makes for related objects.
+    """
+
+    def _shard_of(self, model, instance):
+        if instance is None:
+            return None
+        # Django asks where to put a new object when its user is assigned.
+        if is_sharded(model) and isinstance(instance, get_user_model()):
+            return shard_for_user(instance)
+        if instance._state.db is not None:
+            return instance._state.db
+        # Links between a recipe and its tags or ingredients have no user.
+        user_id = getattr(instance, 'user_id', None)
+        if is_sharded(type(instance)) and user_id is not None:
+            user = type(instance).user.field.get_cached_value(instance, None)
+            if user is None:
+                user = get_user_model().objects.using('default').only(
+                    'shard').get(pk=user_id)
+            return shard_for_user(user)
+        return None
+
+    def db_for_read(self, model, **hints):
+        db = self._shard_of(model, hints.get('instance'))
+        if db not in settings.DATABASE_SHARDS or db == 'default':
+            return None
+        # Users and tokens are read from the default database.
+        return db if is_sharded(model) else 'default'
+
+    def db_for_write(self, model, **hints):
+        db = self._shard_of(model, hints.get('instance'))
+        if db not in settings.DATABASE_SHARDS:
+            return None
+        return db if is_sharded(model) else 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if (obj1._state.db in settings.DATABASE_SHARDS
+                and obj2._state.db in settings.DATABASE_SHARDS):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -0,0 +1,193 @@
+"""
+Per-user sharding of recipe data.
+
+Every user lives on the default database and is assigned one of the
+DATABASE_SHARDS, stored in ``User.shard``. The user's recipes, tags and
+ingredients, and the links between them, live on that shard. The shards
+are full copies of the schema and hold a copy of the user row so the
+foreign keys hold.
+
+IDs stay unique across shards: each shard numbers its rows from
+``index * SHARD_ID_STRIDE``, so a user's rows keep their IDs when
+move_user() copies them to another shard.
+"""
+import zlib
+
+from django.conf import settings
+from django.db import connections, models, transaction
+
+
+SHARD_ID_STRIDE = 10 ** 12
+
+# Models whose rows live on the owner's shard.
+SHARDED_MODELS = {
+    'core.Recipe',
+    'core.Recipe_tags',
+    'core.Recipe_ingredients',
+    'core.Tag',
+    'core.Ingredient',
+}
+
+
+def is_sharded(model):
+    """Return whether rows of the model live on their owner's shard."""
+    return model._meta.label in SHARDED_MODELS
+
+
+def assign_shard(email):
+    """Pick the shard for a new user."""
+    shards = settings.DATABASE_SHARDS
+    return shards[zlib.crc32(email.lower().encode()) % len(shards)]
+
+
+def shard_for_user(user):
+    """Return the database alias holding the user's recipe data."""
+    return getattr(user, 'shard', None) or 'default'
+
+
+class ShardedQuerySet(models.QuerySet):
+    """QuerySet for models owned by a user and stored on their shard."""
+
+    def for_user(self, user):
+        """Return the user's rows, read from the user's shard.
+
+        Rows on the default database are left to the routers, so reads
+        can still go to its replicas.
+        """
+        queryset = self.filter(user=user)
+        shard = shard_for_user(user)
+        if shard == 'default':
+            return queryset
+        return queryset.using(shard)
+
+    def create(self, **kwargs):
+        """Create the object on its owner's shard."""
+        if self._db is None and 'user' in kwargs:
+            return self.using(shard_for_user(kwargs['user'])).create(**kwargs)
+        return super().create(**kwargs)
+
+
+def copy_user(user, alias):
+    """Make sure the shard holds a copy of the user row."""
+    if alias == 'default':
+        return
+    User = user._meta.model
+    if not User.objects.using(alias).filter(pk=user.pk).exists():
+        User.objects.using(alias).bulk_create(
+            [User.objects.using('default').get(pk=user.pk)])
+
+
+def _lock_rows(user, alias):
+    """Lock the user's rows on `alias` and return them, by model.
+
+    The user row's lock makes inserts referencing the user wait, and the
+    other rows' lock makes updates, deletes and new links to them wait.
+    """
+    from core.models import Ingredient, Recipe, Tag
+
+    User = user._meta.model
+    list(User.objects.using(alias).select_for_update()
+         .filter(pk=user.pk).values_list('pk'))
+    rows = {
+        model: list(
+            model.objects.using(alias).select_for_update().filter(user=user))
+        for model in (Tag, Ingredient, Recipe)
+    }
+    rows.update({
+        through: [
+            through(**{
+                field.attname: getattr(link, field.attname)
+                for field in through._meta.concrete_fields
+                if not field.primary_key
+            })
+            for link in through.objects.using(alias)
+            .filter(recipe__user=user)
+        ]
+        for through in (Recipe.tags.through, Recipe.ingredients.through)
+    })
+    return rows
+
+
+def _delete_rows(user, alias):
+    from core.models import Ingredient, Recipe, Tag
+
+    for model in (Recipe, Tag, Ingredient):
+        model.objects.using(alias).filter(user=user).delete()
+
+
+def move_user(user, target, batch_size=1000):
+    """Move the user's recipes, tags and ingredients to another shard.
+
+    Writes of the user's rows on the source shard wait until the move
+    commits. Those that then fail their foreign key, as the rows or the
+    user's copy are gone, are rejected. Inserts that still succeed, which
+    only the default database allows as the user row stays there, are
+    moved after the switch, once they commit. Returns the number of rows
+    moved.
+    """
+    if target not in settings.DATABASE_SHARDS:
+        raise ValueError(f'{target!r} is not one of DATABASE_SHARDS.')
+    source = shard_for_user(user)
+    if source == target:
+        return 0
+
+    User = user._meta.model
+    moved = 0
+    first = True
+    while True:
+        with transaction.atomic(using=source):
+            rows = _lock_rows(user, source)
+            count = sum(len(objs) for objs in rows.values())
+            if not first and not count:
+                return moved
+            with transaction.atomic(using=target):
+                copy_user(user, target)
+                if first:
+                    # Leftovers of an earlier move that didn't finish.
+                    _delete_rows(user, target)
+                for model, objs in rows.items():
+                    model.objects.using(target).bulk_create(
+                        objs, batch_size=batch_size)
+
+            if first:
+                User.objects.using('default').filter(pk=user.pk).update(
+                    shard=target)
+                user.shard = target
+            _delete_rows(user, source)
+            if source != 'default':
+                User.objects.using(source).filter(pk=user.pk).delete()
+        moved += count
+        first = False
+        if source != 'default':
+            return moved
+        # Look again for rows inserted by writes that were waiting on the
+        # locks, or had looked up the shard before the switch; locking the
+        # user row waits for those still running.
+
+
+def offset_sequences(using, **kwargs):
+    """Start a shard's IDs in its own range (post_migrate receiver)."""
+    shards = settings.DATABASE_SHARDS
+    if using not in shards or shards.index(using) == 0:
+        return
+    offset = shards.index(using) * SHARD_ID_STRIDE
+
+    from core.models import Ingredient, Recipe, Tag
+    with connections[using].cursor() as cursor:
+        for model in (Recipe, Tag, Ingredient):
+            cursor.execute(
+                "SELECT pg_get_serial_sequence(%s, 'id')",
+                [model._meta.db_table],
+            )
+            sequence = cursor.fetchone()[0]
+            cursor.execute(f'SELECT last_value FROM {sequence}')
+            if cursor.fetchone()[0] < offset:
+                cursor.execute('SELECT setval(%s, %s, false)',
+                               [sequence, offset])
+
+
+def delete_user_copy(sender, instance, using, **kwargs):
+    """Delete the user's shard data with the user (pre_delete receiver)."""
+    alias = shard_for_user(instance)
+    if using == 'default' and alias != 'default':
+        sender.objects.using(alias).filter(pk=instance.pk).delete()
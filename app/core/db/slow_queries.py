@@ -0,0 +1,159 @@
+"""
+Log of slow database queries.
+
+Every connection runs its queries through log_slow_queries(). Queries
+taking SLOW_QUERY_MS or longer are written as JSON lines to the rotating
+SLOW_QUERY_LOG, with the route of the request that made them. A sample
+of slow SELECTs, at most one per fingerprint every SLOW_QUERY_EXPLAIN_SECONDS
+in each worker, also gets its ``EXPLAIN (ANALYZE, BUFFERS)`` plan, which
+runs the query again. It runs on a cursor of the underlying connection, so
+it isn't counted, traced or logged as a query of the request, and
+SELECTs that lock rows, write or take a sequence value are left out.
+
+Workers append to the same log; a line may be lost when two of them
+rotate it at once. ``manage.py slow_queries`` reports on the log.
+"""
+import json
+import logging
+import os
+import random
+import re
+import time
+from logging.handlers import RotatingFileHandler
+from time import perf_counter
+
+import psycopg2
+
+from django.conf import settings
+
+from core import metrics
+
+
+LOG_BACKUPS = 5
+
+_handlers = {}
+_explained = {}
+
+_FINGERPRINT_RULES = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+# Literals and quoted identifiers, then what makes a SELECT lock rows, write
+# or have other side effects when run again.
+_QUOTED = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+_IMPURE = re.compile(
+    r'\b(?:INSERT|UPDATE|DELETE|MERGE|INTO|SHARE|NEXTVAL|SETVAL'
+    r'|PG_\w*LOCK\w*)\b',
+    re.IGNORECASE,
+)
+
+
+def fingerprint(sql):
+    """Return the query with its literals and parameters normalized."""
+    for pattern, replacement in _FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def _log(entry):
+    path = settings.SLOW_QUERY_LOG
+    handler = _handlers.get(path)
+    if handler is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handler = _handlers[path] = RotatingFileHandler(
+            path, maxBytes=settings.SLOW_QUERY_LOG_BYTES,
+            backupCount=LOG_BACKUPS, delay=True,
+        )
+    handler.handle(logging.makeLogRecord({'msg': json.dumps(entry)}))
+
+
+def is_pure_select(sql):
+    """Return whether running `sql` again only reads, without locking."""
+    if sql.split(None, 1)[0].upper() not in ('SELECT', 'WITH'):
+        return False
+    return not _IMPURE.search(_QUOTED.sub('', sql))
+
+
+def _should_explain(sql, many, key):
+    if many or not is_pure_select(sql):
+        return False
+    if random.random() >= settings.SLOW_QUERY_EXPLAIN_RATE:
+        return False
+    now = time.monotonic()
+    if now - _explained.get(key, -float('inf')) < (
+            settings.SLOW_QUERY_EXPLAIN_SECONDS):
+        return False
+    _explained[key] = now
+    return True
+
+
+def explain(connection, sql, params):
+    """Return the EXPLAIN (ANALYZE, BUFFERS) plan of a query, or None."""
+    # In a transaction, a savepoint keeps a failing EXPLAIN from breaking
+    # it. Neither goes through the connection's execute wrappers.
+    savepoint = not connection.get_autocommit()
+    with connection.connection.cursor() as cursor:
+        try:
+            if savepoint:
+                cursor.execute('SAVEPOINT slow_query_explain')
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        except psycopg2.Error:
+            if savepoint:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            return None
+        if savepoint:
+            cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        return plan
+
+
+def log_slow_queries(execute, sql, params, many, context):
+    """execute_wrapper logging the queries slower than SLOW_QUERY_MS."""
+    start = perf_counter()
+    result = execute(sql, params, many, context)
+    ms = (perf_counter() - start) * 1000
+    if ms < settings.SLOW_QUERY_MS:
+        return result
+
+    key = fingerprint(sql)
+    stats = metrics.current_stats()
+    request = stats.request if stats is not None else None
+    entry = {
+        'time': time.time(),
+        'ms': round(ms, 3),
+        'db': context['connection'].alias,
+        'view': metrics.route_of(request) if request is not None else None,
+        'path': request.path if request is not None else None,
+        'fingerprint': key,
+        'sql': sql,
+    }
+    if _should_explain(sql, many, key):
+        entry['plan'] = explain(context['connection'], sql, params)
+    _log(entry)
+    return result
+
+
+def install(sender, connection, **kwargs):
+    """Add log_slow_queries() to a new connection (connection_created)."""
+    # First in the list, as execute_wrapper() blocks open at this point
+    # remove the last wrapper when they exit.
+    if log_slow_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, log_slow_queries)
+
+
+def read_log(path):
+    """Yield the entries of the log and its backups, oldest first."""
+    for index in range(LOG_BACKUPS, -1, -1):
+        name = f'{path}.{index}' if index else path
+        if not os.path.exists(name):
+            continue
+        with open(name) as log:
+            for line in log:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
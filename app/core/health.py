@@ -0,0 +1,98 @@
+"""
+Liveness and readiness of the serving processes.
+
+ProbeMiddleware answers ``/healthz`` and ``/readyz`` ahead of the rest
+of the middleware chain, so probes skip sessions, CSRF, messages,
+authentication, metrics and tracing, as well as the ALLOWED_HOSTS check,
+which probes sent to a container's address would fail.
+
+``/healthz`` only tells the process is up. ``/readyz`` also tells it can
+serve: the default database and the shards answer a query and upload
+storage is writable. It reports whether each check passed or failed; why
+one failed is logged, not served, as the probes are public. That result
+is kept for READINESS_CACHE_SECONDS in each process, so frequent probes
+cost a lookup, and one thread at a time refreshes it.
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_cached = None
+
+
+def check_database():
+    """Run a query on the default database and the shards."""
+    for alias in settings.DATABASE_SHARDS:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+
+def check_storage():
+    """Check upload storage can be written to, or at least listed."""
+    try:
+        location = default_storage.path('')
+    except NotImplementedError:
+        default_storage.listdir('')
+        return
+    if not os.access(location, os.W_OK):
+        raise OSError(f'{location} is not writable.')
+
+
+CHECKS = {
+    'database': check_database,
+    'storage': check_storage,
+}
+
+
+def run_checks():
+    """Return whether every check passed and the outcome of each.
+
+    Outcomes are 'ok' or 'failed'; failures are logged with their error.
+    """
+    results = {}
+    for name, check in CHECKS.items():
+        try:
+            check()
+        except Exception:
+            logger.warning('Readiness check %s failed.', name, exc_info=True)
+            results[name] = 'failed'
+        else:
+            results[name] = 'ok'
+    return all(result == 'ok' for result in results.values()), results
+
+
+def cached_readiness():
+    """Return the readiness kept from a recent check, or None."""
+    cached = _cached
+    if cached is None or time.monotonic() >= cached[0]:
+        return None
+    return cached[1]
+
+
+def readiness():
+    """Return whether the process is ready and the outcome of each check."""
+    global _cached
+    result = cached_readiness()
+    if result is not None:
+        return result
+    if not _lock.acquire(blocking=_cached is None):
+        # Another thread is checking; the last result is recent enough.
+        return _cached[1]
+    try:
+        result = cached_readiness()
+        if result is None:
+            result = run_checks()
+            _cached = (
+                time.monotonic() + settings.READINESS_CACHE_SECONDS, result)
+        return result
+    finally:
+        _lock.release()
@@ -0,0 +1,21 @@
+"""
+Django command to migrate the shards besides the default database.
+"""
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Django command to run migrate on every shard."""
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        for alias in settings.DATABASE_SHARDS:
+            if alias == 'default':
+                continue
+            self.stdout.write(f'Migrating {alias}...')
+            call_command(
+                'migrate', database=alias, interactive=False,
+                verbosity=options['verbosity'],
+            )
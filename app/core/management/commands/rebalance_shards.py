@@ -0,0 +1,110 @@
+"""
+Django command to move users' recipe data between shards.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from core.db.shards import move_user
+from core.models import Recipe
+
+
+def pick_moves(sizes):
+    """Pick moves that shrink the gap between the shards' recipe counts.
+
+    `sizes` maps each shard to the recipe count of each of its users. Each
+    step moves the largest user of the fullest shard that fits in the gap
+    to the emptiest shard. A user moves at most once, so no user's rows
+    are copied twice in one run. Returns (user ID, target shard) pairs.
+    """
+    sizes = {alias: dict(users) for alias, users in sizes.items()}
+    loads = {alias: sum(users.values()) for alias, users in sizes.items()}
+    moves = []
+    while True:
+        fullest = max(loads, key=loads.get)
+        emptiest = min(loads, key=loads.get)
+        gap = loads[fullest] - loads[emptiest]
+        fitting = [
+            (count, user_id) for user_id, count in sizes[fullest].items()
+            if count < gap
+        ]
+        if not fitting:
+            return moves
+        count, user_id = max(fitting)
+        del sizes[fullest][user_id]
+        loads[fullest] -= count
+        loads[emptiest] += count
+        moves.append((user_id, emptiest))
+
+
+class Command(BaseCommand):
+    """Move users to other shards, by hand or to even out recipe counts."""
+
+    help = (
+        'Without options, print the recipes held by each shard. Writes of '
+        'a user being moved wait for the move, and rows they add to the '
+        'source shard are moved after it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', action='append', default=[], metavar='EMAIL',
+            help='User to move; repeat for several users.',
+        )
+        parser.add_argument('--to', help='Shard to move --user to.')
+        parser.add_argument(
+            '--balance', action='store_true',
+            help='Move users from the fullest to the emptiest shards.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Print the moves without making them.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        moves = []
+        if options['user']:
+            if options['to'] not in settings.DATABASE_SHARDS:
+                shards = ', '.join(settings.DATABASE_SHARDS)
+                raise CommandError(f'--to must be one of {shards}.')
+            users = get_user_model().objects.filter(
+                email__in=options['user'])
+            missing = set(options['user']) - {user.email for user in users}
+            if missing:
+                raise CommandError(
+                    f'Unknown users: {", ".join(sorted(missing))}.')
+            moves = [(user, options['to']) for user in users]
+        elif options['balance']:
+            moves = self.plan_balance()
+
+        for user, target in moves:
+            self.stdout.write(f'{user.email}: {user.shard} -> {target}')
+            if not options['dry_run']:
+                moved = move_user(user, target, options['batch_size'])
+                self.stdout.write(f'  moved {moved} rows')
+
+        for alias, count in self.recipe_counts().items():
+            self.stdout.write(f'{alias}: {count} recipes')
+
+    def recipe_counts(self):
+        """Return the number of recipes on each shard."""
+        return {
+            alias: Recipe.objects.using(alias).count()
+            for alias in settings.DATABASE_SHARDS
+        }
+
+    def plan_balance(self):
+        """Return the users to move and their targets, see pick_moves()."""
+        moves = pick_moves({
+            alias: dict(
+                Recipe.objects.using(alias).values('user')
+                .annotate(count=Count('id')).values_list('user', 'count')
+            )
+            for alias in settings.DATABASE_SHARDS
+        })
+        users = get_user_model().objects.in_bulk(
+            [user_id for user_id, _ in moves])
+        return [(users[user_id], target) for user_id, target in moves]
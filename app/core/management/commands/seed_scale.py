@@ -0,0 +1,274 @@
+"""
+Django command to seed the database with production-scale data.
+"""
+import argparse
+import io
+import math
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from core.db.shards import assign_shard
+from core.models import Ingredient, Recipe, Tag, User
+
+
+PLACEHOLDER_IMAGES = 8
+EMAIL_DOMAIN = '@seed.example.com'
+# Databases the command loads into without --allow-write, as for the
+# benchmarks (benchmarks.api_load).
+BENCHMARK_DB_PREFIX = 'bench'
+
+
+def distribution(spec):
+    """Parse a distribution spec into a function of a random.Random.
+
+    ``fixed:N``, ``uniform:A:B``, ``poisson:MEAN`` or ``pareto:ALPHA:MIN:MAX``
+    (heavy-tailed, mean about MIN * ALPHA / (ALPHA - 1), capped at MAX).
+    """
+    kind, _, params = spec.partition(':')
+    values = [float(value) for value in params.split(':') if value]
+    if kind == 'fixed' and len(values) == 1:
+        count = int(values[0])
+        return lambda rng: count
+    if kind == 'uniform' and len(values) == 2:
+        low, high = int(values[0]), int(values[1])
+        return lambda rng: rng.randint(low, high)
+    if kind == 'poisson' and len(values) == 1:
+        return lambda rng: poisson(rng, values[0])
+    if kind == 'pareto' and len(values) == 3:
+        alpha, low, high = values
+        return lambda rng: min(int(high), int(low * rng.paretovariate(alpha)))
+    raise argparse.ArgumentTypeError(f'Invalid distribution {spec!r}.')
+
+
+def poisson(rng, mean):
+    """Draw from a Poisson distribution."""
+    if mean > 30:
+        return max(0, round(rng.gauss(mean, math.sqrt(mean))))
+    limit, count, product = math.exp(-mean), 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def copy_rows(cursor, model, columns, rows):
+    """Load rows of tab-separated values into the model's table."""
+    if not rows:
+        return
+    buffer = io.StringIO('\n'.join(rows) + '\n')
+    cursor.copy_expert(
+        f'COPY {model._meta.db_table} ({", ".join(columns)}) FROM STDIN',
+        buffer,
+    )
+
+
+def reserve_ids(cursor, model, count):
+    """Take `count` consecutive IDs from the model's sequence.
+
+    The table stays locked against other writers until the transaction
+    ends, so nobody else draws IDs in between.
+    """
+    table = model._meta.db_table
+    cursor.execute(f'LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE')
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, 'id'))", [table])
+    first = cursor.fetchone()[0]
+    if count > 1:
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)",
+            [table, first + count - 1],
+        )
+    return first
+
+
+class Command(BaseCommand):
+    """Generate users with tags, ingredients, recipes and their links."""
+
+    help = (
+        'Bulk-load generated users and recipe data with COPY. All users '
+        'share the --password. Run it against a database nobody else is '
+        'writing to; the tables are locked batch by batch. Databases not '
+        f'named {BENCHMARK_DB_PREFIX}* are refused unless --allow-write is '
+        'given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument(
+            '--recipes-per-user', type=distribution,
+            default='pareto:1.5:4:500')
+        parser.add_argument(
+            '--tags-per-user', type=distribution, default='uniform:5:20')
+        parser.add_argument(
+            '--ingredients-per-user', type=distribution,
+            default='uniform:10:40')
+        parser.add_argument(
+            '--tags-per-recipe', type=distribution, default='poisson:3')
+        parser.add_argument(
+            '--ingredients-per-recipe', type=distribution,
+            default='poisson:6')
+        parser.add_argument(
+            '--images', type=float, default=0.3,
+            help='Share of recipes pointing at a placeholder image.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Users loaded per transaction.')
+        parser.add_argument('--password', default='seed-pass-123')
+        parser.add_argument('--seed', type=int)
+        parser.add_argument(
+            '--allow-write', action='store_true',
+            help=f'Load into databases not named {BENCHMARK_DB_PREFIX}*.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        names = [
+            settings.DATABASES[alias]['NAME']
+            for alias in settings.DATABASE_SHARDS
+        ]
+        if not options['allow_write'] and not all(
+                name.startswith(BENCHMARK_DB_PREFIX) for name in names):
+            raise CommandError(
+                f'Refusing to lock and load data into {", ".join(names)}: '
+                f'use databases named {BENCHMARK_DB_PREFIX}* or pass '
+                f'--allow-write.'
+            )
+
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.password = make_password(options['password'])
+        self.images = self.placeholder_images() if options['images'] else []
+        self.rows = 0
+        start = time.monotonic()
+
+        remaining = options['users']
+        while remaining:
+            count = min(options['batch_size'], remaining)
+            self.seed_users(count)
+            remaining -= count
+            elapsed = time.monotonic() - start
+            self.stdout.write(
+                f'{options["users"] - remaining} users, {self.rows} rows, '
+                f'{self.rows / elapsed:.0f} rows/s'
+            )
+
+    def placeholder_images(self):
+        """Save the placeholder images once and return their names."""
+        from PIL import Image
+
+        names = []
+        for index in range(PLACEHOLDER_IMAGES):
+            name = f'uploads/recipe/seed-placeholder-{index}.png'
+            if not default_storage.exists(name):
+                buffer = io.BytesIO()
+                Image.new('RGB', (320, 240), (
+                    40 + index * 25, 160, 200 - index * 20,
+                )).save(buffer, format='PNG')
+                default_storage.save(name, ContentFile(buffer.getvalue()))
+            names.append(name)
+        return names
+
+    def seed_users(self, count):
+        """Create `count` users and load their data on their shards."""
+        users = {}
+        with transaction.atomic(using='default'):
+            with connections['default'].cursor() as cursor:
+                first = reserve_ids(cursor, User, count)
+                rows = []
+                for user_id in range(first, first + count):
+                    email = f'user{user_id}{EMAIL_DOMAIN}'
+                    shard = assign_shard(email)
+                    rows.append(
+                        f'{user_id}\t{self.password}\t{email}\tUser {user_id}'
+                        f'\tt\tf\tf\t{shard}'
+                    )
+                    users.setdefault(shard, []).append((user_id, rows[-1]))
+                copy_rows(cursor, User, USER_COLUMNS, rows)
+                self.rows += len(rows)
+
+        for shard, shard_users in users.items():
+            with transaction.atomic(using=shard):
+                with connections[shard].cursor() as cursor:
+                    if shard != 'default':
+                        copy_rows(cursor, User, USER_COLUMNS,
+                                  [row for _, row in shard_users])
+                    self.seed_recipes(
+                        cursor, [user_id for user_id, _ in shard_users])
+
+    def seed_recipes(self, cursor, user_ids):
+        """Load the tags, ingredients and recipes of users on one shard."""
+        options, rng = self.options, self.rng
+        plans = [
+            (
+                user_id,
+                max(1, options['tags_per_user'](rng)),
+                max(1, options['ingredients_per_user'](rng)),
+                max(0, options['recipes_per_user'](rng)),
+            )
+            for user_id in user_ids
+        ]
+        tag_id = reserve_ids(cursor, Tag, sum(plan[1] for plan in plans))
+        ingredient_id = reserve_ids(
+            cursor, Ingredient, sum(plan[2] for plan in plans))
+        recipe_id = reserve_ids(
+            cursor, Recipe, max(1, sum(plan[3] for plan in plans)))
+
+        tags, ingredients, recipes, recipe_tags, recipe_ingredients = (
+            [], [], [], [], [])
+        for user_id, tag_count, ingredient_count, recipe_count in plans:
+            user_tags = range(tag_id, tag_id + tag_count)
+            user_ingredients = range(
+                ingredient_id, ingredient_id + ingredient_count)
+            tag_id += tag_count
+            ingredient_id += ingredient_count
+            tags.extend(
+                f'{pk}\t{user_id}\tTag {pk}' for pk in user_tags)
+            ingredients.extend(
+                f'{pk}\t{user_id}\tIngredient {pk}' for pk in user_ingredients)
+
+            for _ in range(recipe_count):
+                image = (
+                    rng.choice(self.images)
+                    if self.images and rng.random() < options['images']
+                    else '\\N'
+                )
+                recipes.append(
+                    f'{recipe_id}\t{user_id}\tRecipe {recipe_id}'
+                    f'\tMix everything and cook for a while.'
+                    f'\t{rng.randint(5, 180)}\t{rng.randint(100, 9999) / 100}'
+                    f'\thttps://example.com/recipes/{recipe_id}\t{image}'
+                )
+                for pk in rng.sample(user_tags, min(
+                        tag_count, options['tags_per_recipe'](rng))):
+                    recipe_tags.append(f'{recipe_id}\t{pk}')
+                for pk in rng.sample(user_ingredients, min(
+                        ingredient_count,
+                        options['ingredients_per_recipe'](rng))):
+                    recipe_ingredients.append(f'{recipe_id}\t{pk}')
+                recipe_id += 1
+
+        copy_rows(cursor, Tag, ('id', 'user_id', 'name'), tags)
+        copy_rows(cursor, Ingredient, ('id', 'user_id', 'name'), ingredients)
+        copy_rows(cursor, Recipe, RECIPE_COLUMNS, recipes)
+        copy_rows(cursor, Recipe.tags.through, ('recipe_id', 'tag_id'),
+                  recipe_tags)
+        copy_rows(cursor, Recipe.ingredients.through,
+                  ('recipe_id', 'ingredient_id'), recipe_ingredients)
+        self.rows += sum(map(len, (
+            tags, ingredients, recipes, recipe_tags, recipe_ingredients)))
+
+
+USER_COLUMNS = (
+    'id', 'password', 'email', 'name', 'is_active', 'is_staff',
+    'is_superuser', 'shard',
+)
+RECIPE_COLUMNS = (
+    'id', 'user_id', 'title', 'description', 'time_minutes', 'price',
+    'link', 'image',
+)
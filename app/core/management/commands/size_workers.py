@@ -0,0 +1,39 @@
+"""
+Django command to size the serving processes and threads.
+"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import serving
+
+
+class Command(BaseCommand):
+    """Print the worker processes and threads as shell variables.
+
+    Sized from the CPUs and memory available (see core.serving) unless
+    SERVER_PROCESSES and SERVER_THREADS are already set.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes-per-cpu', type=int,
+            default=int(os.environ.get(
+                'SERVER_PROCESSES_PER_CPU', serving.PROCESSES_PER_CPU)),
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        cpus, memory = serving.cpu_count(), serving.memory_bytes()
+        processes, threads = serving.size_workers(
+            cpus, memory, settings.MEMORY_RECYCLE_MB * 2 ** 20,
+            processes_per_cpu=options['processes_per_cpu'],
+        )
+        processes = int(os.environ.get('SERVER_PROCESSES', processes))
+        threads = int(os.environ.get('SERVER_THREADS', threads))
+        self.stderr.write(
+            f'{cpus} CPUs, {memory // 2 ** 20} MB: '
+            f'{processes} processes x {threads} threads')
+        self.stdout.write(f'export SERVER_PROCESSES={processes}')
+        self.stdout.write(f'export SERVER_THREADS={threads}')
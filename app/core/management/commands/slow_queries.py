@@ -0,0 +1,69 @@
+"""
+Django command to report on the slow query log.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db.slow_queries import read_log
+
+
+class Command(BaseCommand):
+    """Group the logged slow queries by fingerprint."""
+
+    help = 'Report the slow queries of SLOW_QUERY_LOG by fingerprint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=None, help='Log to read.')
+        parser.add_argument(
+            '--sort', choices=('total', 'count', 'max', 'mean'),
+            default='total',
+        )
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument(
+            '--plans', action='store_true',
+            help='Show the latest EXPLAIN plan of each fingerprint.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        groups = defaultdict(lambda: {
+            'count': 0, 'total': 0.0, 'max': 0.0,
+            'views': defaultdict(int), 'plan': None,
+        })
+        for entry in read_log(options['log'] or settings.SLOW_QUERY_LOG):
+            group = groups[entry['fingerprint']]
+            group['count'] += 1
+            group['total'] += entry['ms']
+            group['max'] = max(group['max'], entry['ms'])
+            group['views'][entry.get('view') or '-'] += 1
+            if entry.get('plan'):
+                group['plan'] = entry['plan']
+
+        if not groups:
+            self.stdout.write('No slow queries logged.')
+            return
+
+        for group in groups.values():
+            group['mean'] = group['total'] / group['count']
+        ranked = sorted(
+            groups.items(), key=lambda item: item[1][options['sort']],
+            reverse=True,
+        )[:options['limit']]
+
+        for key, group in ranked:
+            views = ', '.join(
+                f'{view} ({count})' for view, count in
+                sorted(group['views'].items(), key=lambda item: -item[1])
+            )
+            self.stdout.write(
+                f'{group["count"]} queries, total {group["total"]:.1f} ms, '
+                f'mean {group["mean"]:.1f} ms, max {group["max"]:.1f} ms'
+            )
+            self.stdout.write(f'  views: {views}')
+            self.stdout.write(f'  {key}')
+            if options['plans'] and group['plan']:
+                for line in group['plan'].splitlines():
+                    self.stdout.write(f'    {line}')
+            self.stdout.write('')
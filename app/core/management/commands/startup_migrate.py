@@ -0,0 +1,95 @@
+"""
+Django command to migrate the databases once when replicas start together.
+"""
+import os
+import random
+import time
+import zlib
+
+import psycopg2
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+# Key of the session-level advisory lock held by the migrating replica.
+LOCK_KEY = zlib.crc32(b'recipe-app-api:migrate')
+
+# Bounds of the jittered exponential backoff between checks, in seconds.
+MIN_DELAY = 0.05
+MAX_DELAY = 2
+
+
+def pending_migrations(aliases):
+    """Return the aliases with migrations left to apply."""
+    pending = []
+    for alias in aliases:
+        executor = MigrationExecutor(connections[alias])
+        if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+            pending.append(alias)
+    return pending
+
+
+class Command(BaseCommand):
+    """Migrate the default database and the shards from one replica.
+
+    Replicas with nothing to migrate start at once. Otherwise the first
+    to take the advisory lock migrates, while the others check back with
+    a jittered backoff until the migrations are applied, without queuing
+    on the lock. If the migrating replica dies, its lock is released and
+    the next replica to check takes over.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--timeout', type=float,
+            default=float(os.environ.get('MIGRATION_WAIT_SECONDS', 300)),
+            help='Seconds to wait for another replica to migrate.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        aliases = settings.DATABASE_SHARDS
+        if not pending_migrations(aliases):
+            self.stdout.write('No migrations to apply.')
+            return
+
+        deadline = time.monotonic() + options['timeout']
+        delay = MIN_DELAY
+        # The lock lives on a session of its own, outside Django's
+        # connections and their pool, and goes with it.
+        lock_connection = psycopg2.connect(
+            **connections['default'].get_connection_params())
+        lock_connection.autocommit = True
+        try:
+            while True:
+                with lock_connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT pg_try_advisory_lock(%s)', [LOCK_KEY])
+                    leader = cursor.fetchone()[0]
+                if leader:
+                    self.migrate(options['verbosity'])
+                    return
+                if time.monotonic() >= deadline:
+                    raise CommandError(
+                        'Timed out waiting for another replica to migrate.')
+                self.stdout.write('Another replica is migrating, waiting...')
+                time.sleep(delay * random.uniform(0.5, 1))
+                delay = min(delay * 2, MAX_DELAY)
+                if not pending_migrations(aliases):
+                    self.stdout.write(self.style.SUCCESS(
+                        'Migrations applied by another replica.'))
+                    return
+        finally:
+            lock_connection.close()
+
+    def migrate(self, verbosity):
+        """Apply the migrations of every database."""
+        if not pending_migrations(settings.DATABASE_SHARDS):
+            self.stdout.write('No migrations to apply.')
+            return
+        call_command('migrate', interactive=False, verbosity=verbosity)
+        call_command('migrate_shards', verbosity=verbosity)
@@ -1,27 +1,81 @@
 """
 Django command to wait for the database to be available.
 """
+import os
+import random
 import time
 
+import psycopg2
 from psycopg2 import OperationalError as Psycopg2OpError
 
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+
+from core.management.commands.startup_migrate import pending_migrations
+
+
+# Bounds of the jittered exponential backoff between attempts, in seconds.
+MIN_DELAY = 0.005
+MAX_DELAY = 1
+
+# Seconds a single connection attempt may take.
+CONNECT_TIMEOUT = 5
 
 
 class Command(BaseCommand):
-    """Django command to wait for database."""
+    """Django command to wait for database.
+
+    Opens a plain connection to each database, outside Django's
+    connections and their pool, retrying with a jittered exponential
+    backoff from a few milliseconds until they all answer or the timeout
+    passes. With --migrations, also waits until every migration is
+    applied, for processes that start alongside the one migrating.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', action='append', dest='databases',
+            help='Database alias to wait for, default "default". Repeatable.',
+        )
+        parser.add_argument(
+            '--timeout', type=float,
+            default=float(os.environ.get('DB_WAIT_SECONDS', 60)),
+            help='Seconds to wait before giving up.',
+        )
+        parser.add_argument(
+            '--migrations', action='store_true',
+            help='Also wait until the migrations are applied.',
+        )
+
+    def probe(self, alias):
+        """Open and close a connection to the database."""
+        params = connections[alias].get_connection_params()
+        params.setdefault('connect_timeout', CONNECT_TIMEOUT)
+        psycopg2.connect(**params).close()
 
     def handle(self, *args, **options):
         """Entrypoint for command."""
+        aliases = options['databases'] or ['default']
+        deadline = time.monotonic() + options['timeout']
+        delay = MIN_DELAY
         self.stdout.write('Waiting for database...')
-        db_up = False
-        while db_up is False:
+        while True:
             try:
-                self.check(databases=['default'])
-                db_up = True
+                for alias in aliases:
+                    self.probe(alias)
+                if not (options['migrations']
+                        and pending_migrations(aliases)):
+                    break
+                waiting = 'Migrations pending'
             except (Psycopg2OpError, OperationalError):
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+                waiting = 'Database unavailable'
+            if time.monotonic() >= deadline:
+                raise CommandError(
+                    f'{waiting} after {options["timeout"]:g} seconds.')
+            pause = delay * random.uniform(0.5, 1)
+            self.stdout.write(f'{waiting}, waiting {pause * 1000:.0f} ms...')
+            time.sleep(pause)
+            delay = min(delay * 2, MAX_DELAY)
 
-        self.stdout.write(self.style.SUCCESS('Database available!'))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS('Database available!'))
@@ -0,0 +1,164 @@
+"""
+Memory use of the serving workers.
+
+monitor() runs whenever a request finishes. Every MEMORY_SAMPLE_SECONDS
+it keeps a sample of the worker's RSS in a short history and in the
+worker_resident_memory_bytes gauge. With MEMORY_TRACEMALLOC_FRAMES set,
+tracemalloc runs in each worker from its first request on, and every
+sample also records the code whose allocations grew the most since.
+``/api/memory/`` reports all of it for the serving worker.
+
+Once a sample passes MEMORY_RECYCLE_MB, a worker logs its RSS history and
+growing allocators, sends itself a SIGTERM, finishes its requests and
+exits to be replaced. The limit is only compared to the samples, so
+requests in between don't read the RSS. uWSGI workers leave the limit to
+uWSGI's own --reload-on-rss, set to it by scripts/run.sh.
+"""
+import logging
+import os
+import resource
+import signal
+import time
+import tracemalloc
+from collections import deque
+
+from django.conf import settings
+
+from core import metrics
+
+try:
+    import uwsgi
+except ImportError:
+    uwsgi = None
+
+
+HISTORY = 60
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def rss_bytes():
+    """Return the resident set size of this process."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    """Return the largest resident set size this process has had."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryMonitor:
+    """RSS history and growing allocators of one worker process."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.samples = deque(maxlen=HISTORY)
+        self.top_allocators = []
+        self.baseline = None
+        self.last_sample = None
+        self.recycling = False
+
+    def check(self):
+        """Sample when due and recycle the worker past the limit."""
+        now = time.monotonic()
+        if self.last_sample is None:
+            frames = settings.MEMORY_TRACEMALLOC_FRAMES
+            if frames and not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+        elif now - self.last_sample < settings.MEMORY_SAMPLE_SECONDS:
+            return
+        rss = self.sample(now)
+
+        limit = settings.MEMORY_RECYCLE_MB * 2 ** 20
+        if limit and uwsgi is None and not self.recycling and rss >= limit:
+            self.recycle()
+
+    def sample(self, now):
+        """Record the current RSS and the top growing allocators.
+
+        Returns the RSS.
+        """
+        self.last_sample = now
+        rss = rss_bytes()
+        self.samples.append({'time': time.time(), 'rss_bytes': rss})
+        metrics.WORKER_RSS.set(rss)
+        if tracemalloc.is_tracing():
+            self.top_allocators = self.growth()
+        return rss
+
+    def growth(self):
+        """Return the allocators that grew the most since the first sample."""
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        if self.baseline is None:
+            self.baseline = snapshot
+            return []
+        key = (
+            'traceback' if tracemalloc.get_traceback_limit() > 1 else 'lineno')
+        return [
+            {
+                'where': [f'{frame.filename}:{frame.lineno}'
+                          for frame in stat.traceback],
+                'size_bytes': stat.size,
+                'growth_bytes': stat.size_diff,
+                'growth_blocks': stat.count_diff,
+            }
+            for stat in snapshot.compare_to(self.baseline, key)[
+                :settings.MEMORY_TOP_ALLOCATORS]
+            if stat.size_diff > 0
+        ]
+
+    def recycle(self):
+        """Log what grew and have the worker replaced."""
+        self.recycling = True
+        logger.warning(
+            'Worker %s recycled at %.0f MB RSS (limit %s MB). '
+            'RSS history (MB): %s. Growing allocators: %s',
+            self.pid, self.samples[-1]['rss_bytes'] / 2 ** 20,
+            settings.MEMORY_RECYCLE_MB,
+            ' '.join(
+                f'{sample["rss_bytes"] / 2 ** 20:.0f}'
+                for sample in self.samples),
+            '; '.join(
+                f'{stat["where"][0]} +{stat["growth_bytes"] / 1024:.0f} KiB'
+                for stat in self.top_allocators) or 'tracemalloc is off',
+        )
+        os.kill(self.pid, signal.SIGTERM)
+
+    def report(self):
+        """Return the memory use of this worker."""
+        return {
+            'pid': self.pid,
+            'rss_bytes': rss_bytes(),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'recycle_bytes': settings.MEMORY_RECYCLE_MB * 2 ** 20 or None,
+            'tracemalloc': tracemalloc.is_tracing(),
+            'samples': list(self.samples),
+            'top_allocators': self.top_allocators,
+        }
+
+
+_monitor = None
+
+
+def get_monitor():
+    """Return the monitor of this process, made after any fork."""
+    global _monitor
+    if _monitor is None or _monitor.pid != os.getpid():
+        _monitor = MemoryMonitor()
+    return _monitor
+
+
+def monitor(sender, **kwargs):
+    """Check the worker's memory use (request_finished)."""
+    get_monitor().check()
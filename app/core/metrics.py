@@ -0,0 +1,236 @@
+"""
+Prometheus metrics of the API.
+
+MetricsMiddleware observes every request; serializers and caches add
+their share through the RequestStats of the current request. With
+PROMETHEUS_MULTIPROC_DIR set, as scripts/run.sh does, each worker writes
+its values to mmap-backed files in that directory and collect() sums
+them over all workers.
+"""
+import contextvars
+import os
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+
+from django.db import connections
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from rest_framework import serializers
+
+from core import tracing
+
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+QUERY_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time taken to answer a request.',
+    ['route', 'method'],
+)
+REQUESTS = Counter(
+    'http_requests', 'Requests answered.', ['route', 'method', 'status'],
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Size of the response body sent.',
+    ['route'], buckets=SIZE_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries made by a request.',
+    ['route'], buckets=QUERY_BUCKETS,
+)
+DB_TIME = Histogram(
+    'http_request_db_seconds', 'Time a request spent in database queries.',
+    ['route'],
+)
+SERIALIZER_TIME = Histogram(
+    'http_request_serializer_seconds', 'Time a request spent serializing.',
+    ['route'],
+)
+QUERY_BUDGET_VIOLATIONS = Counter(
+    'query_budget_violations', 'Requests making more queries than budgeted.',
+    ['route', 'action'],
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests', 'Cache lookups by result.', ['result'],
+)
+
+WORKER_RSS = Gauge(
+    'worker_resident_memory_bytes', 'Resident memory of each worker.',
+    multiprocess_mode='liveall',
+)
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """Database and serializer use of a single request."""
+
+    __slots__ = ('request', 'queries', 'db_seconds', 'timings')
+
+    def __init__(self, request=None):
+        self.request = request
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.timings = {}
+
+    def add(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def execute(self, execute, sql, params, many, context):
+        """execute_wrapper counting queries and their time."""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += perf_counter() - start
+
+    @contextmanager
+    def measure(self):
+        """Make these the current stats and count the queries in the block."""
+        token = _current.set(self)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(self.execute))
+                yield self
+        finally:
+            _current.reset(token)
+
+
+def current_stats():
+    """Return the RequestStats of the request being served, if any."""
+    return _current.get()
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to the current request's stats.
+
+    Queries made in the block count as database time, not as `name`.
+    """
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = perf_counter()
+    db_seconds = stats.db_seconds
+    try:
+        yield
+    finally:
+        stats.add(
+            name, perf_counter() - start - (stats.db_seconds - db_seconds))
+
+
+def server_timing(stats, total):
+    """Return the Server-Timing header value for a request's stats."""
+    entries = [
+        f'{name};dur={stats.timings[name] * 1000:.2f}'
+        for name in ('auth', 'queryset')
+        if name in stats.timings
+    ]
+    entries.append(
+        f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries"')
+    entries.extend(
+        f'{name};dur={stats.timings[name] * 1000:.2f}'
+        for name in ('serialize', 'render')
+        if name in stats.timings
+    )
+    entries.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(entries)
+
+
+def route_of(request):
+    """Return the low-cardinality route label of a request."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name
+
+
+_children = {}
+
+
+def _route_metrics(route, method, status):
+    """Return the labelled metrics of a route, looked up once per worker."""
+    key = (route, method, status)
+    children = _children.get(key)
+    if children is None:
+        children = _children[key] = (
+            REQUEST_LATENCY.labels(route, method),
+            REQUESTS.labels(route, method, status),
+            RESPONSE_SIZE.labels(route),
+            DB_QUERIES.labels(route),
+            DB_TIME.labels(route),
+            SERIALIZER_TIME.labels(route),
+        )
+    return children
+
+
+def observe(request, response, stats, seconds):
+    """Record a finished request."""
+    latency, requests, size, queries, db_time, serializer_time = (
+        _route_metrics(
+            route_of(request), request.method, response.status_code))
+    latency.observe(seconds)
+    requests.inc()
+    if not response.streaming:
+        size.observe(len(response.content))
+    queries.observe(stats.queries)
+    db_time.observe(stats.db_seconds)
+    if 'serialize' in stats.timings:
+        serializer_time.observe(stats.timings['serialize'])
+
+
+def mark_worker_dead(pid):
+    """Drop the live gauges, such as WORKER_RSS, of a worker that exited."""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(pid)
+
+
+def collect():
+    """Return the metrics of all workers in the text exposition format."""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class TimedSerializerMixin:
+    """Count the time taken to build ``.data`` as serializer time.
+
+    In traced requests, the outermost to_representation() is a span.
+    """
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+    def to_representation(self, instance):
+        parent = tracing.current_span()
+        if parent is None or parent.name.endswith('.to_representation'):
+            return super().to_representation(instance)
+        serializer = getattr(self, 'child', self)
+        with tracing.span(
+                f'{type(serializer).__name__}.to_representation',
+                {'serializer.many': serializer is not self}):
+            return super().to_representation(instance)
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """ListSerializer counting its ``.data`` as serializer time.
+
+    Set as ``Meta.list_serializer_class`` of timed serializers.
+    """
@@ -0,0 +1,371 @@
+"""
+Middleware for the application.
+
+"""
+import asyncio
+import logging
+from time import perf_counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.module_loading import import_string
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from core import compression, health, metrics, profiling, tracing
+from core.db.routers import use_replicas
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """A request made more queries than its view action's budget."""
+
+
+class ProbeMiddleware:
+    """Answer liveness and readiness probes, see core.health.
+
+    Keep it first in MIDDLEWARE: probes then skip the rest of the chain.
+    It runs natively in both sync and async modes, so under ASGI probes
+    are answered on the event loop, and /readyz only goes to a thread
+    when its cached result is stale.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if request.path_info == '/healthz':
+            return self.healthz()
+        if request.path_info == '/readyz':
+            return self.readyz(health.readiness())
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path_info == '/healthz':
+            return self.healthz()
+        if request.path_info == '/readyz':
+            readiness = health.cached_readiness() or await sync_to_async(
+                health.readiness, thread_sensitive=True)()
+            return self.readyz(readiness)
+        return await self.get_response(request)
+
+    def healthz(self):
+        return JsonResponse({'status': 'ok'})
+
+    def readyz(self, readiness):
+        ready, checks = readiness
+        return JsonResponse(
+            {'status': 'ok' if ready else 'unavailable', 'checks': checks},
+            status=200 if ready else 503,
+        )
+
+
+class MetricsMiddleware:
+    """Record latency, response size and database use for /api/metrics.
+
+    Keep it first in MIDDLEWARE so the latency covers the whole chain and
+    the size is that of the body sent.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = perf_counter()
+        with metrics.RequestStats(request).measure() as stats:
+            response = self.get_response(request)
+        metrics.observe(request, response, stats, perf_counter() - start)
+        return response
+
+
+class TracingMiddleware:
+    """Trace a sample of the requests, see core.tracing.
+
+    Keep it right after MetricsMiddleware so the root span covers the
+    rest of the chain.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        root = tracing.start_trace(request)
+        if root is None:
+            return self.get_response(request)
+        with tracing.record(root):
+            response = self.get_response(request)
+            route = metrics.route_of(request)
+            root.name = f'{request.method} {route}'
+            root.attributes['http.route'] = route
+            root.attributes['http.status_code'] = response.status_code
+        response['X-Trace-Id'] = root.trace_id
+        return response
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses with brotli or gzip.
+
+    Like django.middleware.gzip.GZipMiddleware, but prefers brotli when the
+    client accepts it, only compresses the content types listed in
+    COMPRESSION_CONTENT_TYPES and skips bodies below COMPRESSION_MIN_SIZE.
+    Streaming responses are always compressed, chunk by chunk.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and (
+                len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return response
+
+        if response.has_header('Content-Encoding'):
+            return response
+
+        content_type = response.get('Content-Type', '')
+        if not content_type.startswith(settings.COMPRESSION_CONTENT_TYPES):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = compression.select_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        level = compression.RESPONSE_LEVELS[encoding]
+        if response.streaming:
+            # The compressed size of streamed content isn't known upfront.
+            response.streaming_content = compression.compress_sequence(
+                response.streaming_content, encoding, level)
+            del response.headers['Content-Length']
+        else:
+            compressed_content = compression.compress(
+                response.content, encoding, level)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # A strong ETag no longer matches the encoded bytes.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Serve the reads of safe requests from the read replicas.
+
+    After a client makes a successful write, its requests read from the
+    primary for REPLICA_PIN_SECONDS so it sees its own writes while the
+    replicas catch up. The pin is a signed, timestamped value the client
+    carries, so any worker process or container honours it: it is set as
+    a cookie and returned in the X-Replica-Pin header, for clients that
+    don't keep cookies to send back.
+    """
+
+    cookie_name = 'replica_pin'
+    header = 'X-Replica-Pin'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.signer = signing.TimestampSigner(
+            salt='core.middleware.replica-pin')
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        safe = request.method in SAFE_METHODS
+        with use_replicas(safe and not self.is_pinned(request)):
+            response = self.get_response(request)
+
+        if not safe and response.status_code < 400:
+            pin = self.signer.sign('1')
+            response.set_cookie(
+                self.cookie_name, pin,
+                max_age=settings.REPLICA_PIN_SECONDS,
+                secure=request.is_secure(), httponly=True, samesite='Lax',
+            )
+            response.headers[self.header] = pin
+        return response
+
+    def is_pinned(self, request):
+        """Return whether the request carries a pin that hasn't expired."""
+        pin = request.COOKIES.get(self.cookie_name) or request.headers.get(
+            self.header)
+        if not pin:
+            return False
+        try:
+            self.signer.unsign(pin, max_age=settings.REPLICA_PIN_SECONDS)
+        except signing.BadSignature:
+            return False
+        return True
+
+
+class QueryBudgetMiddleware:
+    """Compare the queries of each request to its view's budget.
+
+    Views declare budgets by action in ``query_budgets``, e.g.
+    ``{'list': 4}`` on a viewset or ``{'get': 1}`` on other views. The
+    count covers the whole request, authentication included, as kept by
+    MetricsMiddleware, which must come first. Violations are counted in
+    the query_budget_violations metric and, depending on
+    QUERY_BUDGET_ACTION, raise QueryBudgetExceeded ('raise') or log a
+    warning ('log').
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        stats = metrics.current_stats()
+        if stats is None:
+            return response
+
+        action, budget = self.budget_of(request)
+        if budget is None or stats.queries <= budget:
+            return response
+
+        route = metrics.route_of(request)
+        metrics.QUERY_BUDGET_VIOLATIONS.labels(route, action).inc()
+        message = (
+            f'{route} {action} made {stats.queries} queries, '
+            f'budget is {budget}.'
+        )
+        if settings.QUERY_BUDGET_ACTION == 'raise':
+            raise QueryBudgetExceeded(message)
+        if settings.QUERY_BUDGET_ACTION == 'log':
+            logger.warning(message)
+        return response
+
+    def budget_of(self, request):
+        """Return the action of the request and its query budget."""
+        match = getattr(request, 'resolver_match', None)
+        view = getattr(getattr(match, 'func', None), 'cls', None)
+        budgets = getattr(view, 'query_budgets', None)
+        if not budgets:
+            return None, None
+        method = request.method.lower()
+        action = (getattr(match.func, 'actions', None) or {}).get(
+            method, method)
+        return action, budgets.get(action)
+
+
+class AdminMiddleware:
+    """Run the ADMIN_MIDDLEWARE, except for token clients of the API.
+
+    Requests under API_PATH_PREFIX without a session cookie skip sessions,
+    CSRF, messages and the rest; those with one, from the browsable API
+    or other session clients, run them like requests for the admin. The
+    middleware run in the order of ADMIN_MIDDLEWARE, in the mode of the
+    chain, and their process_view(), process_template_response() and
+    process_exception() hooks run with this one's, in the order Django
+    runs them.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+        self.middleware = []
+        handler = get_response
+        for path in reversed(settings.ADMIN_MIDDLEWARE):
+            handler = import_string(path)(handler)
+            self.middleware.insert(0, handler)
+        self.admin_response = handler
+
+    def __call__(self, request):
+        if not self.applies(request):
+            return self.get_response(request)
+        return self.admin_response(request)
+
+    def applies(self, request):
+        """Return whether the ADMIN_MIDDLEWARE run for the request."""
+        return (
+            not request.path_info.startswith(settings.API_PATH_PREFIX)
+            or settings.SESSION_COOKIE_NAME in request.COOKIES
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.applies(request):
+            return None
+        for middleware in self.middleware:
+            if hasattr(middleware, 'process_view'):
+                response = middleware.process_view(
+                    request, view_func, view_args, view_kwargs)
+                if response is not None:
+                    return response
+        return None
+
+    def process_template_response(self, request, response):
+        if not self.applies(request):
+            return response
+        for middleware in reversed(self.middleware):
+            if hasattr(middleware, 'process_template_response'):
+                response = middleware.process_template_response(
+                    request, response)
+        return response
+
+    def process_exception(self, request, exception):
+        if not self.applies(request):
+            return None
+        for middleware in reversed(self.middleware):
+            if hasattr(middleware, 'process_exception'):
+                response = middleware.process_exception(request, exception)
+                if response is not None:
+                    return response
+        return None
+
+
+class ProfilingMiddleware:
+    """Profile requests sent by staff with an ``X-Profile`` header.
+
+    See core.profiling for the files written. Requests without the
+    header only pay for the header lookup.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if 'HTTP_X_PROFILE' not in request.META or not self.is_staff(request):
+            return self.get_response(request)
+
+        profiler = profiling.StackProfiler()
+        start = perf_counter()
+        response = profiler.run(self.get_response, request)
+        seconds = perf_counter() - start
+        response['X-Profile-Id'] = profiling.save_profile(
+            profiler, request, response, seconds)
+        return response
+
+    def is_staff(self, request):
+        """Return whether the session or token user is staff."""
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            try:
+                user, _ = TokenAuthentication().authenticate(request) or (
+                    None, None)
+            except AuthenticationFailed:
+                return False
+        return bool(user and user.is_staff)
@@ -20,6 +20,8 @@ from django.contrib.auth.models import (
     PermissionsMixin,
 )
 
+from core.db.shards import ShardedQuerySet, assign_shard, copy_user
+
 
 def recipe_image_file_path(instance, filename):
     """Generate file path for new recipe image."""
@@ -41,9 +43,12 @@ class UserManager(BaseUserManager):
 
         if not email:
             raise ValueError('User must enter valid email address.')
-        user = self.model(email=self.normalize_email(email), **extra_fields)
+        email = self.normalize_email(email)
+        extra_fields.setdefault('shard', assign_shard(email))
+        user = self.model(email=email, **extra_fields)
         user.set_password(password)
         user.save(using=self._db)
+        copy_user(user, user.shard)
         return user
     
     def create_superuser(self, email, password=None, **extra_fields):
@@ -70,6 +75,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Database alias holding the user's recipes, tags and ingredients.
+    shard = models.CharField(max_length=63, default='default')
 
     objects = UserManager()
 
@@ -92,7 +99,8 @@ class Recipe(models.Model):
     tags = models.ManyToManyField('Tag', blank=True)
     ingredients = models.ManyToManyField('Ingredient', blank=True)
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
-    
+
+    objects = ShardedQuerySet.as_manager()
 
     def __str__(self):
         return self.title
@@ -108,6 +116,8 @@ class Tag(models.Model):
 
     name = models.CharField(max_length=255)
 
+    objects = ShardedQuerySet.as_manager()
+
     def __str__(self):
         return self.name
     
@@ -122,6 +132,8 @@ class Ingredient(models.Model):
 
     name = models.CharField(max_length=255)
 
+    objects = ShardedQuerySet.as_manager()
+
     def __str__(self):
         return self.name
     
@@ -0,0 +1,61 @@
+"""
+Parsers for the REST API.
+
+"""
+
+import codecs
+from decimal import Decimal, InvalidOperation
+
+import msgpack
+import orjson
+
+from django.conf import settings
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from core.renderers import (
+    DECIMAL_EXT_TYPE,
+    MessagePackRenderer,
+    ORJSONRenderer,
+)
+
+
+class ORJSONParser(JSONParser):
+    """Parse JSON request bodies with orjson."""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the incoming bytestream as JSON and return the data."""
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            data = stream.read()
+            if codecs.lookup(encoding).name != 'utf-8':
+                data = data.decode(encoding)
+            return orjson.loads(data)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class MessagePackParser(BaseParser):
+    """Parse MessagePack request bodies."""
+
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def ext_hook(self, code, data):
+        """Decode the ext types written by MessagePackRenderer."""
+        if code == DECIMAL_EXT_TYPE:
+            return Decimal(data.decode('ascii'))
+        return msgpack.ExtType(code, data)
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the incoming bytestream as MessagePack and return the data."""
+        try:
+            return msgpack.unpackb(
+                stream.read(), ext_hook=self.ext_hook, timestamp=3)
+        except (ValueError, InvalidOperation) as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
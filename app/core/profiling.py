@@ -0,0 +1,131 @@
+"""
+Profiling of single API requests.
+
+ProfilingMiddleware runs a request sent by staff with an ``X-Profile``
+header under StackProfiler and saves, in PROFILE_DIR:
+
+* ``<id>.folded``: time in microseconds by call stack, in the folded
+  format read by flamegraph.pl, speedscope and inferno. SQL queries are
+  leaf frames named after the statement.
+* ``<id>.json``: the request, its total time and every query with its
+  duration.
+
+The id is returned in the ``X-Profile-Id`` response header.
+"""
+import json
+import os
+import sys
+import uuid
+from collections import defaultdict
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+
+def frame_label(code):
+    """Return a short flamegraph label for a code object."""
+    filename = code.co_filename
+    prefix = max(
+        (path for path in sys.path if path and filename.startswith(path)),
+        key=len, default='',
+    )
+    filename = filename[len(prefix):].lstrip(os.sep)
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+def sql_label(sql):
+    """Return a flamegraph label for a query."""
+    return 'SQL ' + ' '.join(sql.split())[:120].replace(';', ',')
+
+
+class StackProfiler:
+    """Deterministic profiler recording self time by call stack.
+
+    Only profiles the thread that enters it.
+    """
+
+    def __init__(self):
+        self.stacks = defaultdict(float)
+        self.queries = []
+        self._keys = ['request']
+        self._last = None
+
+    def _charge(self):
+        now = perf_counter()
+        self.stacks[self._keys[-1]] += now - self._last
+        self._last = now
+
+    def _push(self, label):
+        self._charge()
+        self._keys.append(f'{self._keys[-1]};{label}')
+
+    def _pop(self):
+        self._charge()
+        if len(self._keys) > 1:
+            self._keys.pop()
+
+    def _profile(self, frame, event, arg):
+        if event == 'call':
+            if frame.f_code is _execute_code:
+                self._push(sql_label(frame.f_locals['sql']))
+            else:
+                self._push(frame_label(frame.f_code))
+        elif event == 'c_call':
+            self._push(f'{getattr(arg, "__qualname__", arg)} (builtin)')
+        else:
+            self._pop()
+
+    def execute(self, execute, sql, params, many, context):
+        """execute_wrapper recording queries, shown as frames of their own."""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'ms': round((perf_counter() - start) * 1000, 3),
+            })
+
+    def run(self, func, *args):
+        """Call func under the profiler and return its result."""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self.execute))
+            self._last = perf_counter()
+            sys.setprofile(self._profile)
+            try:
+                return func(*args)
+            finally:
+                sys.setprofile(None)
+                self._charge()
+
+    def folded(self):
+        """Return the stacks in the folded format, in microseconds."""
+        return ''.join(
+            f'{stack} {round(seconds * 1e6)}\n'
+            for stack, seconds in self.stacks.items()
+            if seconds >= 5e-7
+        )
+
+
+_execute_code = StackProfiler.execute.__code__
+
+
+def save_profile(profiler, request, response, seconds):
+    """Write the profile of a request to PROFILE_DIR and return its id."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    profile_id = uuid.uuid4().hex
+    path = os.path.join(settings.PROFILE_DIR, profile_id)
+    with open(f'{path}.folded', 'w') as folded:
+        folded.write(profiler.folded())
+    with open(f'{path}.json', 'w') as summary:
+        json.dump({
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'ms': round(seconds * 1000, 3),
+            'queries': profiler.queries,
+        }, summary, indent=2)
+    return profile_id
@@ -0,0 +1,119 @@
+"""
+Renderers for the REST API.
+
+"""
+
+import json
+import math
+import uuid
+from decimal import Decimal
+
+import msgpack
+import orjson
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+# MessagePack ext type carrying a Decimal as its ASCII string form.
+DECIMAL_EXT_TYPE = 1
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Render JSON with orjson.
+
+    datetime, date, time and UUID values are encoded natively by orjson.
+    Decimal values are encoded as strings so prices survive the round trip
+    without float rounding. Anything else falls back to DRF's encoder.
+
+    orjson only indents by two spaces; other indents requested with the
+    ``indent`` media type param re-indent its output with the json module.
+
+    orjson writes NaN and infinite floats as null. With STRICT_JSON on, as
+    by default, they raise ValueError like they do in JSONRenderer; the
+    data is only searched for them when the output holds a null. With it
+    off, they stay null rather than the NaN and Infinity JSONRenderer
+    writes.
+    """
+
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+    encoder = JSONEncoder()
+
+    def default(self, obj):
+        """Encode types orjson does not support natively."""
+        if isinstance(obj, Decimal):
+            return str(obj)
+        return self.encoder.default(obj)
+
+    def check_finite(self, data):
+        """Raise ValueError if `data` holds a NaN or infinite float."""
+        stack = [[data]]
+        while stack:
+            container = stack.pop()
+            if isinstance(container, dict):
+                container = container.values()
+            for value in container:
+                kind = type(value)
+                if kind is str or kind is int:
+                    continue
+                if kind is float:
+                    if not math.isfinite(value):
+                        raise ValueError(
+                            'Out of range float values are not JSON '
+                            'compliant')
+                elif isinstance(value, (dict, list, tuple)):
+                    stack.append(value)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into JSON, returning a bytestring."""
+        if data is None:
+            return b''
+
+        options = self.options
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if indent == 2:
+            options |= orjson.OPT_INDENT_2
+
+        ret = orjson.dumps(data, default=self.default, option=options)
+        if self.strict and b'null' in ret:
+            self.check_finite(data)
+        if indent and indent != 2:
+            ret = json.dumps(
+                json.loads(ret), indent=indent, ensure_ascii=False
+            ).encode()
+
+        # Keep the output a strict javascript subset, as JSONRenderer does.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029'
+        )
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Render MessagePack.
+
+    Decimal values are packed as ext type ``DECIMAL_EXT_TYPE`` holding the
+    decimal string, and aware datetimes as the msgpack Timestamp type, so
+    both round-trip exactly through MessagePackParser.
+    """
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    encoder = JSONEncoder()
+
+    def default(self, obj):
+        """Encode types msgpack does not support natively."""
+        if isinstance(obj, Decimal):
+            return msgpack.ExtType(DECIMAL_EXT_TYPE, str(obj).encode())
+        elif isinstance(obj, uuid.UUID):
+            return str(obj)
+        return self.encoder.default(obj)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into MessagePack, returning a bytestring."""
+        if data is None:
+            return b''
+
+        return msgpack.packb(data, default=self.default, datetime=True)
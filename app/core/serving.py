@@ -0,0 +1,58 @@
+"""
+Sizing of the serving processes.
+
+scripts/run.sh asks ``manage.py size_workers`` how many worker processes
+and threads to run. Processes follow the CPUs available to the container,
+its cgroup quota included, and are capped so that all of them can reach
+MEMORY_RECYCLE_MB, the RSS at which core.memory recycles a worker, within
+the memory limit.
+"""
+import math
+import os
+
+
+PROCESSES_PER_CPU = 2
+THREADS = 2
+# Share of the memory left to the workers, the rest going to the master,
+# the page cache and anything else in the container.
+WORKER_MEMORY_SHARE = 0.8
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().split()
+    except OSError:
+        return None
+
+
+def cpu_count():
+    """Return the CPUs this process may use, rounding a CPU quota up."""
+    cpus = len(os.sched_getaffinity(0))
+    quota = _read('/sys/fs/cgroup/cpu.max')
+    if quota is None:
+        quota = (_read('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') or ['-1']) + (
+            _read('/sys/fs/cgroup/cpu/cpu.cfs_period_us') or ['100000'])
+    if quota[0] not in ('max', '-1'):
+        cpus = min(cpus, math.ceil(int(quota[0]) / int(quota[1])))
+    return max(1, cpus)
+
+
+def memory_bytes():
+    """Return the memory this process may use, its cgroup limit included."""
+    memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    limit = _read('/sys/fs/cgroup/memory.max') or _read(
+        '/sys/fs/cgroup/memory/memory.limit_in_bytes')
+    if limit and limit[0] != 'max':
+        memory = min(memory, int(limit[0]))
+    return memory
+
+
+def size_workers(cpus, memory, worker_bytes,
+                 processes_per_cpu=PROCESSES_PER_CPU, threads=THREADS):
+    """Return the (processes, threads) to serve with."""
+    processes = cpus * processes_per_cpu
+    if worker_bytes:
+        processes = min(
+            processes, int(memory * WORKER_MEMORY_SHARE // worker_bytes))
+    return max(1, processes), threads
@@ -0,0 +1,104 @@
+"""
+Storage backends for the application.
+
+"""
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, StaticFilesStorage,
+)
+from django.contrib.staticfiles.utils import matches_patterns
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from core import compression, tracing
+
+
+class CompressedFilesMixin:
+    """Write pre-compressed .br and .gz copies of collected static files.
+
+    The proxy serves these siblings directly, so static assets are
+    compressed once by collectstatic rather than on every request.
+    """
+
+    compress_patterns = (
+        '*.css', '*.js', '*.map', '*.json', '*.svg', '*.txt', '*.html',
+        '*.eot', '*.otf', '*.ttf', '*.yaml',
+    )
+    compressed_suffixes = {
+        compression.BROTLI: '.br',
+        compression.GZIP: '.gz',
+    }
+
+    def post_process(self, paths, dry_run=False, **options):
+        """Compress the collected files after any parent post-processing."""
+        names = set(paths)
+        parent = getattr(super(), 'post_process', None)
+        if parent is not None:
+            for name, hashed_name, processed in parent(
+                    paths, dry_run, **options):
+                if hashed_name:
+                    names.add(hashed_name)
+                yield name, hashed_name, processed
+
+        if dry_run:
+            return
+
+        for name in sorted(names):
+            if matches_patterns(name, self.compress_patterns):
+                compressed = self.compress_file(name)
+                if compressed and parent is None:
+                    yield name, name, True
+
+    def compress_file(self, name):
+        """Write compressed copies of `name`, returning True if any were."""
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < settings.COMPRESSION_MIN_SIZE:
+            return False
+
+        compressed = False
+        for encoding, level in compression.STATIC_LEVELS.items():
+            data = compression.compress(content, encoding, level)
+            if len(data) >= len(content):
+                continue
+            compressed_name = name + self.compressed_suffixes[encoding]
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self.save(compressed_name, ContentFile(data))
+            compressed = True
+        return compressed
+
+
+class CompressedStaticFilesStorage(CompressedFilesMixin, StaticFilesStorage):
+    """Static files storage that pre-compresses collected files."""
+
+
+class CompressedManifestStaticFilesStorage(CompressedFilesMixin,
+                                           ManifestStaticFilesStorage):
+    """Static files storage with hashed names and pre-compressed copies.
+
+    The hashed names let the proxy cache the files for good. Until
+    collectstatic has written the manifest, as in development and tests,
+    files keep their own names.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+
+class TracedStorageMixin:
+    """Record file writes as spans of the current trace."""
+
+    def _save(self, name, content):
+        with tracing.span('storage.save', {
+            'file.name': name,
+            'file.size': content.size,
+            'storage.backend': type(self).__name__,
+        }):
+            return super()._save(name, content)
+
+
+class TracedFileSystemStorage(TracedStorageMixin, FileSystemStorage):
+    """File system storage for uploads, traced."""
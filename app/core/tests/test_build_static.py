@@ -0,0 +1,81 @@
+"""
+Test building the static files and serving the prebuilt schema.
+"""
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class BuildStaticTests(SimpleTestCase):
+    """Test static files and schema collected at build time."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        static_root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(static_root.cleanup)
+        settings_override = override_settings(
+            STATIC_ROOT=static_root.name, PREBUILT_SCHEMA=True)
+        settings_override.enable()
+        cls.addClassCleanup(settings_override.disable)
+        call_command('build_static', verbosity=0)
+
+    def read(self, name):
+        with staticfiles_storage.open(name) as static_file:
+            return static_file.read()
+
+    def test_schema_collected(self):
+        """Test the schema is collected with a hashed name and compressed."""
+        for name in ('openapi/schema.yaml', 'openapi/schema.json'):
+            hashed_name = staticfiles_storage.stored_name(name)
+            self.assertNotEqual(hashed_name, name)
+            self.assertTrue(staticfiles_storage.exists(hashed_name + '.br'))
+            self.assertTrue(staticfiles_storage.exists(hashed_name + '.gz'))
+
+    def test_prebuilt_schema_served(self):
+        """Test the schema is served from the collected file."""
+        res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, self.read(
+            staticfiles_storage.stored_name('openapi/schema.yaml')))
+        self.assertEqual(res['Cache-Control'], 'public, max-age=3600')
+        self.assertIn('ETag', res)
+
+    def test_prebuilt_schema_format(self):
+        """Test the collected file of the negotiated format is served."""
+        res = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, self.read(
+            staticfiles_storage.stored_name('openapi/schema.json')))
+
+    def test_prebuilt_schema_compressed(self):
+        """Test the pre-compressed copy is served when accepted."""
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(res.content, self.read(
+            staticfiles_storage.stored_name('openapi/schema.yaml') + '.br'))
+
+    def test_prebuilt_schema_not_modified(self):
+        """Test a request with the current ETag gets a 304."""
+        etag = self.client.get(SCHEMA_URL)['ETag']
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+
+    @override_settings(PREBUILT_SCHEMA=False)
+    def test_schema_generated(self):
+        """Test the schema is generated when the prebuilt one is off."""
+        res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('max-age', res.get('Cache-Control', ''))
@@ -0,0 +1,169 @@
+"""
+Test response compression and pre-compressed static files.
+"""
+import gzip
+import tempfile
+
+import brotli
+
+from django.core.files.base import ContentFile
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.compression import select_encoding
+from core.middleware import CompressionMiddleware
+from core.storage import (
+    CompressedManifestStaticFilesStorage, CompressedStaticFilesStorage,
+)
+
+
+BODY = b'{"title": "Sample Recipe", "price": "5.00"}' * 100
+
+
+def json_response(content=BODY):
+    """Create and return a JSON response."""
+    return HttpResponse(content, content_type='application/json')
+
+
+class SelectEncodingTests(SimpleTestCase):
+    """Test choosing an encoding from an Accept-Encoding header."""
+
+    def test_select_encoding(self):
+        """Test q-values are weighed, ties go to brotli, q=0 refuses."""
+        cases = {
+            'gzip, deflate, br': 'br',
+            'br;q=0, gzip': 'gzip',
+            'br;q=0.5, gzip;q=0.8': 'gzip',
+            'gzip;q=0.8, BR;Q=0.8': 'br',
+            '*': 'br',
+            '*;q=0.5, gzip': 'gzip',
+            '*, br;q=0': 'gzip',
+            'gzip;q=0, br;q=0': None,
+            'gzip;q=x': None,
+            'deflate, identity': None,
+            '': None,
+        }
+        for header, encoding in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(select_encoding(header), encoding)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test CompressionMiddleware."""
+
+    def compress(self, response, accept_encoding='gzip, deflate, br'):
+        """Run a response through the middleware and return it."""
+        request = RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(request)
+
+    def test_brotli_preferred(self):
+        """Test brotli is used when the client accepts it."""
+        res = self.compress(json_response())
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+        self.assertEqual(brotli.decompress(res.content), BODY)
+        self.assertEqual(res['Content-Length'], str(len(res.content)))
+
+    def test_gzip_fallback(self):
+        """Test gzip is used when brotli is not accepted."""
+        res = self.compress(json_response(), 'gzip, deflate')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), BODY)
+
+    def test_below_threshold_not_compressed(self):
+        """Test responses under COMPRESSION_MIN_SIZE are sent as is."""
+        res = self.compress(json_response(BODY[:500]))
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(res.content, BODY[:500])
+
+    def test_content_type_not_compressed(self):
+        """Test content types outside COMPRESSION_CONTENT_TYPES are skipped."""
+        res = self.compress(HttpResponse(BODY, content_type='image/jpeg'))
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+    def test_not_accepted(self):
+        """Test nothing is compressed without a supported encoding."""
+        res = self.compress(json_response(), 'identity')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+
+    def test_streaming_compressed_incrementally(self):
+        """Test streaming responses are compressed chunk by chunk."""
+        chunks = [BODY[:10], BODY[10:2000], BODY[2000:]]
+        response = StreamingHttpResponse(
+            iter(chunks), content_type='application/json')
+
+        res = self.compress(response, 'gzip')
+        compressed = list(res.streaming_content)
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertGreaterEqual(len(compressed), len(chunks))
+        self.assertEqual(gzip.decompress(b''.join(compressed)), BODY)
+
+    def test_weak_etag(self):
+        """Test a strong ETag is weakened on compressed responses."""
+        response = json_response()
+        response['ETag'] = '"abc"'
+
+        res = self.compress(response)
+
+        self.assertEqual(res['ETag'], 'W/"abc"')
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressedStaticFilesStorageTests(SimpleTestCase):
+    """Test pre-compressing collected static files."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.storage = CompressedStaticFilesStorage(location=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_post_process_compresses_files(self):
+        """Test compressible files get .br and .gz siblings."""
+        self.storage.save('admin/css/base.css', ContentFile(BODY))
+        self.storage.save('admin/img/logo.png', ContentFile(BODY))
+        self.storage.save('admin/js/small.js', ContentFile(b'var a = 1;'))
+        paths = {
+            name: (self.storage, name)
+            for name in (
+                'admin/css/base.css', 'admin/img/logo.png',
+                'admin/js/small.js',
+            )
+        }
+
+        processed = list(self.storage.post_process(paths))
+
+        self.assertEqual(
+            processed, [('admin/css/base.css', 'admin/css/base.css', True)])
+        with self.storage.open('admin/css/base.css.br') as f:
+            self.assertEqual(brotli.decompress(f.read()), BODY)
+        with self.storage.open('admin/css/base.css.gz') as f:
+            self.assertEqual(gzip.decompress(f.read()), BODY)
+        self.assertFalse(self.storage.exists('admin/img/logo.png.gz'))
+        self.assertFalse(self.storage.exists('admin/js/small.js.gz'))
+
+    def test_post_process_dry_run(self):
+        """Test nothing is written on a dry run."""
+        self.storage.save('app.css', ContentFile(BODY))
+
+        list(self.storage.post_process(
+            {'app.css': (self.storage, 'app.css')}, dry_run=True))
+
+        self.assertFalse(self.storage.exists('app.css.gz'))
+
+    def test_manifest_storage_without_manifest(self):
+        """Test files keep their names until a manifest is collected."""
+        storage = CompressedManifestStaticFilesStorage(location=self.tmp.name)
+
+        self.assertEqual(storage.url('app.css'), '/static/static/app.css')
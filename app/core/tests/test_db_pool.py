@@ -0,0 +1,121 @@
+"""
+Test database connection reuse, health checks and pooling.
+"""
+from unittest.mock import MagicMock
+
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase
+
+from core.db.backends.postgresql.base import connection_stats
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test ConnectionPool."""
+
+    def test_reuses_released_connection(self):
+        """Test a released connection is handed out again."""
+        pool = ConnectionPool(max_size=2)
+        conn = pool.acquire(MagicMock)
+        pool.release(conn)
+
+        self.assertIs(pool.acquire(MagicMock), conn)
+        self.assertEqual(pool.stats()['opened'], 1)
+        self.assertEqual(pool.stats()['reused'], 1)
+
+    def test_bounded(self):
+        """Test checkouts beyond max_size time out."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.acquire(MagicMock)
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(MagicMock)
+
+        stats = pool.stats()
+        self.assertEqual(stats['in_use'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+
+    def test_failed_check_discards(self):
+        """Test idle connections failing the check are replaced."""
+        pool = ConnectionPool(max_size=1, check=lambda conn: False)
+        conn = pool.acquire(MagicMock)
+        pool.release(conn)
+
+        self.assertIsNot(pool.acquire(MagicMock), conn)
+        conn.close.assert_called_once()
+        self.assertEqual(pool.stats()['discarded'], 1)
+
+    def test_expired_discarded(self):
+        """Test connections older than max_age are not reused."""
+        pool = ConnectionPool(max_size=1, max_age=0)
+        conn = pool.acquire(MagicMock)
+        pool.release(conn)
+
+        self.assertEqual(pool.stats()['idle'], 0)
+        conn.close.assert_called_once()
+
+    def test_failed_reset_discards(self):
+        """Test connections that can't be reset are not reused."""
+        reset = MagicMock(side_effect=Exception('connection lost'))
+        pool = ConnectionPool(max_size=1, reset=reset)
+        conn = pool.acquire(MagicMock)
+        pool.release(conn)
+
+        self.assertEqual(pool.stats()['idle'], 0)
+        self.assertEqual(pool.stats()['discarded'], 1)
+
+    def test_connect_error_frees_slot(self):
+        """Test a failed connect doesn't leak a pool slot."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+
+        with self.assertRaises(OSError):
+            pool.acquire(MagicMock(side_effect=OSError))
+
+        self.assertIsNotNone(pool.acquire(MagicMock))
+
+
+class DatabaseWrapperTests(TestCase):
+    """Test the health checked and pooled PostgreSQL backend."""
+
+    def make_wrapper(self, alias, **settings):
+        """Create and return a wrapper for the test database."""
+        wrapper = connections['default'].__class__(
+            {**connection.settings_dict, **settings}, alias=alias)
+        if wrapper.pool is not None:
+            self.addCleanup(wrapper.pool.close_idle)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def backend_pid(self, wrapper):
+        """Return the server process id of a wrapper's connection."""
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            return cursor.fetchone()[0]
+
+    def test_health_check_reconnects(self):
+        """Test a connection dropped by the server is replaced."""
+        wrapper = self.make_wrapper('health', HEALTH_CHECKS=True)
+        pid = self.backend_pid(wrapper)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+
+        wrapper.close_if_unusable_or_obsolete()
+
+        self.assertNotEqual(self.backend_pid(wrapper), pid)
+        stats = connection_stats()['health']
+        self.assertEqual(stats['health_check_failures'], 1)
+        self.assertEqual(stats['opened'], 2)
+
+    def test_pooled_connection_reused(self):
+        """Test pooled connections are returned and reused per request."""
+        wrapper = self.make_wrapper('pooled', POOL_SIZE=1)
+        pid = self.backend_pid(wrapper)
+
+        wrapper.close_if_unusable_or_obsolete()
+
+        self.assertIsNone(wrapper.connection)
+        self.assertEqual(self.backend_pid(wrapper), pid)
+        pool_stats = connection_stats()['pooled']['pool']
+        self.assertEqual(pool_stats['opened'], 1)
+        self.assertEqual(pool_stats['reused'], 1)
+        self.assertEqual(pool_stats['in_use'], 1)
@@ -0,0 +1,103 @@
+"""
+Test routing reads to the read replicas.
+"""
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.db.routers import ReplicaRouter, use_replicas
+from core.middleware import ReplicaRoutingMiddleware
+from core.models import Recipe
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Test ReplicaRouter."""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_use_primary_by_default(self):
+        """Test reads outside use_replicas() are left to the primary."""
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_reads_use_replica(self):
+        """Test reads inside use_replicas() go to a replica."""
+        with use_replicas():
+            self.assertIn(
+                self.router.db_for_read(Recipe), ['replica_1', 'replica_2'])
+
+    def test_replica_instance_written_to_primary(self):
+        """Test objects read from a replica are saved to the primary."""
+        recipe = Recipe()
+        recipe._state.db = 'replica_1'
+
+        self.assertEqual(
+            self.router.db_for_write(Recipe, instance=recipe), 'default')
+
+    def test_no_migrations_on_replicas(self):
+        """Test migrations are not run against replicas."""
+        self.assertFalse(self.router.allow_migrate('replica_1', 'core'))
+        self.assertIsNone(self.router.allow_migrate('default', 'core'))
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica_1'],
+    REPLICA_PIN_SECONDS=5,
+)
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    """Test ReplicaRoutingMiddleware."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.routed_to = []
+
+        def view(request):
+            self.routed_to.append(ReplicaRouter().db_for_read(Recipe))
+            return HttpResponse(status=self.status)
+
+        self.status = 200
+        self.middleware = ReplicaRoutingMiddleware(view)
+
+    def test_safe_request_reads_replica(self):
+        """Test GET requests read from the replica."""
+        self.middleware(self.factory.get('/'))
+
+        self.assertEqual(self.routed_to, ['replica_1'])
+
+    def test_unsafe_request_reads_primary(self):
+        """Test the reads of writes go to the primary."""
+        self.middleware(self.factory.post('/'))
+
+        self.assertEqual(self.routed_to, [None])
+
+    def test_reads_pinned_after_write(self):
+        """Test a client reads its own writes from the primary."""
+        response = self.middleware(self.factory.post('/'))
+        pin = response.cookies['replica_pin'].value
+
+        request = self.factory.get('/')
+        request.COOKIES['replica_pin'] = pin
+        self.middleware(request)
+        self.middleware(self.factory.get('/', HTTP_X_REPLICA_PIN=pin))
+        self.middleware(self.factory.get('/'))
+
+        self.assertEqual(response.headers['X-Replica-Pin'], pin)
+        self.assertEqual(self.routed_to, [None, None, None, 'replica_1'])
+
+    def test_failed_write_not_pinned(self):
+        """Test a rejected write doesn't pin the client."""
+        self.status = 400
+        response = self.middleware(self.factory.post('/'))
+
+        self.assertNotIn('replica_pin', response.cookies)
+        self.assertNotIn('X-Replica-Pin', response.headers)
+
+    def test_invalid_or_expired_pin_ignored(self):
+        """Test forged and expired pins read from the replica."""
+        pin = self.middleware.signer.sign('1')
+
+        self.middleware(self.factory.get('/', HTTP_X_REPLICA_PIN=pin + 'x'))
+        with override_settings(REPLICA_PIN_SECONDS=-1):
+            self.middleware(self.factory.get('/', HTTP_X_REPLICA_PIN=pin))
+
+        self.assertEqual(self.routed_to, ['replica_1', 'replica_1'])
@@ -0,0 +1,201 @@
+"""
+Test sharding users' recipe data.
+"""
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.db.routers import ShardRouter, use_replicas
+from core.db import shards
+from core.db.shards import SHARD_ID_STRIDE, assign_shard, move_user
+from core.management.commands.rebalance_shards import pick_moves
+from core.models import Recipe, Tag
+
+
+@override_settings(DATABASE_SHARDS=['default', 'shard_1'])
+class ShardRouterTests(SimpleTestCase):
+    """Test ShardRouter."""
+
+    def setUp(self):
+        self.router = ShardRouter()
+        self.user = get_user_model()(pk=1, email='user@example.com')
+        self.user.shard = 'shard_1'
+
+    def test_assign_shard(self):
+        """Test new users are assigned a shard by email."""
+        shard = assign_shard('user@example.com')
+
+        self.assertIn(shard, settings.DATABASE_SHARDS)
+        self.assertEqual(assign_shard('USER@example.com'), shard)
+
+    def test_new_recipe_written_to_user_shard(self):
+        """Test a new recipe is saved on its owner's shard."""
+        recipe = Recipe(user=self.user)
+
+        self.assertEqual(
+            self.router.db_for_write(Recipe, instance=recipe), 'shard_1')
+
+    def test_related_reads_stay_on_shard(self):
+        """Test related rows of a shard object are read from its shard."""
+        recipe = Recipe(user=self.user)
+        recipe._state.db = 'shard_1'
+
+        self.assertEqual(
+            self.router.db_for_read(Tag, instance=recipe), 'shard_1')
+        self.assertEqual(
+            self.router.db_for_read(get_user_model(), instance=recipe),
+            'default',
+        )
+
+    def test_new_link_left_to_other_routers(self):
+        """Test a new recipe-tag link, which has no user, is not routed."""
+        link = Recipe.tags.through(recipe_id=1, tag_id=1)
+
+        self.assertIsNone(self.router.db_for_write(
+            Recipe.tags.through, instance=link))
+
+    def test_default_left_to_other_routers(self):
+        """Test reads without a shard object are not routed."""
+        self.assertIsNone(self.router.db_for_read(Recipe))
+        recipe = Recipe()
+        recipe._state.db = 'default'
+        self.assertIsNone(self.router.db_for_read(Tag, instance=recipe))
+
+
+class PickMovesTests(SimpleTestCase):
+    """Test planning the moves that balance the shards."""
+
+    def test_balances_shards(self):
+        """Test users move from the fullest to the emptiest shard."""
+        moves = pick_moves({'a': {1: 6, 2: 5}, 'b': {}})
+
+        self.assertEqual(moves, [(1, 'b')])
+
+    def test_users_moved_once(self):
+        """Test a moved user isn't picked again by a later step."""
+        moves = pick_moves({
+            'a': {1: 11, 2: 4}, 'b': {3: 7, 4: 5}, 'c': {5: 2}})
+
+        self.assertEqual(moves, [(1, 'c'), (5, 'a'), (4, 'a')])
+
+
+@override_settings(
+    DATABASE_SHARDS=['default', 'shard_1'], DATABASE_REPLICAS=['replica_1'])
+class ShardedQuerySetRoutingTests(SimpleTestCase):
+    """Test where ShardedQuerySet.for_user() reads from."""
+
+    def setUp(self):
+        self.user = get_user_model()(pk=1, email='user@example.com')
+
+    def test_default_shard_reads_replica(self):
+        """Test rows on the default database are read from a replica."""
+        self.user.shard = 'default'
+
+        with use_replicas():
+            self.assertEqual(
+                Recipe.objects.for_user(self.user).db, 'replica_1')
+            self.assertEqual(Tag.objects.for_user(self.user).db, 'replica_1')
+
+    def test_other_shard_read_from_shard(self):
+        """Test rows on another shard are read from that shard."""
+        self.user.shard = 'shard_1'
+
+        with use_replicas():
+            self.assertEqual(Recipe.objects.for_user(self.user).db, 'shard_1')
+
+
+class ShardedQuerySetTests(TestCase):
+    """Test ShardedQuerySet."""
+
+    databases = '__all__'
+
+    def test_for_user(self):
+        """Test for_user() returns only the user's rows."""
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'pass123')
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'pass123')
+        tag = Tag.objects.create(user=user, name='Vegan')
+        Tag.objects.create(user=other, name='Dessert')
+
+        self.assertEqual(tag._state.db, user.shard)
+        self.assertEqual(list(Tag.objects.for_user(user)), [tag])
+
+
+@skipUnless('shard_1' in settings.DATABASES, 'Set DB_SHARDS to test moves.')
+class MoveUserTests(TestCase):
+    """Test moving users between shards."""
+
+    databases = set(settings.DATABASE_SHARDS)
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'pass123', shard='default')
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5,
+            price=Decimal('1.50'))
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.recipe.tags.add(self.tag)
+
+    def test_move_user(self):
+        """Test a user's rows move to the target shard with their IDs."""
+        moved = move_user(self.user, 'shard_1')
+
+        self.assertEqual(moved, 3)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.shard, 'shard_1')
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+        recipe = Recipe.objects.for_user(self.user).get()
+        self.assertEqual(recipe.pk, self.recipe.pk)
+        self.assertEqual(list(recipe.tags.all()), [self.tag])
+
+    def test_rows_added_during_move_moved(self):
+        """Test rows inserted on the source while moving follow the user."""
+        lock_rows = shards._lock_rows
+        calls = []
+
+        def insert_then_lock(user, alias):
+            calls.append(alias)
+            if len(calls) == 2:
+                Recipe.objects.using('default').create(
+                    user=user, title='Late', time_minutes=5, price=1)
+            return lock_rows(user, alias)
+
+        with patch.object(shards, '_lock_rows', insert_then_lock):
+            moved = move_user(self.user, 'shard_1')
+
+        self.assertEqual(moved, 4)
+        self.assertEqual(calls, ['default'] * 3)
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+        self.assertEqual(
+            Recipe.objects.for_user(self.user).filter(title='Late').count(),
+            1)
+
+    def test_new_rows_on_shard_get_shard_ids(self):
+        """Test rows created on a shard are numbered in its ID range."""
+        move_user(self.user, 'shard_1')
+
+        recipe = Recipe.objects.create(
+            user=self.user, title='Stew', time_minutes=5, price=Decimal('1'))
+
+        self.assertEqual(recipe._state.db, 'shard_1')
+        self.assertGreaterEqual(recipe.pk, SHARD_ID_STRIDE)
+
+    def test_rebalance_command(self):
+        """Test the command moves the given users."""
+        out = StringIO()
+
+        call_command(
+            'rebalance_shards', user=['user@example.com'], to='shard_1',
+            stdout=out,
+        )
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.shard, 'shard_1')
+        self.assertIn('shard_1: 1 recipes', out.getvalue())
@@ -0,0 +1,98 @@
+"""
+Test the liveness and readiness probes.
+"""
+from unittest.mock import Mock, patch
+
+from django.db import OperationalError
+from django.test import (
+    AsyncClient, SimpleTestCase, TestCase, override_settings,
+)
+
+from core import health
+
+
+HEALTHZ_URL = '/healthz'
+READYZ_URL = '/readyz'
+
+
+class HealthzTests(SimpleTestCase):
+    """Test the liveness endpoint."""
+
+    def test_healthz(self):
+        """Test healthz reports ok without touching the database."""
+        res = self.client.get(HEALTHZ_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {'status': 'ok'})
+
+    async def test_healthz_async(self):
+        """Test healthz is served natively on the ASGI path."""
+        res = await AsyncClient().get(HEALTHZ_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {'status': 'ok'})
+
+    @override_settings(ALLOWED_HOSTS=['example.com'])
+    def test_healthz_any_host(self):
+        """Test probes sent to the container's address are answered."""
+        res = self.client.get(HEALTHZ_URL, HTTP_HOST='10.0.0.7:9000')
+
+        self.assertEqual(res.status_code, 200)
+
+    def test_healthz_skips_middleware(self):
+        """Test probes skip sessions, CSRF and the rest of the chain."""
+        res = self.client.post(HEALTHZ_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('X-Frame-Options', res)
+        self.assertNotIn('Vary', res)
+
+
+@override_settings(READINESS_CACHE_SECONDS=0)
+class ReadyzTests(TestCase):
+    """Test the readiness endpoint."""
+
+    def test_readyz(self):
+        """Test readyz reports the database and storage are ok."""
+        res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {
+            'status': 'ok',
+            'checks': {'database': 'ok', 'storage': 'ok'},
+        })
+
+    def test_readyz_database_down(self):
+        """Test readyz fails while the database doesn't answer."""
+        failing_check = Mock(side_effect=OperationalError('down'))
+        with patch.dict(health.CHECKS, database=failing_check), \
+                self.assertLogs('core.health', 'WARNING') as logs:
+            res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json(), {
+            'status': 'unavailable',
+            'checks': {'database': 'failed', 'storage': 'ok'},
+        })
+        self.assertNotIn(b'down', res.content)
+        self.assertIn('OperationalError: down', logs.output[0])
+
+    @override_settings(READINESS_CACHE_SECONDS=60)
+    def test_readyz_cached(self):
+        """Test checks run once while their outcome is recent."""
+        with patch.object(health, '_cached', None), \
+                patch.object(health, 'run_checks',
+                             return_value=(True, {})) as patched_checks:
+            for _ in range(3):
+                self.client.get(READYZ_URL)
+
+        patched_checks.assert_called_once()
+
+    async def test_readyz_async(self):
+        """Test readyz is served on the ASGI path."""
+        with patch.object(health, '_cached', None), \
+                patch.object(health, 'run_checks',
+                             return_value=(True, {})):
+            res = await AsyncClient().get(READYZ_URL)
+
+        self.assertEqual(res.status_code, 200)
@@ -0,0 +1,109 @@
+"""
+Test monitoring the memory use of workers.
+"""
+import signal
+import tracemalloc
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.memory import MemoryMonitor
+
+MEMORY_URL = reverse('memory-stats')
+
+
+class MemoryMonitorTests(SimpleTestCase):
+    """Test MemoryMonitor."""
+
+    def test_samples_rss(self):
+        """Test the RSS is sampled at most every MEMORY_SAMPLE_SECONDS."""
+        monitor = MemoryMonitor()
+
+        monitor.check()
+        monitor.check()
+
+        self.assertEqual(len(monitor.samples), 1)
+        self.assertGreater(monitor.samples[0]['rss_bytes'], 0)
+
+    @override_settings(MEMORY_TRACEMALLOC_FRAMES=1, MEMORY_SAMPLE_SECONDS=0)
+    def test_growing_allocators(self):
+        """Test the code allocating the most since the start is reported."""
+        self.addCleanup(tracemalloc.stop)
+        monitor = MemoryMonitor()
+        monitor.check()
+
+        leak = [bytearray(1024) for _ in range(1000)]
+        monitor.check()
+
+        top = monitor.top_allocators[0]
+        self.assertIn(__file__, top['where'][0])
+        self.assertGreater(top['growth_bytes'], 1000 * 1024)
+        del leak
+
+    @override_settings(MEMORY_RECYCLE_MB=1)
+    @patch('core.memory.os.kill')
+    def test_recycle_past_limit(self, patched_kill):
+        """Test a worker past the limit logs its growth and is stopped."""
+        monitor = MemoryMonitor()
+
+        with self.assertLogs('core.memory', 'WARNING') as logs:
+            monitor.check()
+        monitor.check()
+
+        patched_kill.assert_called_once_with(monitor.pid, signal.SIGTERM)
+        self.assertIn('RSS history', logs.output[0])
+
+    @override_settings(MEMORY_RECYCLE_MB=1)
+    @patch('core.memory.rss_bytes', return_value=2 ** 20)
+    def test_limit_checked_when_sampling(self, patched_rss):
+        """Test requests between samples don't read the RSS."""
+        monitor = MemoryMonitor()
+        monitor.recycling = True
+
+        monitor.check()
+        monitor.check()
+
+        patched_rss.assert_called_once_with()
+
+    @override_settings(MEMORY_RECYCLE_MB=1)
+    @patch('core.memory.uwsgi', object())
+    @patch('core.memory.os.kill')
+    def test_limit_left_to_uwsgi(self, patched_kill):
+        """Test uWSGI workers leave the limit to --reload-on-rss."""
+        MemoryMonitor().check()
+
+        patched_kill.assert_not_called()
+
+
+class MemoryStatsViewTests(TestCase):
+    """Test the worker memory endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_staff_required(self):
+        """Test non-staff users can't read the memory use."""
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'test@12345')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(MEMORY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_memory_stats(self):
+        """Test staff users get the worker's RSS and its history."""
+        user = get_user_model().objects.create_superuser(
+            'admin@example.com', 'test@12345')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(MEMORY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertGreater(res.data['rss_bytes'], 0)
+        self.assertIn('samples', res.data)
@@ -0,0 +1,137 @@
+"""
+Test the Prometheus metrics.
+"""
+import os
+import tempfile
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.metrics import mark_worker_dead
+from core.models import Recipe
+
+METRICS_URL = reverse('metrics')
+RECIPES_URL = reverse('recipe:recipe-list')
+ROUTE = 'recipe:recipe-list'
+
+
+def sample(name, **labels):
+    """Return the current value of a sample, 0 when not yet recorded."""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsMiddlewareTests(TestCase):
+    """Test recording request metrics."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client.force_authenticate(self.user)
+        Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5,
+            price=Decimal('1.50'))
+
+    def test_request_recorded(self):
+        """Test latency, status, size and queries are recorded by route."""
+        requests = sample(
+            'http_requests_total', route=ROUTE, method='GET', status='200')
+        latencies = sample(
+            'http_request_duration_seconds_count', route=ROUTE, method='GET')
+        queries = sample('http_request_db_queries_sum', route=ROUTE)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(sample(
+            'http_requests_total', route=ROUTE, method='GET', status='200',
+        ), requests + 1)
+        self.assertEqual(sample(
+            'http_request_duration_seconds_count', route=ROUTE, method='GET',
+        ), latencies + 1)
+        self.assertGreater(
+            sample('http_request_db_queries_sum', route=ROUTE), queries)
+        self.assertGreater(
+            sample('http_response_size_bytes_sum', route=ROUTE), 0)
+        self.assertGreater(
+            sample('http_request_serializer_seconds_count', route=ROUTE), 0)
+
+    def test_unmatched_route(self):
+        """Test requests for unknown URLs share one route label."""
+        before = sample(
+            'http_requests_total', route='unmatched', method='GET',
+            status='404')
+
+        self.client.get('/no-such-page/')
+
+        self.assertEqual(sample(
+            'http_requests_total', route='unmatched', method='GET',
+            status='404',
+        ), before + 1)
+
+    def test_cache_lookups_counted(self):
+        """Test cache hits and misses are counted."""
+        hits = sample('cache_requests_total', result='hit')
+        misses = sample('cache_requests_total', result='miss')
+        cache.set('metrics-test', 1)
+
+        cache.get('metrics-test')
+        cache.get('metrics-missing')
+
+        self.assertEqual(
+            sample('cache_requests_total', result='hit'), hits + 1)
+        self.assertEqual(
+            sample('cache_requests_total', result='miss'), misses + 1)
+
+
+class MetricsViewTests(TestCase):
+    """Test the metrics endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_staff_required(self):
+        """Test non-staff users can't read the metrics."""
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_metrics(self):
+        """Test staff users get the metrics in the Prometheus format."""
+        user = get_user_model().objects.create_superuser(
+            'admin@example.com', 'testpass123')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'http_request_duration_seconds', res.content)
+
+
+class MarkWorkerDeadTests(SimpleTestCase):
+    """Test dropping the metrics of exited workers."""
+
+    def test_live_gauges_removed(self):
+        """Test a worker's live gauge files go, and its counters stay."""
+        with tempfile.TemporaryDirectory() as directory:
+            names = ['gauge_liveall_123.db', 'counter_123.db']
+            for name in names:
+                open(os.path.join(directory, name), 'w').close()
+
+            with patch.dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory):
+                mark_worker_dead(123)
+
+            self.assertEqual(os.listdir(directory), ['counter_123.db'])
@@ -0,0 +1,191 @@
+"""
+Test the application profiles and the middleware left to the admin.
+"""
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.template.response import TemplateResponse
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+
+from core.checks import check_admin_middleware
+from core.middleware import AdminMiddleware
+
+
+SCRIPT = """
+import json
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.urls import get_resolver
+
+django.setup()
+call_command('check')
+print(json.dumps({
+    'apps': settings.INSTALLED_APPS,
+    'middleware': settings.MIDDLEWARE,
+    'routes': [str(url.pattern) for url in get_resolver().url_patterns],
+}))
+"""
+
+
+class ApiProfileTests(SimpleTestCase):
+    """Test APP_PROFILE=api leaves out the admin and its middleware."""
+
+    def load(self, profile):
+        output = subprocess.run(
+            [sys.executable, '-c', SCRIPT],
+            cwd=settings.BASE_DIR, check=True, capture_output=True, text=True,
+            env=dict(os.environ, APP_PROFILE=profile,
+                     DJANGO_SETTINGS_MODULE='app.settings'),
+        ).stdout
+        return json.loads(output.splitlines()[-1])
+
+    def test_api_profile(self):
+        """Test the API profile passes checks without admin and sessions."""
+        loaded = self.load('api')
+
+        for app in settings.ADMIN_APPS:
+            self.assertNotIn(app, loaded['apps'])
+        for name in settings.ADMIN_MIDDLEWARE:
+            self.assertNotIn(name, loaded['middleware'])
+        self.assertIn('core.middleware.ProbeMiddleware', loaded['middleware'])
+        self.assertNotIn('admin/', loaded['routes'])
+        self.assertIn('api/recipe/', loaded['routes'])
+
+    def test_full_profile(self):
+        """Test the default profile serves the admin."""
+        loaded = self.load('full')
+
+        self.assertIn('django.contrib.admin', loaded['apps'])
+        self.assertIn('admin/', loaded['routes'])
+
+
+class AdminMiddlewareTests(TestCase):
+    """Test the admin middleware runs outside the API only."""
+
+    def test_api_request_skips_admin_middleware(self):
+        """Test API requests get no session, CSRF or frame options."""
+        res = self.client.post('/api/user/token/', {})
+
+        self.assertFalse(hasattr(res.wsgi_request, 'session'))
+        self.assertNotIn('X-Frame-Options', res)
+        self.assertNotIn('csrftoken', res.cookies)
+
+    def test_api_request_with_session_runs_admin_middleware(self):
+        """Test API requests with a session authenticate with it."""
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'pass123')
+        self.client.force_login(user)
+
+        res = self.client.get('/api/docs/')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.wsgi_request.user, user)
+        self.assertEqual(res['X-Frame-Options'], 'DENY')
+
+    def test_admin_request_runs_admin_middleware(self):
+        """Test admin requests get a session, user and frame options."""
+        res = self.client.get('/admin/login/')
+
+        self.assertTrue(hasattr(res.wsgi_request, 'session'))
+        self.assertFalse(res.wsgi_request.user.is_authenticated)
+        self.assertEqual(res['X-Frame-Options'], 'DENY')
+
+    def test_admin_csrf_enforced(self):
+        """Test the admin's CSRF check still runs."""
+        client = Client(enforce_csrf_checks=True)
+
+        res = client.post('/admin/login/', {'username': 'x', 'password': 'y'})
+
+        self.assertEqual(res.status_code, 403)
+
+    @override_settings(ADMIN_MIDDLEWARE=[
+        'core.tests.test_profiles.FirstHooks',
+        'core.tests.test_profiles.SecondHooks',
+    ])
+    def test_hooks_forwarded(self):
+        """Test the template response and exception hooks run, last first."""
+        middleware = AdminMiddleware(lambda request: HttpResponse())
+        request = RequestFactory().get('/admin/')
+        response = TemplateResponse(request, 'admin/login.html')
+
+        self.assertIs(
+            middleware.process_template_response(request, response),
+            response)
+        self.assertEqual(response.hooks, ['second', 'first'])
+        self.assertEqual(
+            middleware.process_exception(request, ValueError()).content,
+            b'second')
+
+    @override_settings(
+        ADMIN_MIDDLEWARE=['core.tests.test_profiles.FirstHooks'])
+    def test_hooks_skipped_for_api(self):
+        """Test API requests without a session skip the hooks."""
+        middleware = AdminMiddleware(lambda request: HttpResponse())
+        request = RequestFactory().get('/api/recipe/recipes/')
+        response = TemplateResponse(request, 'admin/login.html')
+
+        middleware.process_template_response(request, response)
+
+        self.assertFalse(hasattr(response, 'hooks'))
+        self.assertIsNone(middleware.process_exception(request, ValueError()))
+
+
+class Hooks:
+    """Record the hooks run by AdminMiddleware."""
+
+    name = None
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_template_response(self, request, response):
+        response.hooks = getattr(response, 'hooks', []) + [self.name]
+        return response
+
+    def process_exception(self, request, exception):
+        return HttpResponse(self.name)
+
+
+class FirstHooks(Hooks):
+    name = 'first'
+
+
+class SecondHooks(Hooks):
+    name = 'second'
+
+
+class AdminMiddlewareCheckTests(SimpleTestCase):
+    """Test the check for the middleware the admin needs."""
+
+    def test_admin_middleware_in_use(self):
+        """Test the admin's middleware may run from AdminMiddleware."""
+        self.assertEqual(check_admin_middleware(None), [])
+
+    def test_admin_middleware_missing(self):
+        """Test leaving out AdminMiddleware with the admin is an error."""
+        middleware = [
+            name for name in settings.MIDDLEWARE
+            if name != 'core.middleware.AdminMiddleware'
+        ]
+        with self.settings(MIDDLEWARE=middleware):
+            errors = check_admin_middleware(None)
+
+        self.assertEqual(
+            [error.id for error in errors],
+            ['core.E001', 'core.E002', 'core.E003'])
+
+    def test_admin_middleware_in_middleware(self):
+        """Test the admin's middleware may run from MIDDLEWARE."""
+        with self.settings(MIDDLEWARE=settings.ADMIN_MIDDLEWARE):
+            self.assertEqual(check_admin_middleware(None), [])
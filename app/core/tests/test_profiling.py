@@ -0,0 +1,63 @@
+"""
+Test profiling single requests.
+"""
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """Test ProfilingMiddleware."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.settings = override_settings(PROFILE_DIR=self.directory.name)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def get_recipes(self, is_staff, **headers):
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123', is_staff=is_staff)
+        token = Token.objects.create(user=user)
+        return self.client.get(
+            RECIPES_URL, HTTP_AUTHORIZATION=f'Token {token.key}', **headers)
+
+    def test_staff_request_profiled(self):
+        """Test a staff request with the header is profiled."""
+        res = self.get_recipes(True, HTTP_X_PROFILE='1')
+
+        path = os.path.join(self.directory.name, res['X-Profile-Id'])
+        with open(f'{path}.folded') as folded:
+            lines = folded.read().splitlines()
+        with open(f'{path}.json') as summary:
+            queries = json.load(summary)['queries']
+        self.assertTrue(
+            all(line.rsplit(' ', 1)[1].isdigit() for line in lines))
+        self.assertTrue(any(';SQL SELECT' in line for line in lines))
+        self.assertTrue(queries)
+        self.assertIn('ms', queries[0])
+
+    def test_header_from_non_staff_ignored(self):
+        """Test requests of other users are not profiled."""
+        res = self.get_recipes(False, HTTP_X_PROFILE='1')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('X-Profile-Id', res)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_no_header_not_profiled(self):
+        """Test requests without the header are not profiled."""
+        res = self.get_recipes(True)
+
+        self.assertNotIn('X-Profile-Id', res)
@@ -0,0 +1,73 @@
+"""
+Test the query budgets of the API views.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from prometheus_client import REGISTRY
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.middleware import QueryBudgetExceeded
+from core.models import Ingredient, Recipe, Tag
+from recipe.views import RecipeViewSet
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+ME_URL = reverse('user:me')
+
+
+@override_settings(QUERY_BUDGET_ACTION='raise')
+class QueryBudgetTests(TestCase):
+    """Test the views keep to their budgets however much data there is."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient(HTTP_AUTHORIZATION=f'Token {token.key}')
+        for index in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user, title=f'Recipe {index}', time_minutes=5,
+                price=Decimal('1.50'),
+            )
+            recipe.tags.add(
+                Tag.objects.create(user=self.user, name=f'T{index}'))
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f'I{index}'))
+        self.recipe = recipe
+
+    def test_read_views_within_budget(self):
+        """Test the budgeted read views don't raise."""
+        for url in (
+                RECIPES_URL,
+                reverse('recipe:recipe-detail', args=[self.recipe.id]),
+                TAGS_URL,
+                INGREDIENTS_URL + '?assigned_only=1',
+                ME_URL):
+            self.assertEqual(self.client.get(url).status_code, 200, url)
+
+    def test_over_budget_raises(self):
+        """Test an N+1 query pattern raises in 'raise' mode."""
+        with patch.object(RecipeViewSet, 'prefetch_fields', ()):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(RECIPES_URL)
+
+    @override_settings(QUERY_BUDGET_ACTION='metric')
+    def test_over_budget_counted(self):
+        """Test violations are counted in the metric."""
+        labels = {'route': 'recipe:recipe-list', 'action': 'list'}
+        before = REGISTRY.get_sample_value(
+            'query_budget_violations_total', labels) or 0
+
+        with patch.object(RecipeViewSet, 'prefetch_fields', ()):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(REGISTRY.get_sample_value(
+            'query_budget_violations_total', labels), before + 1)
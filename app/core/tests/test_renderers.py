@@ -0,0 +1,138 @@
+"""
+Test the JSON renderer and parser.
+"""
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from rest_framework.exceptions import ParseError
+
+from core.parsers import MessagePackParser, ORJSONParser
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """Test rendering with ORJSONRenderer."""
+
+    def setUp(self):
+        self.renderer = ORJSONRenderer()
+
+    def test_render_native_types(self):
+        """Test Decimal, datetime and UUID values render natively."""
+        recipe_uuid = uuid.UUID('12345678-1234-5678-1234-567812345678')
+        data = {
+            'price': Decimal('5.10'),
+            'created': datetime.datetime(
+                2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+            'uuid': recipe_uuid,
+        }
+
+        ret = self.renderer.render(data)
+
+        self.assertEqual(
+            ret,
+            b'{"price":"5.10","created":"2024-01-02T03:04:05Z",'
+            b'"uuid":"12345678-1234-5678-1234-567812345678"}',
+        )
+
+    def test_render_none(self):
+        """Test rendering None returns an empty body."""
+        self.assertEqual(self.renderer.render(None), b'')
+
+    def test_render_indent(self):
+        """Test an indent media type param pretty prints the output."""
+        ret = self.renderer.render({'id': 1}, 'application/json; indent=2')
+
+        self.assertEqual(ret, b'{\n  "id": 1\n}')
+
+    def test_render_other_indent(self):
+        """Test indents other than two spaces are honoured."""
+        data = {'id': 1, 'price': Decimal('5.50'), 'title': 'a\u2028b'}
+        ret = self.renderer.render(data, 'application/json; indent=4')
+
+        self.assertEqual(
+            ret,
+            b'{\n    "id": 1,\n    "price": "5.50",\n'
+            b'    "title": "a\\u2028b"\n}',
+        )
+
+    def test_render_rejects_non_finite_floats(self):
+        """Test NaN and infinities raise, as with STRICT_JSON in DRF."""
+        for value in (float('nan'), float('inf'), -float('inf')):
+            with self.assertRaises(ValueError):
+                self.renderer.render({'items': [{'score': value}]})
+
+    def test_render_non_finite_floats_not_strict(self):
+        """Test NaN is rendered as null with STRICT_JSON off."""
+        renderer = ORJSONRenderer()
+        renderer.strict = False
+
+        self.assertEqual(
+            renderer.render({'score': float('nan')}), b'{"score":null}')
+
+    def test_render_escapes_line_separators(self):
+        """Test U+2028 and U+2029 are escaped in the output."""
+        ret = self.renderer.render({'title': 'a\u2028b\u2029c'})
+
+        self.assertEqual(ret, b'{"title":"a\\u2028b\\u2029c"}')
+
+
+class ORJSONParserTests(SimpleTestCase):
+    """Test parsing with ORJSONParser."""
+
+    def setUp(self):
+        self.parser = ORJSONParser()
+
+    def test_parse(self):
+        """Test parsing a JSON body."""
+        stream = io.BytesIO('{"title": "Crème brûlée", "tags": []}'.encode())
+
+        data = self.parser.parse(stream)
+
+        self.assertEqual(data, {'title': 'Crème brûlée', 'tags': []})
+
+    def test_parse_error(self):
+        """Test invalid JSON raises a ParseError."""
+        with self.assertRaises(ParseError):
+            self.parser.parse(io.BytesIO(b'{"title":'))
+
+
+class MessagePackTests(SimpleTestCase):
+    """Test MessagePackRenderer and MessagePackParser."""
+
+    def setUp(self):
+        self.renderer = MessagePackRenderer()
+        self.parser = MessagePackParser()
+
+    def test_round_trip(self):
+        """Test Decimal and datetime values round-trip exactly."""
+        data = {
+            'price': Decimal('12345678901234567890.12'),
+            'created': datetime.datetime(
+                2024, 1, 2, 3, 4, 5, 6, tzinfo=datetime.timezone.utc),
+            'tags': [{'id': 1, 'name': 'Vegan'}],
+        }
+
+        ret = self.parser.parse(io.BytesIO(self.renderer.render(data)))
+
+        self.assertEqual(ret, data)
+        self.assertIsInstance(ret['price'], Decimal)
+
+    def test_render_uuid(self):
+        """Test UUID values render as strings."""
+        recipe_uuid = uuid.uuid4()
+
+        ret = self.parser.parse(
+            io.BytesIO(self.renderer.render({'uuid': recipe_uuid})))
+
+        self.assertEqual(ret, {'uuid': str(recipe_uuid)})
+
+    def test_parse_error(self):
+        """Test a truncated body raises a ParseError."""
+        body = self.renderer.render({'title': 'Soup'})
+
+        with self.assertRaises(ParseError):
+            self.parser.parse(io.BytesIO(body[:-2]))
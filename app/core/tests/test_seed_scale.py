@@ -0,0 +1,77 @@
+"""
+Test the seed_scale command.
+"""
+import argparse
+import random
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.management.commands.seed_scale import distribution
+from core.models import Ingredient, Recipe, Tag
+
+
+class DistributionTests(SimpleTestCase):
+    """Test parsing distribution specs."""
+
+    def test_distributions(self):
+        """Test each distribution draws counts in its range."""
+        rng = random.Random(0)
+
+        self.assertEqual(distribution('fixed:3')(rng), 3)
+        self.assertTrue(all(
+            2 <= distribution('uniform:2:5')(rng) <= 5 for _ in range(50)))
+        self.assertTrue(all(
+            distribution('poisson:4')(rng) >= 0 for _ in range(50)))
+        self.assertTrue(all(
+            4 <= distribution('pareto:1.5:4:20')(rng) <= 20
+            for _ in range(50)))
+
+    def test_invalid_distribution(self):
+        """Test an unknown or malformed spec is rejected."""
+        for spec in ('zipf:2', 'uniform:1', 'fixed'):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                distribution(spec)
+
+
+class SeedScaleTests(TestCase):
+    """Test seeding users and their recipes."""
+
+    def test_seed_scale(self):
+        """Test users, their data and the links between them are loaded."""
+        with tempfile.TemporaryDirectory() as media, \
+                override_settings(MEDIA_ROOT=media):
+            call_command(
+                'seed_scale', '--recipes-per-user=fixed:3',
+                '--tags-per-user=fixed:4', '--ingredients-per-user=fixed:6',
+                '--tags-per-recipe=fixed:2',
+                '--ingredients-per-recipe=fixed:9',
+                users=5, batch_size=2, seed=1, images=1.0, allow_write=True,
+                stdout=StringIO(),
+            )
+
+        users = get_user_model().objects.filter(
+            email__endswith='@seed.example.com')
+        self.assertEqual(users.count(), 5)
+        self.assertTrue(users[0].check_password('seed-pass-123'))
+        recipes = Recipe.objects.filter(user__in=users)
+        self.assertEqual(recipes.count(), 15)
+        self.assertEqual(Tag.objects.filter(user__in=users).count(), 20)
+        self.assertEqual(
+            Ingredient.objects.filter(user__in=users).count(), 30)
+        self.assertFalse(recipes.filter(image='').exists())
+        for recipe in recipes:
+            self.assertEqual(recipe.tags.count(), 2)
+            self.assertEqual(recipe.ingredients.count(), 6)
+            self.assertFalse(recipe.tags.exclude(user=recipe.user).exists())
+
+    def test_refuses_other_databases(self):
+        """Test databases not named bench* need --allow-write."""
+        with self.assertRaisesMessage(CommandError, '--allow-write'):
+            call_command('seed_scale', users=1, images=0, stdout=StringIO())
+
+        self.assertFalse(get_user_model().objects.filter(
+            email__endswith='@seed.example.com').exists())
@@ -0,0 +1,56 @@
+"""
+Test sizing the serving processes.
+"""
+import os
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core import serving
+
+GB = 2 ** 30
+
+
+class SizeWorkersTests(SimpleTestCase):
+    """Test sizing worker processes and threads."""
+
+    def test_sized_by_cpus(self):
+        """Test processes follow the CPUs when memory allows."""
+        self.assertEqual(
+            serving.size_workers(4, 16 * GB, GB // 2),
+            (4 * serving.PROCESSES_PER_CPU, serving.THREADS),
+        )
+
+    def test_capped_by_memory(self):
+        """Test processes are capped so all can reach the RSS limit."""
+        processes, _ = serving.size_workers(8, 2 * GB, GB // 2)
+
+        self.assertEqual(processes, 3)
+
+    def test_at_least_one_process(self):
+        """Test a worker is kept even when memory is short."""
+        processes, _ = serving.size_workers(2, GB // 4, GB)
+
+        self.assertEqual(processes, 1)
+
+    def test_available_resources(self):
+        """Test the CPUs and memory available are detected."""
+        self.assertGreaterEqual(serving.cpu_count(), 1)
+        self.assertGreater(serving.memory_bytes(), 0)
+
+    @override_settings(MEMORY_RECYCLE_MB=512)
+    @patch.dict(os.environ, {'SERVER_THREADS': '8'})
+    @patch('core.serving.memory_bytes', return_value=64 * GB)
+    @patch('core.serving.cpu_count', return_value=3)
+    def test_command(self, patched_cpus, patched_memory):
+        """Test the command prints the sizing, keeping overrides."""
+        out = StringIO()
+
+        call_command('size_workers', stdout=out, stderr=StringIO())
+
+        self.assertEqual(out.getvalue().splitlines(), [
+            f'export SERVER_PROCESSES={3 * serving.PROCESSES_PER_CPU}',
+            'export SERVER_THREADS=8',
+        ])
@@ -0,0 +1,109 @@
+"""
+Test the slow query log.
+"""
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.db import slow_queries
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class FingerprintTests(SimpleTestCase):
+    """Test normalizing queries to fingerprints."""
+
+    def test_fingerprint(self):
+        """Test literals, parameters and lists are normalized."""
+        self.assertEqual(
+            slow_queries.fingerprint(
+                "SELECT *  FROM t1 WHERE a = 'x''y' AND b IN (%s, %s, %s)\n"
+                "LIMIT 21"
+            ),
+            'SELECT * FROM t1 WHERE a = ? AND b IN (...) LIMIT ?',
+        )
+
+    def test_is_pure_select(self):
+        """Test SELECTs that lock, write or take sequence values are not."""
+        self.assertTrue(slow_queries.is_pure_select(
+            'SELECT "t1"."update" FROM "t1" WHERE "t1"."a" = \'share\''))
+        for sql in (
+            'SELECT * FROM t1 FOR UPDATE',
+            'SELECT * FROM t1 FOR NO KEY UPDATE SKIP LOCKED',
+            'SELECT * FROM t1 FOR KEY SHARE',
+            'WITH d AS (DELETE FROM t1 RETURNING *) SELECT * FROM d',
+            'SELECT * INTO t2 FROM t1',
+            "SELECT nextval('t1_id_seq')",
+            'SELECT pg_advisory_lock(1)',
+            'UPDATE t1 SET a = 1',
+        ):
+            with self.subTest(sql=sql):
+                self.assertFalse(slow_queries.is_pure_select(sql))
+
+
+class SlowQueryLogTests(TestCase):
+    """Test logging slow queries."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log = os.path.join(directory.name, 'slow.log')
+        slow_queries._explained.clear()
+
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client.force_authenticate(user)
+
+    def test_slow_queries_logged(self):
+        """Test slow queries are logged with their view and a plan."""
+        with override_settings(
+                SLOW_QUERY_MS=0, SLOW_QUERY_LOG=self.log,
+                SLOW_QUERY_EXPLAIN_RATE=1):
+            self.client.get(RECIPES_URL)
+
+        entries = list(slow_queries.read_log(self.log))
+        recipes = [e for e in entries if 'core_recipe' in e['sql']]
+        self.assertEqual(recipes[0]['view'], 'recipe:recipe-list')
+        self.assertIn('actual time', recipes[0]['plan'])
+
+    def test_explain_not_counted(self):
+        """Test the EXPLAIN of a slow query isn't run as a query."""
+        with override_settings(
+                SLOW_QUERY_MS=0, SLOW_QUERY_LOG=self.log,
+                SLOW_QUERY_EXPLAIN_RATE=1):
+            with CaptureQueriesContext(connection) as queries:
+                get_user_model().objects.count()
+
+        self.assertEqual(len(queries), 1)
+        entries = list(slow_queries.read_log(self.log))
+        self.assertEqual(len(entries), 1)
+        self.assertIn('actual time', entries[0]['plan'])
+
+    def test_fast_queries_not_logged(self):
+        """Test queries under the threshold are left out."""
+        with override_settings(SLOW_QUERY_MS=10000, SLOW_QUERY_LOG=self.log):
+            self.client.get(RECIPES_URL)
+
+        self.assertEqual(list(slow_queries.read_log(self.log)), [])
+
+    def test_report(self):
+        """Test the command groups the log by fingerprint."""
+        with override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_LOG=self.log):
+            self.client.get(RECIPES_URL)
+            self.client.get(RECIPES_URL)
+        out = StringIO()
+
+        call_command('slow_queries', log=self.log, stdout=out)
+
+        self.assertIn('2 queries', out.getvalue())
+        self.assertIn('recipe:recipe-list (2)', out.getvalue())
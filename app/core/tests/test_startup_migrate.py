@@ -0,0 +1,73 @@
+"""
+Test migrating the databases from one replica at startup.
+"""
+from unittest.mock import patch
+
+import psycopg2
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from core.management.commands import startup_migrate
+
+
+COMMAND = 'core.management.commands.startup_migrate'
+
+
+@patch(f'{COMMAND}.time.sleep')
+@patch(f'{COMMAND}.call_command')
+class StartupMigrateTests(TestCase):
+    """Test the startup_migrate command."""
+
+    def hold_lock(self):
+        """Take the migration lock from another session."""
+        other = psycopg2.connect(**connection.get_connection_params())
+        self.addCleanup(other.close)
+        with other.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_advisory_lock(%s)', [startup_migrate.LOCK_KEY])
+
+    def test_nothing_to_migrate(self, patched_call, patched_sleep):
+        """Test replicas start at once when the databases are current."""
+        call_command('startup_migrate')
+
+        patched_call.assert_not_called()
+        patched_sleep.assert_not_called()
+
+    @patch(f'{COMMAND}.pending_migrations', return_value=['default'])
+    def test_leader_migrates(self, patched_pending, patched_call,
+                             patched_sleep):
+        """Test the replica taking the lock migrates every database."""
+        call_command('startup_migrate')
+
+        self.assertEqual(
+            [call.args[0] for call in patched_call.call_args_list],
+            ['migrate', 'migrate_shards'])
+        patched_sleep.assert_not_called()
+
+    @patch(f'{COMMAND}.pending_migrations')
+    def test_follower_waits(self, patched_pending, patched_call,
+                            patched_sleep):
+        """Test other replicas wait until the migrations are applied."""
+        patched_pending.side_effect = [['default']] * 3 + [[]]
+        self.hold_lock()
+
+        call_command('startup_migrate')
+
+        patched_call.assert_not_called()
+        self.assertEqual(patched_sleep.call_count, 3)
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        self.assertLess(delays[0], delays[2])
+
+    @patch(f'{COMMAND}.pending_migrations', return_value=['default'])
+    def test_follower_timeout(self, patched_pending, patched_call,
+                              patched_sleep):
+        """Test waiting replicas give up after the timeout."""
+        self.hold_lock()
+
+        with self.assertRaises(CommandError):
+            call_command('startup_migrate', '--timeout=0')
+
+        patched_call.assert_not_called()
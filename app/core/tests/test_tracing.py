@@ -0,0 +1,138 @@
+"""
+Test tracing requests.
+"""
+import json
+import os
+import tempfile
+from io import BytesIO
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+
+
+class TracingMiddlewareTests(TestCase):
+    """Test TracingMiddleware."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.trace_file = os.path.join(self.directory.name, 'traces.jsonl')
+        self.settings = override_settings(
+            TRACE_FILE=self.trace_file, TRACE_SAMPLE_RATE=1.0,
+            MEDIA_ROOT=self.directory.name,
+        )
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def spans(self):
+        with open(self.trace_file) as traces:
+            lines = traces.read().splitlines()
+        self.assertEqual(len(lines), 1)
+        scope = json.loads(lines[0])['resourceSpans'][0]['scopeSpans'][0]
+        return {span['name']: span for span in scope['spans']}
+
+    def test_create_traced(self):
+        """Test a sampled recipe create records its phases as spans."""
+        res = self.client.post(RECIPES_URL, {
+            'title': 'Curry', 'time_minutes': 30, 'price': '5.50',
+            'tags': [{'name': 'Dinner'}],
+        }, format='json')
+
+        spans = self.spans()
+        root = spans['POST recipe:recipe-list']
+        self.assertEqual(res['X-Trace-Id'], root['traceId'])
+        self.assertNotIn('parentSpanId', root)
+        for name in ('authenticate', 'INSERT', 'render',
+                     'RecipeDetailSerializer.to_representation'):
+            self.assertEqual(spans[name]['parentSpanId'], root['spanId'])
+            self.assertEqual(spans[name]['traceId'], root['traceId'])
+        self.assertIn(
+            {'key': 'http.status_code', 'value': {'intValue': '201'}},
+            root['attributes'],
+        )
+
+    def test_upload_image_storage_write_traced(self):
+        """Test writing an uploaded image is a span."""
+        recipe = Recipe.objects.create(
+            user=self.user, title='Curry', time_minutes=30, price='5.50')
+        image = BytesIO()
+        Image.new('RGB', (10, 10)).save(image, format='JPEG')
+        image.seek(0)
+        image.name = 'image.jpg'
+
+        self.client.post(
+            reverse('recipe:recipe-upload-image', args=[recipe.id]),
+            {'image': image}, format='multipart')
+
+        attributes = {
+            attribute['key']: attribute['value']
+            for attribute in self.spans()['storage.save']['attributes']
+        }
+        self.assertTrue(
+            attributes['file.name']['stringValue'].endswith('.jpg'))
+
+    @override_settings(
+        TRACE_SAMPLE_RATE=0.0, TRACE_TRUSTED_NETWORKS=['127.0.0.0/8'])
+    def test_trusted_traceparent_sampled(self):
+        """Test a trusted sampled traceparent joins the caller's trace."""
+        res = self.client.get(
+            RECIPES_URL,
+            HTTP_TRACEPARENT=f'00-{TRACE_ID}-00f067aa0ba902b7-01')
+
+        root = self.spans()['GET recipe:recipe-list']
+        self.assertEqual(res['X-Trace-Id'], TRACE_ID)
+        self.assertEqual(root['parentSpanId'], '00f067aa0ba902b7')
+
+    @override_settings(TRACE_TRUSTED_NETWORKS=['127.0.0.0/8'])
+    def test_trusted_traceparent_not_sampled(self):
+        """Test a trusted traceparent without the sampled flag is obeyed."""
+        res = self.client.get(
+            RECIPES_URL,
+            HTTP_TRACEPARENT=f'00-{TRACE_ID}-00f067aa0ba902b7-00')
+
+        self.assertNotIn('X-Trace-Id', res)
+        self.assertFalse(os.path.exists(self.trace_file))
+
+    @override_settings(
+        TRACE_SAMPLE_RATE=0.0, TRACE_TRUSTED_NETWORKS=['10.0.0.0/8'])
+    def test_untrusted_traceparent_sampled_locally(self):
+        """Test an untrusted sampled flag is left to the sample rate."""
+        res = self.client.get(
+            RECIPES_URL,
+            HTTP_TRACEPARENT=f'00-{TRACE_ID}-00f067aa0ba902b7-01')
+
+        self.assertNotIn('X-Trace-Id', res)
+        self.assertFalse(os.path.exists(self.trace_file))
+
+    def test_untrusted_traceparent_joined(self):
+        """Test a locally sampled request joins an untrusted trace."""
+        res = self.client.get(
+            RECIPES_URL,
+            HTTP_TRACEPARENT=f'00-{TRACE_ID}-00f067aa0ba902b7-00')
+
+        root = self.spans()['GET recipe:recipe-list']
+        self.assertEqual(res['X-Trace-Id'], TRACE_ID)
+        self.assertEqual(root['parentSpanId'], '00f067aa0ba902b7')
+
+    @override_settings(TRACE_SAMPLE_RATE=0.0)
+    def test_not_sampled(self):
+        """Test requests left out by sampling are not traced."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('X-Trace-Id', res)
+        self.assertFalse(os.path.exists(self.trace_file))
@@ -0,0 +1,67 @@
+"""
+Test views of the core app.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+DB_STATS_URL = reverse('db-stats')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class DatabaseStatsViewTests(TestCase):
+    """Test the database connection stats endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_staff_required(self):
+        """Test non-staff users can't read the stats."""
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'test@12345')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(DB_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_stats(self):
+        """Test staff users get the stats of each database alias."""
+        user = get_user_model().objects.create_superuser(
+            'admin@example.com', 'test@12345')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(DB_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('default', res.data)
+
+
+class ServerTimingTests(TestCase):
+    """Test the Server-Timing header of the API views."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123')
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing(self):
+        """Test the phases of a request are reported."""
+        res = self.client.get(RECIPES_URL)
+
+        names = [
+            entry.split(';')[0] for entry in res['Server-Timing'].split(', ')
+        ]
+        self.assertEqual(
+            names, ['auth', 'queryset', 'db', 'serialize', 'render', 'total'])
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_off(self):
+        """Test no header is sent when SERVER_TIMING is off."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn('Server-Timing', res)
@@ -0,0 +1,65 @@
+"""
+Test warming up serving processes.
+"""
+import sys
+import types
+from unittest.mock import patch
+
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import get_resolver
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.regex_helper import _lazy_re_compile
+
+from core import warmup
+
+
+class PreloadTests(SimpleTestCase):
+    """Test the warmup shared by all workers."""
+
+    def test_preload(self):
+        """Test the URL conf and serializers are built without queries."""
+        warmup.preload()
+
+        self.assertTrue(get_resolver()._populated)
+        self.assertEqual(list(warmup._lazy_regexes()), [])
+
+    def test_lazy_regexes(self):
+        """Test regexes compiled on first use are found, and only those."""
+        module = types.ModuleType('django.warmup_test')
+        module.regex = _lazy_re_compile('x+')
+        module.other = SimpleLazyObject(dict)
+        with patch.dict(sys.modules, {module.__name__: module}):
+            found = list(warmup._lazy_regexes())
+            module.regex.pattern
+            compiled = list(warmup._lazy_regexes())
+
+        self.assertTrue(any(regex is module.regex for regex in found))
+        self.assertFalse(any(regex is module.other for regex in found))
+        self.assertFalse(any(regex is module.regex for regex in compiled))
+        self.assertIs(module.other._wrapped, empty)
+
+
+class WarmUpTests(TestCase):
+    """Test the warmup of each worker."""
+
+    def test_warm_up(self):
+        """Test the databases are connected."""
+        warmup.warm_up()
+
+        self.assertIsNotNone(connection.connection)
+
+    def test_connection_failure_logged(self):
+        """Test a database that can't be reached doesn't stop the worker."""
+        with patch.object(connection, 'ensure_connection',
+                          side_effect=OperationalError('down')), \
+                self.assertLogs('core.warmup', 'WARNING'):
+            warmup.warm_up()
+
+    @override_settings(WORKER_WARMUP=False)
+    def test_disabled(self):
+        """Test WORKER_WARMUP=0 skips the warmup."""
+        with patch.object(connection, 'ensure_connection') as patched:
+            warmup.warm_up()
+
+        patched.assert_not_called()
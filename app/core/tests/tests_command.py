@@ -6,29 +6,81 @@ from unittest.mock import patch
 from psycopg2 import OperationalError as Psycopg2OpError
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
 
 
-@patch('core.management.commands.wait_for_db.Command.check')
+@patch('core.management.commands.wait_for_db.Command.probe')
 class CommandTests(SimpleTestCase):
     """Test commands."""
 
-    def test_wait_for_db_ready(self, patched_check):
+    def test_wait_for_db_ready(self, patched_probe):
         """Test waiting for database if database ready."""
-        patched_check.return_value = True
+        patched_probe.return_value = None
 
         call_command('wait_for_db')
 
-        patched_check.assert_called_once_with(databases=['default'])
+        patched_probe.assert_called_once_with('default')
 
     @patch('time.sleep')
-    def test_wait_for_db_delay(self, patched_sleep, patched_check):
+    def test_wait_for_db_delay(self, patched_sleep, patched_probe):
         """Test waiting for database when getting OperationalError."""
-        patched_check.side_effect = [Psycopg2OpError] * 2 + \
-            [OperationalError] * 3 + [True]
+        patched_probe.side_effect = [Psycopg2OpError] * 2 + \
+            [OperationalError] * 3 + [None]
 
         call_command('wait_for_db')
 
-        self.assertEqual(patched_check.call_count, 6)
-        patched_check.assert_called_with(databases=['default'])
\ No newline at end of file
+        self.assertEqual(patched_probe.call_count, 6)
+        patched_probe.assert_called_with('default')
+
+    @patch('time.sleep')
+    def test_wait_for_db_backoff(self, patched_sleep, patched_probe):
+        """Test retries start after milliseconds and back off, capped."""
+        patched_probe.side_effect = [Psycopg2OpError] * 12 + [None]
+
+        call_command('wait_for_db')
+
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        self.assertLess(delays[0], 0.01)
+        self.assertLess(delays[0], delays[4])
+        self.assertLessEqual(max(delays), 1)
+
+    @patch('time.sleep')
+    def test_wait_for_db_timeout(self, patched_sleep, patched_probe):
+        """Test giving up once the timeout has passed."""
+        patched_probe.side_effect = Psycopg2OpError
+
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', '--timeout=0')
+
+        patched_sleep.assert_not_called()
+
+    def test_wait_for_db_databases(self, patched_probe):
+        """Test waiting for each database asked for."""
+        call_command(
+            'wait_for_db', '--database=default', '--database=replica_1')
+
+        self.assertEqual(
+            [call.args[0] for call in patched_probe.call_args_list],
+            ['default', 'replica_1'])
+
+    @patch('time.sleep')
+    @patch('core.management.commands.wait_for_db.pending_migrations')
+    def test_wait_for_migrations(self, patched_pending, patched_sleep,
+                                 patched_probe):
+        """Test waiting until the migrations are applied."""
+        patched_pending.side_effect = [['default']] * 2 + [[]]
+
+        call_command('wait_for_db', '--migrations')
+
+        self.assertEqual(patched_pending.call_count, 3)
+        self.assertEqual(patched_sleep.call_count, 2)
+
+
+class WaitForDatabaseTests(TestCase):
+    """Test wait_for_db against the test database."""
+
+    def test_wait_for_db(self):
+        """Test the database and its migrations are found ready."""
+        call_command('wait_for_db', '--migrations', '--timeout=0')
@@ -0,0 +1,226 @@
+"""
+Tracing of API requests.
+
+TracingMiddleware traces a sample of the requests, a share of
+TRACE_SAMPLE_RATE of them. Requests with a W3C ``traceparent`` header join
+the caller's trace, but its sampled flag is only obeyed from the networks
+in TRACE_TRUSTED_NETWORKS, so other clients can't have every request
+traced. The decision is made once, at the head of the request; requests
+left out pay for nothing else. Traced requests get spans for
+authentication, every SQL query, serializer to_representation(),
+rendering and storage writes.
+
+Each finished trace is appended to the rotating TRACE_FILE as one line of
+OTLP/JSON, the format read by the OpenTelemetry collector's otlpjsonfile
+receiver, which can forward it to any tracing backend. The trace id is
+returned in the ``X-Trace-Id`` response header.
+"""
+import contextvars
+import functools
+import ipaddress
+import json
+import logging
+import os
+import random
+import re
+import time
+from contextlib import ExitStack, contextmanager
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.db import connections
+
+
+SERVICE_NAME = 'recipe-api'
+LOG_BACKUPS = 5
+
+# OTLP span kinds and status codes.
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_current = contextvars.ContextVar('span', default=None)
+_handlers = {}
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class Span:
+    """A timed operation of a trace."""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'kind',
+                 'attributes', 'start', 'end', 'error', 'spans')
+
+    def __init__(self, name, trace_id, parent_id=None, kind=KIND_INTERNAL,
+                 attributes=None, start=None, spans=None):
+        self.trace_id = trace_id
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start = start or time.time_ns()
+        self.end = None
+        self.error = None
+        # Finished spans of the trace, shared by all its spans.
+        self.spans = spans if spans is not None else []
+
+    def child(self, name, kind=KIND_INTERNAL, attributes=None, start=None):
+        """Return a new span under this one."""
+        return Span(name, self.trace_id, self.span_id, kind, attributes,
+                    start, self.spans)
+
+    def finish(self):
+        self.end = time.time_ns()
+        self.spans.append(self)
+
+    def to_otlp(self):
+        """Return the span as an OTLP/JSON dict."""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': [
+                _attribute(key, value)
+                for key, value in self.attributes.items()
+            ],
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        if self.error:
+            span['status'] = {'code': STATUS_ERROR, 'message': self.error}
+        return span
+
+
+def current_span():
+    """Return the span being recorded, or None if the request isn't traced."""
+    return _current.get()
+
+
+@contextmanager
+def span(name, attributes=None, kind=KIND_INTERNAL):
+    """Record the block as a child of the current span, if any.
+
+    Yields the new span, or None when the request isn't traced.
+    """
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, kind, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except Exception as exc:
+        child.error = f'{type(exc).__name__}: {exc}'
+        raise
+    finally:
+        _current.reset(token)
+        child.finish()
+
+
+def add_span(name, start, attributes=None):
+    """Record a span that started at `start` (time.time_ns()) and ends now."""
+    parent = _current.get()
+    if parent is not None:
+        parent.child(name, attributes=attributes, start=start).finish()
+
+
+def trace_query(execute, sql, params, many, context):
+    """execute_wrapper recording each query as a span."""
+    with span(sql.split(None, 1)[0].upper(), {
+        'db.system': 'postgresql',
+        'db.name': context['connection'].alias,
+        'db.statement': sql,
+    }, KIND_CLIENT):
+        return execute(sql, params, many, context)
+
+
+@functools.lru_cache(maxsize=None)
+def _networks(networks):
+    return [ipaddress.ip_network(network) for network in networks]
+
+
+def trusted(request):
+    """Return whether the request comes from TRACE_TRUSTED_NETWORKS."""
+    if not settings.TRACE_TRUSTED_NETWORKS:
+        return False
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(
+        address in network
+        for network in _networks(tuple(settings.TRACE_TRUSTED_NETWORKS))
+    )
+
+
+def start_trace(request):
+    """Return the root span of a request, or None if it isn't sampled."""
+    match = _TRACEPARENT.match(request.META.get('HTTP_TRACEPARENT', ''))
+    if match is not None and trusted(request):
+        sampled = int(match.group(3), 16) & 1
+    else:
+        sampled = random.random() < settings.TRACE_SAMPLE_RATE
+    if not sampled:
+        return None
+    if match is not None:
+        trace_id, parent_id = match.group(1, 2)
+    else:
+        trace_id, parent_id = '%032x' % random.getrandbits(128), None
+    return Span(request.method, trace_id, parent_id, KIND_SERVER, {
+        'http.method': request.method,
+        'http.target': request.get_full_path(),
+    })
+
+
+@contextmanager
+def record(root):
+    """Make `root` the current span, then export its trace."""
+    token = _current.set(root)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(trace_query))
+            yield root
+    finally:
+        _current.reset(token)
+        root.finish()
+        export(root.spans)
+
+
+def export(spans):
+    """Append finished spans to TRACE_FILE as a line of OTLP/JSON."""
+    path = settings.TRACE_FILE
+    handler = _handlers.get(path)
+    if handler is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handler = _handlers[path] = RotatingFileHandler(
+            path, maxBytes=settings.TRACE_FILE_BYTES,
+            backupCount=LOG_BACKUPS, delay=True,
+        )
+    payload = {'resourceSpans': [{
+        'resource': {'attributes': [
+            _attribute('service.name', SERVICE_NAME),
+            _attribute('process.pid', os.getpid()),
+        ]},
+        'scopeSpans': [{
+            'scope': {'name': __name__},
+            'spans': [span.to_otlp() for span in spans],
+        }],
+    }]}
+    handler.handle(logging.makeLogRecord({'msg': json.dumps(payload)}))
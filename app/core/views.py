@@ -0,0 +1,171 @@
+"""
+Views for the core app.
+
+"""
+import hashlib
+import time
+from functools import lru_cache
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+from drf_spectacular.utils import extend_schema, OpenApiTypes
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import compression, memory, metrics, tracing
+from core.db.backends.postgresql.base import connection_stats
+
+
+class ServerTimingMixin:
+    """Break the time of an API view down in a Server-Timing header.
+
+    Reports authentication, queryset building, database, serialization
+    and rendering time when SERVER_TIMING is on. Database time is taken
+    out of the other phases. Authentication and rendering are also spans
+    of traced requests.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        self.started = perf_counter()
+        if not settings.SERVER_TIMING:
+            return super().dispatch(request, *args, **kwargs)
+
+        # Views override get_queryset() without calling super(), so the
+        # timing wraps whichever one this view has.
+        build_queryset = getattr(self, 'get_queryset', None)
+        if build_queryset is not None:
+            def get_queryset():
+                with metrics.timed('queryset'):
+                    return build_queryset()
+            self.get_queryset = get_queryset
+
+        if metrics.current_stats() is not None:
+            return super().dispatch(request, *args, **kwargs)
+        with metrics.RequestStats(request).measure():
+            return super().dispatch(request, *args, **kwargs)
+
+    def perform_authentication(self, request):
+        with metrics.timed('auth'), tracing.span('authenticate'):
+            super().perform_authentication(request)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        if tracing.current_span() is not None:
+            render_start = time.time_ns()
+            response.add_post_render_callback(
+                lambda response: tracing.add_span('render', render_start, {
+                    'http.response.content_type': response.get(
+                        'Content-Type', ''),
+                }))
+        stats = metrics.current_stats()
+        if stats is None or not settings.SERVER_TIMING:
+            return response
+
+        render_started = perf_counter()
+
+        def add_header(response):
+            stats.add('render', perf_counter() - render_started)
+            response['Server-Timing'] = metrics.server_timing(
+                stats, perf_counter() - self.started)
+
+        response.add_post_render_callback(add_header)
+        return response
+
+
+class DatabaseStatsView(APIView):
+    """Report connection reuse and pool stats of the serving worker."""
+
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        """Return the stats of this worker process by database alias."""
+        return Response(connection_stats())
+
+
+class MemoryStatsView(APIView):
+    """Report the memory use of the serving worker, see core.memory."""
+
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        """Return the RSS history and growing allocators of this worker."""
+        return Response(memory.get_monitor().report())
+
+
+class MetricsView(APIView):
+    """Expose the Prometheus metrics of all workers."""
+
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(responses={(200, 'text/plain'): OpenApiTypes.STR})
+    def get(self, request):
+        """Return the metrics in the Prometheus text format."""
+        body, content_type = metrics.collect()
+        return HttpResponse(body, content_type=content_type)
+
+
+@lru_cache(maxsize=16)
+def _read_static(path):
+    """Return the content of a collected file and an ETag for it."""
+    with open(path, 'rb') as static_file:
+        content = static_file.read()
+    return content, '"%s"' % hashlib.md5(content).hexdigest()
+
+
+class SchemaView(SpectacularAPIView):
+    """OpenAPI schema, served from the copy rendered at build time.
+
+    With PREBUILT_SCHEMA on and a copy collected by build_static, the
+    schema in the negotiated format is read once per worker and served
+    pre-compressed, with an ETag and cacheable for SCHEMA_MAX_AGE seconds.
+    Otherwise, or when a language or API version is asked for, it is
+    generated as usual.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        name = f'{settings.SCHEMA_STATIC_DIR}/schema.{renderer.format}'
+        hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+        if (not settings.PREBUILT_SCHEMA or name not in hashed_files
+                or request.GET.keys() - {'format'}):
+            return super().get(request, *args, **kwargs)
+
+        path = staticfiles_storage.path(hashed_files[name])
+        encoding = compression.select_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is not None:
+            suffix = staticfiles_storage.compressed_suffixes[encoding]
+            if staticfiles_storage.exists(hashed_files[name] + suffix):
+                path += suffix
+            else:
+                encoding = None
+        content, etag = _read_static(path)
+
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type += f'; charset={renderer.charset}'
+        response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        response['Cache-Control'] = (
+            f'public, max-age={settings.SCHEMA_MAX_AGE}')
+        response['Content-Disposition'] = (
+            f'inline; filename="{self._get_filename(request, None)}"')
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        if encoding is not None:
+            response['Content-Encoding'] = encoding
+        return get_conditional_response(
+            request, etag=etag, response=response)
@@ -0,0 +1,126 @@
+"""
+Warmup of the serving processes.
+
+preload() runs in the uWSGI master once the application is loaded, so
+what it builds is shared copy-on-write by the workers forked from it:
+the URL conf with its compiled patterns, the DRF classes named in
+REST_FRAMEWORK, the fields of WARMUP_SERIALIZERS with the model metadata
+behind them, and the modules and regexes Django otherwise loads on first
+use.
+warm_up() runs in every worker right after the fork, for what can't be
+shared: database connections, with a first query on each table and the
+token lookup, handed back to the pool when pooling is on, and cache
+clients.
+
+gunicorn workers (app.asgi) load the application after the fork, so they
+run preload() themselves and warm_up() from the post_worker_init hook of
+scripts/gunicorn.conf.py, before their event loop starts.
+
+With both, the first requests a worker serves cost the same as the rest.
+WORKER_WARMUP=0 turns them off.
+"""
+import logging
+import sys
+from importlib import import_module
+
+from django.conf import settings
+from django.apps import apps
+from django.core.cache import caches
+from django.db import DatabaseError, connections, router
+from django.urls import URLResolver, get_resolver
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.module_loading import import_string
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def _compile_patterns(resolver):
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        if isinstance(pattern, URLResolver):
+            _compile_patterns(pattern)
+
+
+def _build_fields(serializer):
+    serializer = getattr(serializer, 'child', serializer)
+    for field in getattr(serializer, 'fields', {}).values():
+        _build_fields(field)
+
+
+def _lazy_regexes(prefixes=('django.', 'rest_framework.')):
+    """Yield the regexes of loaded modules still waiting to be compiled.
+
+    These are made by _lazy_re_compile(), at module level or on classes.
+    """
+    for name, module in list(sys.modules.items()):
+        if not name.startswith(prefixes) or module is None:
+            continue
+        # type(), as isinstance() would evaluate any lazy object.
+        namespaces = [vars(module)] + [
+            vars(value) for value in list(vars(module).values())
+            if issubclass(type(value), type) and value.__module__ == name
+        ]
+        for namespace in namespaces:
+            for value in list(namespace.values()):
+                if (type(value) is SimpleLazyObject
+                        and value._wrapped is empty
+                        and value._setupfunc.__qualname__.startswith(
+                            '_lazy_re_compile')):
+                    yield value
+
+
+def preload():
+    """Build the state the workers share before they fork."""
+    if not settings.WORKER_WARMUP:
+        return
+    resolver = get_resolver()
+    _compile_patterns(resolver)
+    resolver.reverse_dict
+    for name in api_settings.import_strings:
+        getattr(api_settings, name)
+    for path in settings.WARMUP_SERIALIZERS:
+        _build_fields(import_string(path)())
+    # Modules Django imports on first use.
+    if apps.is_installed('django.contrib.messages'):
+        import_string(settings.MESSAGE_STORAGE)
+    if apps.is_installed('django.contrib.sessions'):
+        import_module(settings.SESSION_ENGINE)
+    for connection in connections.all():
+        connection.ops.compiler('SQLCompiler')
+    # Regexes Django compiles on first use, e.g. to validate the host.
+    for regex in _lazy_regexes():
+        regex.pattern
+
+
+def warm_up():
+    """Prepare a newly forked worker to serve requests."""
+    if not settings.WORKER_WARMUP:
+        return
+    for connection in connections.all():
+        try:
+            connection.ensure_connection()
+        except DatabaseError as exc:
+            # The first request will try again.
+            logger.warning('Warmup could not connect to %s: %s',
+                           connection.alias, exc)
+            continue
+        # The first query on a table also loads its catalog entries into
+        # the database session.
+        for model in apps.get_models():
+            if router.allow_migrate_model(connection.alias, model):
+                list(model._base_manager.using(connection.alias)
+                     .values_list('pk')[:1])
+        if connection.alias == 'default':
+            # Builds the token lookup every API request starts with.
+            try:
+                TokenAuthentication().authenticate_credentials('')
+            except AuthenticationFailed:
+                pass
+        if getattr(connection, 'pool', None) is not None:
+            connection.close()
+    for cache in caches.all():
+        cache.has_key('warmup')
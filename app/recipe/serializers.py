@@ -3,33 +3,54 @@
 """
 
 from rest_framework import serializers
+
+from core.metrics import TimedListSerializer, TimedSerializerMixin
 from core.models import Recipe
 from core.models import Tag
 from core.models import Ingredient
 
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Ingredient model."""
 
     class Meta:
         model = Ingredient
         fields = ('id', 'name')
         read_only_fields = ('id',)
+        list_serializer_class = TimedListSerializer
 
         
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Tag model."""
 
     class Meta:
         model = Tag
         fields = ('id', 'name')
         read_only_fields = ('id',)
+        list_serializer_class = TimedListSerializer
 
         
 
-class RecipeSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Drop fields not selected through the ``fields``/``omit`` kwargs."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        omit = kwargs.pop('omit', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        if omit:
+            for name in set(self.fields) & set(omit):
+                self.fields.pop(name)
+
+
+class RecipeSerializer(TimedSerializerMixin, SparseFieldsMixin,
+                       serializers.ModelSerializer):
     """Serializer for Recipe model."""
     
     tags = TagSerializer(many=True, required=False)
@@ -40,20 +61,22 @@ class RecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'title', 'time_minutes', 'price', 'description', 'link',
                    'tags', 'ingredients')
         read_only_fields = ('id',)
+        list_serializer_class = TimedListSerializer
 
     def get_or_create_tags(self, recipe, tags_data):
         """Helper method to get or create tags for a recipe."""
         auth_user = self.context['request'].user
         for tag_data in tags_data:
-            tag, created = Tag.objects.get_or_create(user=auth_user, **tag_data)
+            tag, created = Tag.objects.for_user(auth_user).get_or_create(
+                user=auth_user, **tag_data)
             recipe.tags.add(tag)
             
     def get_or_create_ingredients(self, recipe, ingredients_data):
         """Helper method to get or create ingredients for a recipe."""
         auth_user = self.context['request'].user
         for ingredient_data in ingredients_data:
-            ingredient, created = Ingredient.objects.get_or_create(
-                user=auth_user, **ingredient_data)
+            ingredient, created = Ingredient.objects.for_user(
+                auth_user).get_or_create(user=auth_user, **ingredient_data)
             recipe.ingredients.add(ingredient)
 
 
@@ -101,7 +124,7 @@ class RecipeDetailSerializer(RecipeSerializer):
         read_only_fields = RecipeSerializer.Meta.read_only_fields + ('user',)
 
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+class RecipeImageSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for uploading images to recipes."""
 
     class Meta:
@@ -6,6 +6,8 @@ from decimal import Decimal
 import tempfile
 import os
 
+import msgpack
+
 
 from  PIL import Image
 
@@ -20,6 +22,7 @@ from rest_framework.test import APIClient
 from core.models import  Recipe, Tag, Ingredient
     
 
+from core.renderers import MessagePackRenderer
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 RECIPES_URL = reverse('recipe:recipe-list')
@@ -485,6 +488,81 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(serializer2.data, res.data)
         self.assertNotIn(serializer3.data, res.data)
 
+    def test_list_recipes_sparse_fields(self):
+        """Test the fields param limits the rendered recipe fields."""
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{'id': recipe.id, 'title': recipe.title}])
+
+    def test_list_recipes_omit_fields(self):
+        """Test the omit param drops fields from the rendered recipes."""
+        create_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL, {'omit': 'tags,ingredients,link'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(res.data[0]),
+            {'id', 'title', 'time_minutes', 'price', 'description'},
+        )
+
+    def test_list_recipes_prefetches_nested_fields(self):
+        """Test nested fields are prefetched instead of queried per recipe."""
+        for title in ('Soup', 'Salad', 'Stew'):
+            recipe = create_recipe(user=self.user, title=title)
+            recipe.tags.add(Tag.objects.create(user=self.user, name=title))
+
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 3)
+
+    def test_get_recipe_detail_sparse_fields(self):
+        """Test the fields param applies to the recipe detail."""
+        recipe = create_recipe(user=self.user)
+
+        res = self.client.get(
+            detail_url(recipe.id), {'fields': 'id,price,image'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data), {'id', 'price', 'image'})
+
+    def test_list_recipes_msgpack(self):
+        """Test recipes are rendered as MessagePack when accepted."""
+        recipe = create_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(res.content)
+        self.assertEqual(data[0]['id'], recipe.id)
+        self.assertEqual(data[0]['price'], '5.00')
+
+    def test_create_recipe_msgpack(self):
+        """Test creating a recipe from a MessagePack body."""
+        payload = {
+            'title': 'Msgpack Recipe',
+            'time_minutes': 12,
+            'price': Decimal('4.25'),
+            'tags': [{'name': 'Binary'}],
+        }
+        body = MessagePackRenderer().render(payload)
+
+        res = self.client.post(
+            RECIPES_URL, body, content_type='application/msgpack')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.price, payload['price'])
+        self.assertEqual(recipe.tags.get().name, 'Binary')
+
 
         
 class RecipeImageUploadTests(TestCase):
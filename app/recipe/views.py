@@ -15,10 +15,28 @@ from rest_framework.response import Response
 
 from recipe import serializers
 
+from core.views import ServerTimingMixin
 from core.models import Recipe
 from core.models import Tag
 from core.models import Ingredient
 
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        name='fields',
+        type=OpenApiTypes.STR,
+        description=(
+            'Comma-separated list of fields to include in the response.'),
+    ),
+    OpenApiParameter(
+        name='omit',
+        type=OpenApiTypes.STR,
+        description=(
+            'Comma-separated list of fields to leave out of the response.'),
+    ),
+]
+
+
 @extend_schema_view(
     list=extend_schema(
         parameters=[
@@ -31,11 +49,13 @@ from core.models import Ingredient
                 name='ingredients',
                 type=OpenApiTypes.STR,  
                 description='Comma-separated list of ingredient IDs to filter recipes.',
-            )
+            ),
+            *SPARSE_FIELDS_PARAMETERS,
         ]
-    ) 
+    ),
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ServerTimingMixin, viewsets.ModelViewSet):
     """Viewset for Recipe API."""
     
     serializer_class = serializers.RecipeDetailSerializer
@@ -44,10 +64,55 @@ class RecipeViewSet(viewsets.ModelViewSet):
     authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAuthenticated,)
 
+    # Actions that honour the ``fields``/``omit`` query params.
+    sparse_actions = ('list', 'retrieve')
+    # Many-to-many fields loaded with prefetch_related when requested.
+    prefetch_fields = ('tags', 'ingredients')
+    # Queries per action, including authentication; see
+    # core.middleware.QueryBudgetMiddleware.
+    query_budgets = {'list': 4, 'retrieve': 4}
+
 
     def params_to_ints(self, qs):
         """Convert a list of string IDs to integers."""
         return [int(str_id) for str_id in qs.split(',')]
+
+    def params_to_names(self, qs):
+        """Convert a comma-separated query param to a set of names."""
+        return {name.strip() for name in qs.split(',') if name.strip()}
+
+    def get_sparse_fields(self):
+        """Return the serializer field names selected by the request.
+
+        ``None`` means no ``fields``/``omit`` param was given and the
+        serializer should render every field.
+        """
+        if self.action not in self.sparse_actions:
+            return None
+
+        fields = self.request.query_params.get('fields')
+        omit = self.request.query_params.get('omit')
+        if fields is None and omit is None:
+            return None
+
+        selected = set(self.get_serializer_class().Meta.fields)
+        if fields is not None:
+            selected &= self.params_to_names(fields)
+        if omit is not None:
+            selected -= self.params_to_names(omit)
+        return selected
+
+    def project_queryset(self, queryset):
+        """Load only the columns and relations the response will render."""
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset.prefetch_related(*self.prefetch_fields)
+
+        concrete = {field.name for field in Recipe._meta.concrete_fields}
+        queryset = queryset.only('id', *(fields & concrete))
+        return queryset.prefetch_related(
+            *[name for name in self.prefetch_fields if name in fields]
+        )
     
 
     def get_queryset(self): 
@@ -56,7 +121,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
-        queryset = self.queryset
+        queryset = self.queryset.for_user(self.request.user)
         if tags:
             tag_ids = self.params_to_ints(tags)
             queryset = queryset.filter(tags__id__in=tag_ids)
@@ -64,7 +129,11 @@ class RecipeViewSet(viewsets.ModelViewSet):
             ingredient_ids = self.params_to_ints(ingredients)
             queryset = queryset.filter(ingredients__id__in=ingredient_ids)
 
-        return queryset.filter(user=self.request.user).order_by('-id').distinct()
+        queryset = queryset.order_by('-id').distinct()
+        if self.action in self.sparse_actions:
+            queryset = self.project_queryset(queryset)
+
+        return queryset
     
 
     
@@ -76,6 +145,13 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return serializers.RecipeImageSerializer
 
         return self.serializer_class
+
+    def get_serializer(self, *args, **kwargs):
+        """Pass the requested sparse fieldset on to the serializer."""
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
     
     def perform_create(self, serializer):
         """Create a new recipe."""
@@ -111,13 +187,15 @@ class RecipeViewSet(viewsets.ModelViewSet):
         ]
     ) 
 )
-class BaseRecipeAtrrViewSet(mixins.DestroyModelMixin, 
-                             mixins.UpdateModelMixin, 
-                             mixins.ListModelMixin, 
-                             viewsets.GenericViewSet):
+class BaseRecipeAtrrViewSet(ServerTimingMixin,
+                            mixins.DestroyModelMixin,
+                            mixins.UpdateModelMixin,
+                            mixins.ListModelMixin,
+                            viewsets.GenericViewSet):
     """Base viewset for recipe attributes."""
     serializer_class = None
     queryset = None 
+    query_budgets = {'list': 2}
 
     authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAuthenticated,) 
@@ -127,13 +205,11 @@ class BaseRecipeAtrrViewSet(mixins.DestroyModelMixin,
         assigned_only = bool(
             int(self.request.query_params.get('assigned_only',0))
             )
-        queryset = self.queryset
+        queryset = self.queryset.for_user(self.request.user)
         if assigned_only:
             queryset = queryset.filter(recipe__isnull=False)
 
-        return queryset.filter(
-            user=self.request.user
-            ).order_by('-name').distinct()
+        return queryset.order_by('-name').distinct()
     
         
     
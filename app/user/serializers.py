@@ -13,8 +13,10 @@ from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
+from core.metrics import TimedSerializerMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     User serializer
     """
@@ -45,7 +47,7 @@ class UserSerializer(serializers.ModelSerializer):
     
     
     
-class AuthTokenSerializer(serializers.Serializer):
+class AuthTokenSerializer(TimedSerializerMixin, serializers.Serializer):
     """
     Serializer for the user authentication token
     """
@@ -7,6 +7,8 @@ from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
+import msgpack
+
 from rest_framework import status
 from rest_framework.test import APIClient
 
@@ -92,6 +94,24 @@ class PublicUserApiTests(TestCase):
         self.assertIn('token', res.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_create_token_msgpack(self):
+        """Test a token can be requested and returned as MessagePack"""
+        create_user(email='test@example.com', password='test@12345')
+        payload = {
+            'email': 'test@example.com',
+            'password': 'test@12345',
+        }
+
+        res = self.client.post(
+            TOKEN_URL,
+            msgpack.packb(payload),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('token', msgpack.unpackb(res.content))
+
     def test_create_token_bad_credentials(self):
         """Test that token is not created with invalid credentials"""
         
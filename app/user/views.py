@@ -7,35 +7,38 @@ from rest_framework import generics, authentication, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from core.views import ServerTimingMixin
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer
 )
 
 
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(ServerTimingMixin, generics.CreateAPIView):
     """
     Create a new user
     """
     serializer_class = UserSerializer
 
 
-class CreateTokenView(ObtainAuthToken):
+class CreateTokenView(ServerTimingMixin, ObtainAuthToken):
     """
     Create a new auth token for user
     """
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES    
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
 
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(ServerTimingMixin, generics.RetrieveUpdateAPIView):
     """
     Manage the authenticated user
     """
     serializer_class = UserSerializer
     authentication_classes = (authentication.TokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
+    query_budgets = {'get': 1, 'put': 2, 'patch': 2}
 
     def get_object(self):
         """Retrieve and return authenticated user"""
@@ -1,13 +1,33 @@
+# Collected static files have a hash of their content in their names, so
+# those can be cached for good.
+map $uri $static_cache_control {
+    "~\.[0-9a-f]{12}\.[^/.]+$" "public, max-age=31536000, immutable";
+    default "";
+}
+
 server {
     listen ${LISTEN_PORT};
 
     location /static {
         alias /vol/static;
+
+        # Serve the .gz files written by collectstatic instead of the
+        # originals. The .br files next to them are picked up the same way
+        # by an nginx built with ngx_brotli (brotli_static on).
+        gzip_static on;
+        gzip_vary on;
+
+        add_header Cache-Control $static_cache_control;
+    }
+
+    # The admin, served by ADMIN_HOST when the app replicas only serve
+    # the API (APP_PROFILE=api).
+    location /admin/ {
+        include         /etc/nginx/admin.conf;
     }
 
     location / {
-        uwsgi_pass      ${APP_HOST}:${APP_PORT};
-        include         /etc/nginx/uwsgi_params;
+        include         /etc/nginx/app.conf;
         client_max_body_size 10M;
     }
-}
\ No newline at end of file
+}
@@ -2,5 +2,9 @@
 
 set -e
 
-envsubst < /etc/nginx/default.conf.tpl > /etc/nginx/conf.d/default.conf
-nginx -g 'daemon off;'
\ No newline at end of file
+# Only substitute our own variables; the templates also use nginx ones.
+envsubst '${LISTEN_PORT}' < /etc/nginx/default.conf.tpl > /etc/nginx/conf.d/default.conf
+envsubst '${APP_HOST} ${APP_PORT}' < /etc/nginx/app_${APP_SERVER}.conf.tpl > /etc/nginx/app.conf
+APP_HOST=${ADMIN_HOST:-$APP_HOST} APP_PORT=${ADMIN_PORT:-$APP_PORT} \
+    envsubst '${APP_HOST} ${APP_PORT}' < /etc/nginx/app_${APP_SERVER}.conf.tpl > /etc/nginx/admin.conf
+nginx -g 'daemon off;'
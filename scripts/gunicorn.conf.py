@@ -0,0 +1,29 @@
+"""
+gunicorn settings of scripts/run.sh, for APP_SERVER=asgi.
+
+The master doesn't load the application; each worker imports app.asgi
+after it is forked.
+"""
+import os
+
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    """Drop the live gauges, such as the RSS, of a worker that exited.
+
+    Runs in the master.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    """Warm up a worker once it has loaded the application.
+
+    This runs before the worker starts its event loop, so the database
+    can be used here as in any synchronous code.
+    """
+    from core import warmup
+
+    warmup.warm_up()
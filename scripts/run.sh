@@ -3,7 +3,35 @@
 set -e
 
 python manage.py wait_for_db
-python manage.py collectstatic --noinput
-python manage.py migrate
+# Static files were collected when the image was built (build_static). The
+# volume keeps the files of earlier images, for clients of running ones.
+cp -R "$STATIC_BUILD_DIR/." "${STATIC_ROOT:-/vol/web/static}/"
+# One replica applies any migrations while the others wait for them.
+python manage.py startup_migrate
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
\ No newline at end of file
+# Workers share their metrics through mmap-backed files in this directory,
+# which /api/metrics sums. Stale files of a previous run are dropped.
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/vol/metrics}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# Workers past MEMORY_RECYCLE_MB of RSS are replaced gracefully: by uWSGI
+# with --reload-on-rss, and under gunicorn by core.memory, which logs
+# what grew.
+export MEMORY_RECYCLE_MB=${MEMORY_RECYCLE_MB:-512}
+
+# Worker processes and threads follow the CPUs and memory of the
+# container unless SERVER_PROCESSES and SERVER_THREADS are set.
+eval "$(python manage.py size_workers)"
+
+# APP_SERVER=asgi serves app.asgi over HTTP with uvicorn workers, so async
+# views run on an event loop. Anything else keeps the uWSGI socket.
+if [ "$APP_SERVER" = "asgi" ]; then
+    gunicorn app.asgi:application --config /scripts/gunicorn.conf.py \
+        --bind :9000 --workers "$SERVER_PROCESSES" \
+        --worker-class uvicorn.workers.UvicornWorker
+else
+    uwsgi --ini "${UWSGI_PROFILE:-/scripts/uwsgi.ini}" --socket :9000 \
+        --processes "$SERVER_PROCESSES" --threads "$SERVER_THREADS" \
+        --reload-on-rss "$MEMORY_RECYCLE_MB"
+fi